@@ -0,0 +1,245 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/utils/Address.sol";
+
+interface IHarvestable {
+    function harvestTrigger(uint256 callCostinEth) external view returns (bool);
+
+    function harvest() external;
+
+    function tendTrigger(uint256 callCostInWei) external view returns (bool);
+
+    function tend() external;
+}
+
+// harvests a batch of strategies in one transaction. set this as the keeper on each strategy with setKeeper,
+// then our keepers call harvestDue with the full list and only the ones whose trigger is true get harvested.
+// once we're keeper, tends have to come through here too, that's tendDue
+contract MultiHarvester {
+    using Address for address;
+
+    address public governance;
+    address public pendingGovernance;
+    mapping(address => bool) public keepers;
+
+    // most gas any one strategy gets, so one that burns everything it's given can't starve the rest of the batch
+    uint256 public gasPerCall = 5_000_000;
+
+    /* ========== EVENTS ========== */
+
+    // one of these per strategy we were asked about
+    event HarvestSucceeded(address indexed strategy, uint256 gasUsed);
+    event HarvestSkipped(address indexed strategy);
+    event HarvestFailed(address indexed strategy, bytes reason);
+    event TendSucceeded(address indexed strategy, uint256 gasUsed);
+    event TendSkipped(address indexed strategy);
+    event TendFailed(address indexed strategy, bytes reason);
+
+    event KeeperUpdated(address indexed keeper, bool allowed);
+    event GovernanceUpdated(address indexed governance);
+    event GasPerCallUpdated(uint256 gasPerCall);
+
+    constructor(address _governance) public {
+        governance = _governance;
+    }
+
+    modifier onlyGovernance() {
+        require(msg.sender == governance, "!governance");
+        _;
+    }
+
+    modifier onlyKeepers() {
+        require(keepers[msg.sender] || msg.sender == governance, "!keeper");
+        _;
+    }
+
+    /* ========== KEEPER FUNCTIONS ========== */
+
+    ///@notice Harvest every strategy in the list whose harvestTrigger is true. A revert in one harvest doesn't stop the rest
+    function harvestDue(address[] calldata _strategies, uint256 _callCostInWei)
+        external
+        onlyKeepers
+        returns (uint256 harvested)
+    {
+        for (uint256 i = 0; i < _strategies.length; i++) {
+            address strategy = _strategies[i];
+            (bool ok, bool due, bytes memory reason) =
+                _trigger(
+                    strategy,
+                    IHarvestable.harvestTrigger.selector,
+                    _callCostInWei
+                );
+            if (!ok) {
+                emit HarvestFailed(strategy, reason);
+                continue;
+            }
+
+            if (!due) {
+                emit HarvestSkipped(strategy);
+                continue;
+            }
+            if (_harvest(strategy)) {
+                harvested++;
+            }
+        }
+    }
+
+    ///@notice Harvest every strategy in the list whatever its trigger says
+    function harvestAll(address[] calldata _strategies)
+        external
+        onlyKeepers
+        returns (uint256 harvested)
+    {
+        for (uint256 i = 0; i < _strategies.length; i++) {
+            if (_harvest(_strategies[i])) {
+                harvested++;
+            }
+        }
+    }
+
+    ///@notice Tend every strategy in the list whose tendTrigger is true. A revert in one tend doesn't stop the rest
+    function tendDue(address[] calldata _strategies, uint256 _callCostInWei)
+        external
+        onlyKeepers
+        returns (uint256 tended)
+    {
+        for (uint256 i = 0; i < _strategies.length; i++) {
+            address strategy = _strategies[i];
+            (bool ok, bool due, bytes memory reason) =
+                _trigger(
+                    strategy,
+                    IHarvestable.tendTrigger.selector,
+                    _callCostInWei
+                );
+            if (!ok) {
+                emit TendFailed(strategy, reason);
+                continue;
+            }
+
+            if (!due) {
+                emit TendSkipped(strategy);
+                continue;
+            }
+            uint256 gasUsed;
+            (ok, gasUsed, reason) = _work(
+                strategy,
+                IHarvestable.tend.selector
+            );
+            if (!ok) {
+                emit TendFailed(strategy, reason);
+                continue;
+            }
+            emit TendSucceeded(strategy, gasUsed);
+            tended++;
+        }
+    }
+
+    // so keepers can see what harvestDue would do without sending anything
+    function harvestTriggers(address[] calldata _strategies, uint256 _callCostInWei)
+        external
+        view
+        returns (bool[] memory due)
+    {
+        due = new bool[](_strategies.length);
+        for (uint256 i = 0; i < _strategies.length; i++) {
+            (, due[i], ) = _trigger(
+                _strategies[i],
+                IHarvestable.harvestTrigger.selector,
+                _callCostInWei
+            );
+        }
+    }
+
+    // low level calls all the way, so a bad address in the list fails on its own instead of reverting the batch.
+    // try/catch can't catch a call to something with no code or a return value that doesn't decode
+    function _trigger(
+        address _strategy,
+        bytes4 _selector,
+        uint256 _callCostInWei
+    )
+        internal
+        view
+        returns (
+            bool ok,
+            bool due,
+            bytes memory reason
+        )
+    {
+        if (!_strategy.isContract()) {
+            return (false, false, bytes("!contract"));
+        }
+        bytes memory data;
+        (ok, data) = _strategy.staticcall{gas: gasPerCall}(
+            abi.encodeWithSelector(_selector, _callCostInWei)
+        );
+        if (!ok) {
+            return (false, false, data);
+        }
+        if (data.length != 32) {
+            return (false, false, bytes("!trigger"));
+        }
+        due = abi.decode(data, (bool));
+    }
+
+    function _harvest(address _strategy) internal returns (bool) {
+        (bool ok, uint256 gasUsed, bytes memory reason) =
+            _work(_strategy, IHarvestable.harvest.selector);
+        if (!ok) {
+            emit HarvestFailed(_strategy, reason);
+            return false;
+        }
+        emit HarvestSucceeded(_strategy, gasUsed);
+        return true;
+    }
+
+    // harvest or tend with at most gasPerCall. a strategy that runs out fails on its own with an empty reason
+    function _work(address _strategy, bytes4 _selector)
+        internal
+        returns (
+            bool ok,
+            uint256 gasUsed,
+            bytes memory reason
+        )
+    {
+        if (!_strategy.isContract()) {
+            return (false, 0, bytes("!contract"));
+        }
+        uint256 gasBefore = gasleft();
+        (ok, reason) = _strategy.call{gas: gasPerCall}(
+            abi.encodeWithSelector(_selector)
+        );
+        gasUsed = gasBefore - gasleft();
+    }
+
+    /* ========== SETTERS ========== */
+
+    ///@notice Allow or remove an account that can call harvestDue, harvestAll and tendDue
+    function setKeeper(address _keeper, bool _allowed)
+        external
+        onlyGovernance
+    {
+        keepers[_keeper] = _allowed;
+        emit KeeperUpdated(_keeper, _allowed);
+    }
+
+    ///@notice Most gas a single harvest, tend or trigger call gets
+    function setGasPerCall(uint256 _gasPerCall) external onlyGovernance {
+        require(_gasPerCall > 0, "!gasPerCall");
+        gasPerCall = _gasPerCall;
+        emit GasPerCallUpdated(_gasPerCall);
+    }
+
+    ///@notice Start handing over governance, the new address has to accept it
+    function setGovernance(address _governance) external onlyGovernance {
+        pendingGovernance = _governance;
+    }
+
+    function acceptGovernance() external {
+        require(msg.sender == pendingGovernance, "!pendingGovernance");
+        governance = pendingGovernance;
+        pendingGovernance = address(0);
+        emit GovernanceUpdated(governance);
+    }
+}
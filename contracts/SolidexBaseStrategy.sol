@@ -0,0 +1,256 @@
+// SPDX-License-Identifier: AGPL-3.0
+// Feel free to change the license, but this is what we use
+
+// Feel free to change this version of Solidity. We support >=0.6.0 <0.7.0;
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+// These are the core Yearn libraries
+import {BaseStrategy, StrategyParams} from "@yearnvaults/contracts/BaseStrategy.sol";
+import {SafeERC20, SafeMath, IERC20, Address} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+import "@openzeppelin/contracts/math/Math.sol";
+
+import "./interfaces/Solidly.sol";
+
+// everything our solidex strategies share: solidly and solidex addresses, trade factory plumbing, the harvest
+// trigger, profit and loss accounting and the setters that go with them. the pair handling lives in each strategy
+abstract contract SolidexBaseStrategy is BaseStrategy {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    /* ========== STATE VARIABLES ========== */
+
+    // swap stuff
+    address internal constant solidlyRouter =
+        0xa38cd27185a464914D3046f0AB9d43356B34829D;
+    bool public tradesEnabled;
+    bool public realiseLosses;
+    bool public depositerAvoid;
+    address public tradeFactory;
+
+    IERC20 internal constant sex =
+        IERC20(0xD31Fcd1f7Ba190dBc75354046F6024A9b86014d7);
+    IERC20 internal constant solid =
+        IERC20(0x888EF71766ca594DED1F0FA3AE64eD2941740A20);
+
+    uint256 public lpSlippage; //0.05% slippage allowance by default
+
+    uint256 immutable DENOMINATOR = 10_000;
+
+    string internal stratName; // we use this for our strategy's name on cloning
+    ILpDepositer public lpDepositer;
+
+    bool internal forceHarvestTriggerOnce; // only set this to true externally when we want to trigger our keepers to harvest for us
+    uint256 public minHarvestCredit; // if we hit this amount of credit, harvest the strategy
+
+    // called from each strategy's own _initializeStrat, so clones get it too
+    function _initializeBase(string memory _name) internal {
+        // initialize variables
+        tradeFactory = address(0xD3f89C21719Ec5961a3E6B0f9bBf9F9b4180E9e9);
+        lpDepositer = ILpDepositer(0x26E1A0d851CF28E697870e1b7F053B605C8b060F);
+        lpSlippage = 9995;
+
+        maxReportDelay = 43200; // 1/2 day in seconds, if we hit this then harvestTrigger = True
+        healthCheck = address(0xf13Cd6887C62B5beC145e30c38c4938c5E627fe0); // Fantom common health check
+
+        // set our strategy's name
+        stratName = _name;
+
+        // turn off our credit harvest trigger to start with
+        minHarvestCredit = type(uint256).max;
+    }
+
+    /* ========== VIEWS ========== */
+
+    function name() external view override returns (string memory) {
+        return stratName;
+    }
+
+    // loose want in strat - should be zero most of the time
+    function balanceOfWant() public view returns (uint256) {
+        return want.balanceOf(address(this));
+    }
+
+    function _setUpTradeFactory() internal {
+        //approve and set up trade factory
+        address _tradeFactory = tradeFactory;
+
+        ITradeFactory tf = ITradeFactory(_tradeFactory);
+        sex.safeApprove(_tradeFactory, type(uint256).max);
+        tf.enable(address(sex), address(want));
+
+        solid.safeApprove(_tradeFactory, type(uint256).max);
+        tf.enable(address(solid), address(want));
+        tradesEnabled = true;
+    }
+
+    /* ========== MUTATIVE FUNCTIONS ========== */
+
+    // profit, loss and debt payment for these assets against our debt, plus how much want we need loose to pay them
+    function _reportAgainstDebt(uint256 _assets, uint256 _debtOutstanding)
+        internal
+        view
+        returns (
+            uint256 _profit,
+            uint256 _loss,
+            uint256 _debtPayment,
+            uint256 _amountToFree
+        )
+    {
+        uint256 debt = vault.strategies(address(this)).totalDebt;
+
+        if (_assets >= debt) {
+            _debtPayment = _debtOutstanding;
+            _profit = _assets.sub(debt);
+
+            _amountToFree = _profit.add(_debtPayment);
+        } else {
+            //loss should never happen. so leave blank. small potential for IP i suppose. lets not record if so and handle manually
+            //dont withdraw either incase we realise losses
+            //withdraw with loss
+            if (realiseLosses) {
+                _loss = debt.sub(_assets);
+                if (_debtOutstanding > _loss) {
+                    _debtPayment = _debtOutstanding.sub(_loss);
+                } else {
+                    _debtPayment = 0;
+                }
+
+                _amountToFree = _debtPayment;
+            }
+        }
+    }
+
+    //if we dont have enough money adjust _debtOutstanding and only change profit if needed
+    function _fitToLooseWant(
+        uint256 _profit,
+        uint256 _debtPayment,
+        uint256 _amountToFree
+    ) internal view returns (uint256, uint256) {
+        uint256 newLoose = balanceOfWant();
+
+        if (newLoose < _amountToFree) {
+            if (_profit > newLoose) {
+                _profit = newLoose;
+                _debtPayment = 0;
+            } else {
+                _debtPayment = Math.min(newLoose - _profit, _debtPayment);
+            }
+        }
+        return (_profit, _debtPayment);
+    }
+
+    function manualWithdraw(address lp, uint256 amount)
+        external
+        onlyEmergencyAuthorized
+    {
+        lpDepositer.withdraw(lp, amount);
+    }
+
+    function protectedTokens()
+        internal
+        view
+        override
+        returns (address[] memory)
+    {}
+
+    // our main trigger is regarding our DCA since there is low liquidity for our emissionToken
+    function harvestTrigger(uint256 callCostinEth)
+        public
+        view
+        override
+        returns (bool)
+    {
+        StrategyParams memory params = vault.strategies(address(this));
+
+        // harvest no matter what once we reach our maxDelay
+        if (block.timestamp.sub(params.lastReport) > maxReportDelay) {
+            return true;
+        }
+
+        // trigger if we want to manually harvest
+        if (forceHarvestTriggerOnce) {
+            return true;
+        }
+
+        // trigger if we have enough credit
+        if (vault.creditAvailable() >= minHarvestCredit) {
+            return true;
+        }
+
+        // otherwise, we don't harvest
+        return false;
+    }
+
+    function updateTradeFactory(address _newTradeFactory)
+        external
+        onlyGovernance
+    {
+        if (tradeFactory != address(0)) {
+            _removeTradeFactoryPermissions();
+        }
+
+        tradeFactory = _newTradeFactory;
+        _setUpTradeFactory();
+    }
+
+    function removeTradeFactoryPermissions() external onlyEmergencyAuthorized {
+        _removeTradeFactoryPermissions();
+    }
+
+    function _removeTradeFactoryPermissions() internal {
+        address _tradeFactory = tradeFactory;
+        sex.safeApprove(_tradeFactory, 0);
+
+        solid.safeApprove(_tradeFactory, 0);
+
+        tradeFactory = address(0);
+        tradesEnabled = false;
+    }
+
+    /* ========== SETTERS ========== */
+
+    ///@notice This allows us to manually harvest with our keeper as needed
+    function setForceHarvestTriggerOnce(bool _forceHarvestTriggerOnce)
+        external
+        onlyEmergencyAuthorized
+    {
+        forceHarvestTriggerOnce = _forceHarvestTriggerOnce;
+    }
+
+    ///@notice When our strategy has this much credit, harvestTrigger will be true.
+    function setMinHarvestCredit(uint256 _minHarvestCredit)
+        external
+        onlyEmergencyAuthorized
+    {
+        minHarvestCredit = _minHarvestCredit;
+    }
+
+    function setRealiseLosses(bool _realiseLoosses) external onlyVaultManagers {
+        realiseLosses = _realiseLoosses;
+    }
+
+    function setLpSlippage(uint256 _slippage) external onlyEmergencyAuthorized {
+        _setLpSlippage(_slippage, false);
+    }
+
+    //only vault managers can set high slippage
+    function setLpSlippage(uint256 _slippage, bool _force)
+        external
+        onlyVaultManagers
+    {
+        _setLpSlippage(_slippage, _force);
+    }
+
+    function _setLpSlippage(uint256 _slippage, bool _force) internal {
+        require(_slippage <= DENOMINATOR, "higher than max");
+        if (!_force) {
+            require(_slippage >= 9900, "higher than 1pc slippage set");
+        }
+        lpSlippage = _slippage;
+    }
+
+    function setDepositerAvoid(bool _avoid) external onlyGovernance {
+        depositerAvoid = _avoid;
+    }
+}
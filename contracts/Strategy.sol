@@ -5,59 +5,10 @@
 pragma solidity 0.6.12;
 pragma experimental ABIEncoderV2;
 // Gary's Fork
-// These are the core Yearn libraries
-import {BaseStrategy, StrategyParams} from "@yearnvaults/contracts/BaseStrategy.sol";
 import {SafeERC20, SafeMath, IERC20, Address} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
 import "@openzeppelin/contracts/math/Math.sol";
 
-struct route {
-    address from;
-    address to;
-    bool stable;
-}
-
-interface ISolidlyRouter {
-    function addLiquidity(
-        address,
-        address,
-        bool,
-        uint256,
-        uint256,
-        uint256,
-        uint256,
-        address,
-        uint256
-    )
-        external
-        returns (
-            uint256 amountA,
-            uint256 amountB,
-            uint256 liquidity
-        );
-
-    function getAmountsOut(uint256 amountIn, route[] memory routes)
-        external
-        view
-        returns (uint256[] memory amounts);
-
-    function removeLiquidity(
-        address tokenA,
-        address tokenB,
-        bool stable,
-        uint256 liquidity,
-        uint256 amountAMin,
-        uint256 amountBMin,
-        address to,
-        uint256 deadline
-    ) external returns (uint256 amountA, uint256 amountB);
-
-    function quoteRemoveLiquidity(
-        address tokenA,
-        address tokenB,
-        bool stable,
-        uint256 liquidity
-    ) external view returns (uint256 amountA, uint256 amountB);
-}
+import "./SolidexBaseStrategy.sol";
 
 // boo:xboo ratios, enter = "Locks Boo and mints xBoo", leave = "Unlocks the staked + gained Boo, and burns xBoo"
 interface IAnyWFTM is IERC20 {
@@ -70,61 +21,40 @@ interface IAnyWFTM is IERC20 {
     function deposit() external returns (uint256);
 }
 
-interface ITradeFactory {
-    function enable(address, address) external;
-}
-
-interface ILpDepositer {
-    function deposit(address pool, uint256 _amount) external;
-
-    function withdraw(address pool, uint256 _amount) external; // use amount = 0 for harvesting rewards
-
-    function userBalances(address user, address pool)
-        external
-        view
-        returns (uint256);
-
-    function getReward(address[] memory lps) external;
-}
-
-contract Strategy is BaseStrategy {
+contract Strategy is SolidexBaseStrategy {
     using SafeERC20 for IERC20;
     using Address for address;
     using SafeMath for uint256;
 
     /* ========== STATE VARIABLES ========== */
 
-    // swap stuff
-    address internal constant solidlyRouter =
-        0xa38cd27185a464914D3046f0AB9d43356B34829D;
-    bool public tradesEnabled;
-    bool public realiseLosses;
-    bool public depositerAvoid;
-    address public tradeFactory =
-        address(0xD3f89C21719Ec5961a3E6B0f9bBf9F9b4180E9e9);
-
     IERC20 internal constant wftm =
         IERC20(0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83);
     IAnyWFTM internal constant anyWFTM =
         IAnyWFTM(0x6362496Bef53458b20548a35A2101214Ee2BE3e0);
 
-    IERC20 internal constant sex =
-        IERC20(0xD31Fcd1f7Ba190dBc75354046F6024A9b86014d7);
-    IERC20 internal constant solid =
-        IERC20(0x888EF71766ca594DED1F0FA3AE64eD2941740A20);
+    uint256 public maxDepositBps; // max wftm deposited per harvest or tend, as bps of pool reserves
+    uint256 public bufferBps; // share of our assets kept loose to serve withdrawals, refilled on harvests
+
+    uint256 internal constant REWARD_TWAP_POINTS = 2; // solidly writes an observation every 30 minutes, so about the last hour
+    uint256 internal constant DUST = 1e17; // dont bother depositing less than 0.1 wftm over our buffer
+
+    address public lpToken;
 
-    uint256 public lpSlippage = 9995; //0.05% slippage allowance
+    bool public sellRewardsOnHarvest; // sell sex and solid through solidly during harvests when we have no trade factory
+    uint256 public rewardSellSlippage; // worst price we accept on those sells, in bps of the pair's twap
 
-    uint256 immutable DENOMINATOR = 10_000;
+    /* ========== EVENTS ========== */
 
-    string internal stratName; // we use this for our strategy's name on cloning
-    address public lpToken =
-        address(0x9aC7664060a3e388CEB157C5a0B6064BeFFAb9f2);
-    ILpDepositer public lpDepositer =
-        ILpDepositer(0x26E1A0d851CF28E697870e1b7F053B605C8b060F);
+    // why adjustPosition left funds idle. observed is the idle amount, or for LpPrice the worst 1e18 quote we got
+    enum SkipReason {EmergencyExit, Dust, LpPrice}
 
-    bool internal forceHarvestTriggerOnce; // only set this to true externally when we want to trigger our keepers to harvest for us
-    uint256 public minHarvestCredit; // if we hit this amount of credit, harvest the strategy
+    event Deposited(uint256 wftmIn, uint256 anyWftmIn, uint256 lpMinted);
+    event Withdrawn(uint256 lpBurned, uint256 wftmOut, uint256 anyWftmOut);
+    event AnyWftmWrapped(uint256 amount);
+    event AnyWftmUnwrapped(uint256 amount);
+    event DepositSkipped(SkipReason reason, uint256 observed);
+    event RewardsSold(address indexed token, uint256 amountIn, uint256 wftmOut);
 
     /* ========== CONSTRUCTOR ========== */
 
@@ -132,7 +62,6 @@ contract Strategy is BaseStrategy {
         public
         BaseStrategy(_vault)
     {
-        require(vault.token() == address(wftm));
         _initializeStrat(_name);
     }
 
@@ -140,17 +69,67 @@ contract Strategy is BaseStrategy {
 
     event Cloned(address indexed clone);
 
+    bool public isOriginal = true;
+
+    // we use this to clone our original strategy to other vaults
+    function cloneStrategy(
+        address _vault,
+        address _strategist,
+        address _rewards,
+        address _keeper,
+        string memory _name
+    ) external returns (address newStrategy) {
+        require(isOriginal, "!clone");
+        bytes20 addressBytes = bytes20(address(this));
+
+        assembly {
+            // EIP-1167 bytecode
+            let clone_code := mload(0x40)
+            mstore(
+                clone_code,
+                0x3d602d80600a3d3981f3363d3d373d3d3d363d73000000000000000000000000
+            )
+            mstore(add(clone_code, 0x14), addressBytes)
+            mstore(
+                add(clone_code, 0x28),
+                0x5af43d82803e903d91602b57fd5bf30000000000000000000000000000000000
+            )
+            newStrategy := create(0, clone_code, 0x37)
+        }
+
+        Strategy(newStrategy).initialize(
+            _vault,
+            _strategist,
+            _rewards,
+            _keeper,
+            _name
+        );
+
+        emit Cloned(newStrategy);
+    }
+
+    // this will only be called by the clone function above
+    function initialize(
+        address _vault,
+        address _strategist,
+        address _rewards,
+        address _keeper,
+        string memory _name
+    ) public {
+        _initialize(_vault, _strategist, _rewards, _keeper);
+        _initializeStrat(_name);
+    }
+
     // this is called by our original strategy, as well as any clones
     function _initializeStrat(string memory _name) internal {
-        // initialize variables
-        maxReportDelay = 43200; // 1/2 day in seconds, if we hit this then harvestTrigger = True
-        healthCheck = address(0xf13Cd6887C62B5beC145e30c38c4938c5E627fe0); // Fantom common health check
+        require(vault.token() == address(wftm));
 
-        // set our strategy's name
-        stratName = _name;
+        _initializeBase(_name);
 
-        // turn off our credit harvest trigger to start with
-        minHarvestCredit = type(uint256).max;
+        // initialize variables
+        lpToken = address(0x9aC7664060a3e388CEB157C5a0B6064BeFFAb9f2);
+        maxDepositBps = 10_000;
+        rewardSellSlippage = 9900;
 
         // add approvals on all tokens
         IERC20(lpToken).approve(address(lpDepositer), type(uint256).max);
@@ -162,35 +141,91 @@ contract Strategy is BaseStrategy {
 
     /* ========== VIEWS ========== */
 
-    function name() external view override returns (string memory) {
-        return stratName;
+    function balanceOfAnyWftm() public view returns (uint256) {
+        return anyWFTM.balanceOf(address(this));
     }
 
-    // balance of boo in strat - should be zero most of the time
-    function balanceOfWant() public view returns (uint256) {
-        return want.balanceOf(address(this));
+    ///@notice How much loose wftm we aim to hold so small withdrawals don't need to touch the lp
+    function bufferTarget() public view returns (uint256) {
+        if (bufferBps == 0) {
+            return 0;
+        }
+        return estimatedTotalAssets().mul(bufferBps).div(DENOMINATOR);
     }
 
-    function balanceOfAnyWftm() public view returns (uint256) {
-        return anyWFTM.balanceOf(address(this));
+    // loose wftm and anyWFTM that tend or harvest would put to work
+    function idleFunds() public view returns (uint256) {
+        return balanceOfWant().add(balanceOfAnyWftm());
     }
 
     function balanceOfLPStaked() public view returns (uint256) {
         return lpDepositer.userBalances(address(this), lpToken);
     }
 
+    // the router's quoteRemoveLiquidity maths, read straight off the pair instead of going through the router.
+    // wftm's address sorts below anyWFTM's, so wftm is token0
     function balanceOfConstituents(uint256 liquidity)
         public
         view
         returns (uint256 amountWftm, uint256 amountAnyWftm)
     {
-        (amountWftm, amountAnyWftm) = ISolidlyRouter(solidlyRouter)
-            .quoteRemoveLiquidity(
-                address(wftm),
-                address(anyWFTM),
-                true, //stable pool
-                liquidity
-            );
+        address lp = lpToken;
+        uint256 lpSupply = IERC20(lp).totalSupply();
+        if (lpSupply == 0) {
+            return (0, 0);
+        }
+        (uint256 reserveWftm, uint256 reserveAnyWftm, ) =
+            ISolidlyPair(lp).getReserves();
+        amountWftm = liquidity.mul(reserveWftm).div(lpSupply);
+        amountAnyWftm = liquidity.mul(reserveAnyWftm).div(lpSupply);
+    }
+
+    ///@notice The most wftm we will add to the pool in a single harvest or tend, based on current pool reserves
+    function maxDeposit() public view returns (uint256) {
+        return
+            wftm
+                .balanceOf(lpToken)
+                .add(anyWFTM.balanceOf(lpToken))
+                .mul(maxDepositBps)
+                .div(DENOMINATOR);
+    }
+
+    //because it is a stable pool, lets check slippage by doing a trade against it. if we can swap 1 wftm for less than slippage we gucci
+    function lpPriceOk() public view returns (bool) {
+        (bool ok, ) = _lpPriceCheck();
+        return ok;
+    }
+
+    // both ways round 1e18 has to come back within lpSlippage. also hands back the worst quote we saw
+    function _lpPriceCheck()
+        internal
+        view
+        returns (bool ok, uint256 worstQuote)
+    {
+        uint256 inAmount = 1e18;
+        //allow 0.05% slippage by default
+        uint256 minOut = inAmount.mul(lpSlippage).div(DENOMINATOR);
+
+        //ftm to any
+        route[] memory routes = new route[](1);
+        routes[0] = route(address(wftm), address(anyWFTM), true);
+        worstQuote = ISolidlyRouter(solidlyRouter).getAmountsOut(
+            inAmount,
+            routes
+        )[1];
+        if (worstQuote < minOut) {
+            return (false, worstQuote);
+        }
+
+        //any to ftm
+        routes[0] = route(address(anyWFTM), address(wftm), true);
+        uint256 amountOut = ISolidlyRouter(solidlyRouter).getAmountsOut(
+            inAmount,
+            routes
+        )[1];
+        worstQuote = Math.min(worstQuote, amountOut);
+
+        return (worstQuote >= minOut, worstQuote);
     }
 
     //wftm and anywftm are interchangeable 1-1. so we need our balance of each. added to whatever we can withdraw from lps
@@ -209,19 +244,6 @@ contract Strategy is BaseStrategy {
             );
     }
 
-    function _setUpTradeFactory() internal {
-        //approve and set up trade factory
-        address _tradeFactory = tradeFactory;
-
-        ITradeFactory tf = ITradeFactory(_tradeFactory);
-        sex.safeApprove(_tradeFactory, type(uint256).max);
-        tf.enable(address(sex), address(want));
-
-        solid.safeApprove(_tradeFactory, type(uint256).max);
-        tf.enable(address(solid), address(want));
-        tradesEnabled = true;
-    }
-
     /* ========== MUTATIVE FUNCTIONS ========== */
 
     function prepareReturn(uint256 _debtOutstanding)
@@ -241,137 +263,154 @@ contract Strategy is BaseStrategy {
         pairs[0] = address(lpToken);
         lpDepositer.getReward(pairs);
 
+        // no trade factory to sell for us, so do it ourselves and report it as profit now
+        if (sellRewardsOnHarvest && !tradesEnabled) {
+            _sellReward(sex);
+            _sellReward(solid);
+        }
+
         uint256 assets = estimatedTotalAssets();
         uint256 wantBal = balanceOfWant();
 
-        uint256 debt = vault.strategies(address(this)).totalDebt;
         uint256 amountToFree;
+        (_profit, _loss, _debtPayment, amountToFree) = _reportAgainstDebt(
+            assets,
+            _debtOutstanding
+        );
 
-        if (assets >= debt) {
-            _debtPayment = _debtOutstanding;
-            _profit = assets.sub(debt);
-
-            amountToFree = _profit.add(_debtPayment);
-        } else {
-            //loss should never happen. so leave blank. small potential for IP i suppose. lets not record if so and handle manually
-            //dont withdraw either incase we realise losses
-            //withdraw with loss
-            if (realiseLosses) {
-                _loss = debt.sub(assets);
-                if (_debtOutstanding > _loss) {
-                    _debtPayment = _debtOutstanding.sub(_loss);
-                } else {
-                    _debtPayment = 0;
-                }
-
-                amountToFree = _debtPayment;
-            }
+        // top up our withdrawal buffer while we are already unwinding. this is the only place it gets refilled
+        uint256 toLiquidate = amountToFree;
+        if (bufferBps > 0 && assets > amountToFree) {
+            toLiquidate = amountToFree.add(
+                assets.sub(amountToFree).mul(bufferBps).div(DENOMINATOR)
+            );
         }
 
         //amountToFree > 0 checking (included in the if statement)
-        if (wantBal < amountToFree) {
-            liquidatePosition(amountToFree);
-
-            uint256 newLoose = want.balanceOf(address(this));
-
-            //if we dont have enough money adjust _debtOutstanding and only change profit if needed
-            if (newLoose < amountToFree) {
-                if (_profit > newLoose) {
-                    _profit = newLoose;
-                    _debtPayment = 0;
-                } else {
-                    _debtPayment = Math.min(newLoose - _profit, _debtPayment);
-                }
-            }
+        if (wantBal < toLiquidate) {
+            liquidatePosition(toLiquidate);
+
+            (_profit, _debtPayment) = _fitToLooseWant(
+                _profit,
+                _debtPayment,
+                amountToFree
+            );
         }
 
         // we're done harvesting, so reset our trigger if we used it
         forceHarvestTriggerOnce = false;
     }
 
-    function adjustPosition(uint256 _debtOutstanding) internal override {
-        if (emergencyExit) {
+    function _sellReward(IERC20 _token) internal {
+        uint256 amount = _token.balanceOf(address(this));
+        if (amount < 1e15) {
             return;
         }
-        // send all of our want tokens to be deposited
-        uint256 toInvest = balanceOfWant();
-        // stake only if we have something to stake
-        // dont bother for less than 0.1 wftm
-        if (toInvest > 1e17) {
-            //because it is a stable pool, lets check slippage by doing a trade against it. if we can swap 1 wftm for less than slippage we gucci
-            route memory ftmToAny = route(
-                address(wftm),
-                address(anyWFTM),
-                true
-            );
-            route memory anyToWftm = route(
-                address(anyWFTM),
-                address(wftm),
-                true
-            );
 
-            uint256 inAmount = 1e18;
-
-            //ftm to any
-            route[] memory routes = new route[](1);
-            routes[0] = ftmToAny;
-            uint256 amountOut = ISolidlyRouter(solidlyRouter).getAmountsOut(
-                inAmount,
-                routes
-            )[1];
-            //allow 0.05% slippage by default
-            if (amountOut < inAmount.mul(lpSlippage).div(DENOMINATOR)) {
-                //dont do anything because we would be lping into the lp at a bad price
-                return;
-            }
+        // anything read from the pool now can be pushed around in this block, the twap can't.
+        // pairFor is just the create2 address, so there may be no pair there, or one too new to have
+        // the observations. either way these wait for yswaps rather than taking the harvest down
+        address pair = ISolidlyRouter(solidlyRouter).pairFor(
+            address(_token),
+            address(wftm),
+            false
+        );
+        if (!pair.isContract()) {
+            return;
+        }
+        uint256 minOut;
+        try
+            ISolidlyPair(pair).quote(
+                address(_token),
+                amount,
+                REWARD_TWAP_POINTS
+            )
+        returns (uint256 twapOut) {
+            minOut = twapOut.mul(rewardSellSlippage).div(DENOMINATOR);
+        } catch {
+            return;
+        }
 
-            //any to ftm
-            routes[0] = anyToWftm;
-            amountOut = ISolidlyRouter(solidlyRouter).getAmountsOut(
-                inAmount,
-                routes
-            )[1];
+        route[] memory routes = new route[](1);
+        routes[0] = route(address(_token), address(wftm), false);
+        uint256 expected = ISolidlyRouter(solidlyRouter).getAmountsOut(
+            amount,
+            routes
+        )[1];
+        if (expected < minOut) {
+            // the pool is off its twap, these can wait for a later harvest or a trade factory
+            return;
+        }
 
-            if (amountOut < inAmount.mul(lpSlippage).div(DENOMINATOR)) {
+        uint256[] memory amounts = ISolidlyRouter(solidlyRouter)
+            .swapExactTokensForTokens(
+            amount,
+            minOut,
+            routes,
+            address(this),
+            block.timestamp
+        );
+        emit RewardsSold(address(_token), amount, amounts[1]);
+    }
+
+    function adjustPosition(uint256 _debtOutstanding) internal override {
+        // send our want tokens to be deposited, up to our per-call cap. loose anyWFTM gets unwrapped and counts too
+        // whatever we need for our withdrawal buffer stays loose
+        uint256 buffer = bufferTarget();
+        uint256 toInvest = idleFunds();
+        if (emergencyExit) {
+            // only worth a log if we'd otherwise have deposited
+            if (toInvest > buffer.add(DUST)) {
+                emit DepositSkipped(SkipReason.EmergencyExit, toInvest);
+            }
+            return;
+        }
+        // stake only if we have something to stake
+        if (toInvest > buffer.add(DUST)) {
+            (bool priceOk, uint256 quote) = _lpPriceCheck();
+            if (!priceOk) {
                 //dont do anything because we would be lping into the lp at a bad price
+                emit DepositSkipped(SkipReason.LpPrice, quote);
                 return;
             }
 
             uint256 anyWftmBal = balanceOfAnyWftm();
             if (anyWftmBal > 1e7) {
                 //lazy approach. thank you cheap fantom. lets withdraw
-                anyWFTM.withdraw();
+                _unwrapAnyWftm();
             }
 
+            //large inflows are fed into the pool over several harvests and tends, anything over our cap stays loose
+            toInvest = Math.min(
+                balanceOfWant().sub(Math.min(buffer, balanceOfWant())),
+                maxDeposit()
+            );
+
             //now we get the ratio we need of each token in the lp. this determines how many we need of each
             uint256 wftmB = wftm.balanceOf(lpToken);
             uint256 anyWftmB = anyWFTM.balanceOf(lpToken);
 
-            uint256 wftmBal = balanceOfWant();
-            uint256 anyWeNeed = wftmBal.mul(anyWftmB).div(wftmB.add(anyWftmB));
+            uint256 anyWeNeed = toInvest.mul(anyWftmB).div(
+                wftmB.add(anyWftmB)
+            );
 
             if (anyWeNeed > 1e7) {
                 //we want to mint some anyWftm
-                anyWFTM.deposit(anyWeNeed);
+                emit AnyWftmWrapped(anyWFTM.deposit(anyWeNeed));
             }
 
-            wftmBal = balanceOfWant();
+            uint256 wftmBal = Math.min(
+                balanceOfWant(),
+                toInvest.sub(anyWeNeed)
+            );
             anyWftmBal = balanceOfAnyWftm();
 
             if (anyWftmBal > 0 && wftmBal > 0) {
                 // deposit into lp
-                ISolidlyRouter(solidlyRouter).addLiquidity(
-                    address(wftm),
-                    address(anyWFTM),
-                    true,
-                    wftmBal,
-                    anyWftmBal,
-                    0,
-                    0,
-                    address(this),
-                    2**256 - 1
-                );
+                _addLiquidity(wftmBal, anyWftmBal);
             }
+        } else if (toInvest > buffer) {
+            emit DepositSkipped(SkipReason.Dust, toInvest.sub(buffer));
         }
         uint256 lpBalance = IERC20(lpToken).balanceOf(address(this));
 
@@ -384,6 +423,7 @@ contract Strategy is BaseStrategy {
     //returns lp tokens needed to get that amount of boo
     function wftmToLpTokens(uint256 amountOfWftmWeWant)
         public
+        view
         returns (uint256)
     {
         //amount of wftm and anyWftm for 1 lp token
@@ -401,19 +441,77 @@ contract Strategy is BaseStrategy {
         return lpTokensWeNeed;
     }
 
+    ///@notice What liquidatePosition(_amountNeeded) would do right now: lp unstaked from solidex, lp burned, wftm and anyWFTM out of the burn, and the loss we would report. Priced off the pair's current reserves
+    function previewLiquidate(uint256 _amountNeeded)
+        external
+        view
+        returns (
+            uint256 lpToUnstake,
+            uint256 lpToBurn,
+            uint256 wftmOut,
+            uint256 anyWftmOut,
+            uint256 loss
+        )
+    {
+        // same steps as liquidatePosition, with balances tracked here instead of moved
+        uint256 balanceOfWftm = balanceOfWant();
+        if (balanceOfWftm >= _amountNeeded) {
+            return (0, 0, 0, 0, 0);
+        }
+
+        uint256 anyWftmBal = balanceOfAnyWftm();
+        if (anyWftmBal > 1e7) {
+            balanceOfWftm = balanceOfWftm.add(anyWftmBal);
+            anyWftmBal = 0;
+        }
+        if (balanceOfWftm >= _amountNeeded) {
+            return (0, 0, 0, 0, 0);
+        }
+
+        uint256 lpTokensNeeded = wftmToLpTokens(
+            _amountNeeded.sub(balanceOfWftm)
+        );
+        uint256 balanceOfLpTokens = IERC20(lpToken).balanceOf(address(this));
+        if (balanceOfLpTokens < lpTokensNeeded) {
+            lpToUnstake = Math.min(
+                lpTokensNeeded.sub(balanceOfLpTokens),
+                balanceOfLPStaked()
+            );
+            balanceOfLpTokens = balanceOfLpTokens.add(lpToUnstake);
+        }
+        lpToBurn = Math.min(lpTokensNeeded, balanceOfLpTokens);
+
+        (wftmOut, anyWftmOut) = balanceOfConstituents(lpToBurn);
+        balanceOfWftm = balanceOfWftm.add(wftmOut);
+        anyWftmBal = anyWftmBal.add(anyWftmOut);
+        if (anyWftmBal > 1e7) {
+            balanceOfWftm = balanceOfWftm.add(anyWftmBal);
+        }
+
+        if (balanceOfWftm < _amountNeeded) {
+            loss = _amountNeeded.sub(balanceOfWftm);
+        }
+    }
+
     function liquidatePosition(uint256 _amountNeeded)
         internal
         override
         returns (uint256 _liquidatedAmount, uint256 _loss)
     {
+        uint256 balanceOfWftm = balanceOfWant();
+
+        // serve straight from loose wftm (our withdrawal buffer) when we can
+        if (balanceOfWftm >= _amountNeeded) {
+            return (_amountNeeded, 0);
+        }
+
         //if we have loose anyWftm. liquidated it
         uint256 anyWftmBal = balanceOfAnyWftm();
         if (anyWftmBal > 1e7) {
-            anyWFTM.withdraw();
+            _unwrapAnyWftm();
+            balanceOfWftm = balanceOfWant();
         }
 
-        uint256 balanceOfWftm = balanceOfWant();
-
         // if we need more boo than is already loose in the contract
         if (balanceOfWftm < _amountNeeded) {
             // wftm needed beyond any boo that is already loose in the contract
@@ -442,25 +540,13 @@ contract Strategy is BaseStrategy {
                 balanceOfLpTokens = IERC20(lpToken).balanceOf(address(this));
             }
 
-            uint256 amountWftm;
-            uint256 amountAnyWftm;
             if (balanceOfLpTokens > 0) {
-                (amountWftm, amountAnyWftm) = ISolidlyRouter(solidlyRouter)
-                    .removeLiquidity(
-                        address(wftm),
-                        address(anyWFTM),
-                        true,
-                        Math.min(lpTokensNeeded, balanceOfLpTokens),
-                        0,
-                        0,
-                        address(this),
-                        type(uint256).max
-                    );
+                _removeLiquidity(Math.min(lpTokensNeeded, balanceOfLpTokens));
             }
 
             anyWftmBal = balanceOfAnyWftm();
             if (anyWftmBal > 1e7) {
-                anyWFTM.withdraw();
+                _unwrapAnyWftm();
             }
 
             _liquidatedAmount = Math.min(
@@ -477,25 +563,66 @@ contract Strategy is BaseStrategy {
     }
 
     function liquidateAllPositions() internal override returns (uint256) {
+        _unwindAll();
+
+        return balanceOfWant();
+    }
+
+    // unstake everything, burn all of our lp and unwrap any anyWFTM we get back
+    function _unwindAll() internal {
         uint256 staked = balanceOfLPStaked();
         if (staked > 0) {
-            lpDepositer.withdraw(lpToken, balanceOfLPStaked());
-            ISolidlyRouter(solidlyRouter).removeLiquidity(
-                address(wftm),
-                address(anyWFTM),
-                true,
-                IERC20(lpToken).balanceOf(address(this)),
-                0,
-                0,
-                address(this),
-                type(uint256).max
-            );
+            lpDepositer.withdraw(lpToken, staked);
+        }
+
+        uint256 lpBalance = IERC20(lpToken).balanceOf(address(this));
+        if (lpBalance > 0) {
+            _removeLiquidity(lpBalance);
         }
         if (balanceOfAnyWftm() > 0) {
-            anyWFTM.withdraw();
+            _unwrapAnyWftm();
         }
+    }
 
-        return balanceOfWant();
+    function _addLiquidity(uint256 _wftmAmount, uint256 _anyWftmAmount)
+        internal
+    {
+        (
+            uint256 wftmIn,
+            uint256 anyWftmIn,
+            uint256 lpMinted
+        ) = ISolidlyRouter(solidlyRouter).addLiquidity(
+            address(wftm),
+            address(anyWFTM),
+            true,
+            _wftmAmount,
+            _anyWftmAmount,
+            0,
+            0,
+            address(this),
+            2**256 - 1
+        );
+        emit Deposited(wftmIn, anyWftmIn, lpMinted);
+    }
+
+    function _removeLiquidity(uint256 _lpAmount) internal {
+        (uint256 wftmOut, uint256 anyWftmOut) = ISolidlyRouter(solidlyRouter)
+            .removeLiquidity(
+            address(wftm),
+            address(anyWFTM),
+            true,
+            _lpAmount,
+            0,
+            0,
+            address(this),
+            type(uint256).max
+        );
+        emit Withdrawn(_lpAmount, wftmOut, anyWftmOut);
+    }
+
+    // anyWFTM hands back how much it unwrapped, so logging this costs us nothing extra
+    function _unwrapAnyWftm() internal {
+        emit AnyWftmUnwrapped(anyWFTM.withdraw());
     }
 
     function prepareMigration(address _newStrategy) internal override {
@@ -520,124 +647,97 @@ contract Strategy is BaseStrategy {
         }
     }
 
-    function manualWithdraw(address lp, uint256 amount)
+    ///@notice Unstake, remove liquidity and unwrap in one transaction. Reverts if the unwind itself gives us less than _minWftmOut wftm.
+    function emergencyUnwind(uint256 _minWftmOut)
         external
         onlyEmergencyAuthorized
     {
-        lpDepositer.withdraw(lp, amount);
-    }
+        // the wftm stays here. set emergencyExit and harvest so the vault gets it back as a debt payment
+        uint256 wantBefore = balanceOfWant();
+        _unwindAll();
 
-    function protectedTokens()
-        internal
-        view
-        override
-        returns (address[] memory)
-    {}
+        require(
+            balanceOfWant().sub(wantBefore) >= _minWftmOut,
+            "below min out"
+        );
+    }
 
-    // our main trigger is regarding our DCA since there is low liquidity for our emissionToken
-    function harvestTrigger(uint256 callCostinEth)
+    // tend when we have enough idle wftm and anyWFTM to be worth the gas, e.g. a deposit backlog or a donation
+    function tendTrigger(uint256 callCostinEth)
         public
         view
         override
         returns (bool)
     {
-        StrategyParams memory params = vault.strategies(address(this));
-
-        // harvest no matter what once we reach our maxDelay
-        if (block.timestamp.sub(params.lastReport) > maxReportDelay) {
-            return true;
+        if (emergencyExit) {
+            return false;
         }
 
-        // trigger if we want to manually harvest
-        if (forceHarvestTriggerOnce) {
-            return true;
+        // same dust threshold as adjustPosition, ignoring our withdrawal buffer
+        uint256 idle = idleFunds();
+        uint256 buffer = bufferTarget();
+        if (idle <= buffer.add(DUST)) {
+            return false;
         }
+        idle = idle.sub(buffer);
 
-        // trigger if we have enough credit
-        if (vault.creditAvailable() >= minHarvestCredit) {
-            return true;
+        // idle funds need to be worth profitFactor times the cost of the call
+        if (idle < profitFactor.mul(ethToWant(callCostinEth))) {
+            return false;
         }
 
-        // otherwise, we don't harvest
-        return false;
+        // no point tending if the slippage check would fail
+        return lpPriceOk();
     }
 
+    // want is wftm, so 1 ftm is 1 want
     function ethToWant(uint256 _amtInWei)
         public
         view
         override
         returns (uint256)
-    {}
-
-    function updateTradeFactory(address _newTradeFactory)
-        external
-        onlyGovernance
     {
-        if (tradeFactory != address(0)) {
-            _removeTradeFactoryPermissions();
-        }
-
-        tradeFactory = _newTradeFactory;
-        _setUpTradeFactory();
-    }
-
-    function removeTradeFactoryPermissions() external onlyEmergencyAuthorized {
-        _removeTradeFactoryPermissions();
-    }
-
-    function _removeTradeFactoryPermissions() internal {
-        address _tradeFactory = tradeFactory;
-        sex.safeApprove(_tradeFactory, 0);
-
-        solid.safeApprove(_tradeFactory, 0);
-
-        tradeFactory = address(0);
-        tradesEnabled = false;
+        return _amtInWei;
     }
 
     /* ========== SETTERS ========== */
 
-    ///@notice This allows us to manually harvest with our keeper as needed
-    function setForceHarvestTriggerOnce(bool _forceHarvestTriggerOnce)
-        external
-        onlyEmergencyAuthorized
-    {
-        forceHarvestTriggerOnce = _forceHarvestTriggerOnce;
-    }
-
-    ///@notice When our strategy has this much credit, harvestTrigger will be true.
-    function setMinHarvestCredit(uint256 _minHarvestCredit)
+    ///@notice Cap how much wftm we deposit per harvest or tend, in bps of the pool's reserves. Excess waits for the next tend.
+    function setMaxDepositBps(uint256 _maxDepositBps)
         external
-        onlyEmergencyAuthorized
+        onlyVaultManagers
     {
-        minHarvestCredit = _minHarvestCredit;
-    }
-
-    function setRealiseLosses(bool _realiseLoosses) external onlyVaultManagers {
-        realiseLosses = _realiseLoosses;
+        require(_maxDepositBps > 0, "zero");
+        require(_maxDepositBps <= DENOMINATOR, "higher than max");
+        maxDepositBps = _maxDepositBps;
     }
 
-    function setLpSlippage(uint256 _slippage) external onlyEmergencyAuthorized {
-        _setLpSlippage(_slippage, false);
+    ///@notice Keep this share of our assets as loose wftm for withdrawals, in bps. Only refilled when we harvest.
+    function setBufferBps(uint256 _bufferBps) external onlyVaultManagers {
+        require(_bufferBps <= DENOMINATOR, "higher than max");
+        bufferBps = _bufferBps;
     }
 
-    //only vault managers can set high slippage
-    function setLpSlippage(uint256 _slippage, bool _force)
-        external
-        onlyVaultManagers
-    {
-        _setLpSlippage(_slippage, _force);
-    }
-
-    function _setLpSlippage(uint256 _slippage, bool _force) internal {
-        require(_slippage <= DENOMINATOR, "higher than max");
-        if (!_force) {
-            require(_slippage >= 9900, "higher than 1pc slippage set");
+    ///@notice Sell our rewards through solidly during harvests when there is no trade factory. Slippage is the share of the twap price we must get, in bps. Below 9900 needs _force. Both are ignored when disabling.
+    function setSellRewardsOnHarvest(
+        bool _enabled,
+        uint256 _slippage,
+        bool _force
+    ) external onlyVaultManagers {
+        // turning it off doesn't touch the slippage, whatever is passed
+        if (_enabled) {
+            require(_slippage <= DENOMINATOR, "higher than max");
+            if (!_force) {
+                require(_slippage >= 9900, "slippage below 9900 needs force");
+            }
+            rewardSellSlippage = _slippage;
         }
-        lpSlippage = _slippage;
-    }
+        sellRewardsOnHarvest = _enabled;
 
-    function setDepositerAvoid(bool _avoid) external onlyGovernance {
-        depositerAvoid = _avoid;
+        uint256 allowance = _enabled ? type(uint256).max : 0;
+        sex.safeApprove(solidlyRouter, 0);
+        sex.safeApprove(solidlyRouter, allowance);
+        solid.safeApprove(solidlyRouter, 0);
+        solid.safeApprove(solidlyRouter, allowance);
     }
 }
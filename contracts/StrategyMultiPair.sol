@@ -0,0 +1,474 @@
+// SPDX-License-Identifier: AGPL-3.0
+// Feel free to change the license, but this is what we use
+
+// Feel free to change this version of Solidity. We support >=0.6.0 <0.7.0;
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import {SafeERC20, SafeMath, IERC20} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+import "@openzeppelin/contracts/math/Math.sol";
+
+import "./SolidexBaseStrategy.sol";
+
+// one strategy holding several solidly stable pairs that all share our want token, staked on solidex
+contract StrategyMultiPair is SolidexBaseStrategy {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    /* ========== STATE VARIABLES ========== */
+
+    address[] public lpTokens; // every pair must be a stable pair containing want
+    uint256[] public weights; // share of each deposit sent to each pair, in bps of DENOMINATOR
+
+    /* ========== CONSTRUCTOR ========== */
+
+    constructor(
+        address _vault,
+        string memory _name,
+        address[] memory _lpTokens,
+        uint256[] memory _weights
+    ) public BaseStrategy(_vault) {
+        _initializeStrat(_name, _lpTokens, _weights);
+    }
+
+    function _initializeStrat(
+        string memory _name,
+        address[] memory _lpTokens,
+        uint256[] memory _weights
+    ) internal {
+        _initializeBase(_name);
+
+        require(_lpTokens.length > 0, "no pairs");
+        for (uint256 i = 0; i < _lpTokens.length; i++) {
+            address lp = _lpTokens[i];
+            require(ISolidlyPair(lp).stable(), "not stable");
+            // a pair listed twice would be counted twice in our assets and get a double share of deposits
+            for (uint256 j = 0; j < i; j++) {
+                require(_lpTokens[j] != lp, "duplicate pair");
+            }
+
+            // add approvals on all tokens
+            address other = _otherToken(lp);
+            IERC20(lp).approve(address(lpDepositer), type(uint256).max);
+            IERC20(lp).approve(solidlyRouter, type(uint256).max);
+            IERC20(other).approve(solidlyRouter, type(uint256).max);
+            lpTokens.push(lp);
+        }
+        want.approve(solidlyRouter, type(uint256).max);
+
+        _setWeights(_weights);
+    }
+
+    /* ========== VIEWS ========== */
+
+    function numberOfPairs() public view returns (uint256) {
+        return lpTokens.length;
+    }
+
+    function balanceOfLPStaked(address _lp) public view returns (uint256) {
+        return lpDepositer.userBalances(address(this), _lp);
+    }
+
+    // staked plus loose lp for a single pair
+    function balanceOfLP(address _lp) public view returns (uint256) {
+        return
+            balanceOfLPStaked(_lp).add(IERC20(_lp).balanceOf(address(this)));
+    }
+
+    // amounts of want and the paired token that this many lp tokens are worth. the router's quoteRemoveLiquidity
+    // maths, read straight off the pair instead of going through the router
+    function balanceOfConstituents(address _lp, uint256 liquidity)
+        public
+        view
+        returns (uint256 amountWant, uint256 amountOther)
+    {
+        uint256 lpSupply = IERC20(_lp).totalSupply();
+        if (lpSupply == 0) {
+            return (0, 0);
+        }
+        (, , uint256 wantReserve, uint256 otherReserve) = _pairData(_lp);
+        amountWant = liquidity.mul(wantReserve).div(lpSupply);
+        amountOther = liquidity.mul(otherReserve).div(lpSupply);
+    }
+
+    // our position in one pair, valued in want. stables are treated as interchangeable 1-1 after adjusting decimals
+    function valueOfPair(address _lp) public view returns (uint256) {
+        (uint256 amountWant, uint256 amountOther) = balanceOfConstituents(
+            _lp,
+            balanceOfLP(_lp)
+        );
+        address other = _otherToken(_lp);
+        amountOther = amountOther.add(IERC20(other).balanceOf(address(this)));
+
+        return amountWant.add(_otherToWant(_lp, amountOther));
+    }
+
+    function estimatedTotalAssets() public view override returns (uint256) {
+        uint256 total = balanceOfWant();
+        for (uint256 i = 0; i < lpTokens.length; i++) {
+            total = total.add(valueOfPair(lpTokens[i]));
+        }
+        return total;
+    }
+
+    function _otherToken(address _lp) internal view returns (address) {
+        address token0 = ISolidlyPair(_lp).token0();
+        if (token0 == address(want)) {
+            return ISolidlyPair(_lp).token1();
+        }
+        require(ISolidlyPair(_lp).token1() == address(want), "no want");
+        return token0;
+    }
+
+    // 10**decimals for want and the paired token, plus the pool reserves of each
+    function _pairData(address _lp)
+        internal
+        view
+        returns (
+            uint256 wantDec,
+            uint256 otherDec,
+            uint256 wantReserve,
+            uint256 otherReserve
+        )
+    {
+        (
+            uint256 dec0,
+            uint256 dec1,
+            uint256 r0,
+            uint256 r1,
+            ,
+            address t0,
+
+        ) = ISolidlyPair(_lp).metadata();
+        if (t0 == address(want)) {
+            return (dec0, dec1, r0, r1);
+        }
+        return (dec1, dec0, r1, r0);
+    }
+
+    function _otherToWant(address _lp, uint256 _amountOther)
+        internal
+        view
+        returns (uint256)
+    {
+        if (_amountOther == 0) {
+            return 0;
+        }
+        (uint256 wantDec, uint256 otherDec, , ) = _pairData(_lp);
+        return _amountOther.mul(wantDec).div(otherDec);
+    }
+
+    /* ========== MUTATIVE FUNCTIONS ========== */
+
+    function prepareReturn(uint256 _debtOutstanding)
+        internal
+        override
+        returns (
+            uint256 _profit,
+            uint256 _loss,
+            uint256 _debtPayment
+        )
+    {
+        if (tradesEnabled == false && tradeFactory != address(0)) {
+            _setUpTradeFactory();
+        }
+        // claim our rewards for every pair in a single call
+        lpDepositer.getReward(lpTokens);
+
+        uint256 amountToFree;
+        (_profit, _loss, _debtPayment, amountToFree) = _reportAgainstDebt(
+            estimatedTotalAssets(),
+            _debtOutstanding
+        );
+
+        //amountToFree > 0 checking (included in the if statement)
+        if (balanceOfWant() < amountToFree) {
+            liquidatePosition(amountToFree);
+
+            (_profit, _debtPayment) = _fitToLooseWant(
+                _profit,
+                _debtPayment,
+                amountToFree
+            );
+        }
+
+        // we're done harvesting, so reset our trigger if we used it
+        forceHarvestTriggerOnce = false;
+    }
+
+    function adjustPosition(uint256 _debtOutstanding) internal override {
+        if (emergencyExit) {
+            return;
+        }
+        uint256 toInvest = balanceOfWant();
+        uint256 length = lpTokens.length;
+
+        // split our loose want across pairs by weight, the last pair takes any rounding dust
+        if (toInvest > _dust()) {
+            uint256 remaining = toInvest;
+            for (uint256 i = 0; i < length; i++) {
+                uint256 amount = remaining;
+                if (i < length - 1) {
+                    amount = toInvest.mul(weights[i]).div(DENOMINATOR);
+                    remaining = remaining.sub(amount);
+                }
+                if (amount > 0) {
+                    _addToPair(lpTokens[i], amount);
+                }
+            }
+        }
+
+        for (uint256 i = 0; i < length; i++) {
+            address lp = lpTokens[i];
+            uint256 lpBalance = IERC20(lp).balanceOf(address(this));
+
+            if (lpBalance > 0) {
+                //deposit to lp depositer
+                lpDepositer.deposit(lp, lpBalance);
+            }
+        }
+    }
+
+    // dont bother depositing less than 0.1 want
+    function _dust() internal view returns (uint256) {
+        return (uint256(10)**vault.decimals()).div(10);
+    }
+
+    // checks both directions of the stable pool are within lpSlippage of 1-1 after adjusting for decimals
+    function _pegHolds(address _lp, address _other)
+        internal
+        view
+        returns (bool)
+    {
+        (uint256 wantDec, uint256 otherDec, , ) = _pairData(_lp);
+
+        route[] memory routes = new route[](1);
+        routes[0] = route(address(want), _other, true);
+        uint256 amountOut = ISolidlyRouter(solidlyRouter).getAmountsOut(
+            wantDec,
+            routes
+        )[1];
+        if (amountOut < otherDec.mul(lpSlippage).div(DENOMINATOR)) {
+            return false;
+        }
+
+        routes[0] = route(_other, address(want), true);
+        amountOut = ISolidlyRouter(solidlyRouter).getAmountsOut(
+            otherDec,
+            routes
+        )[1];
+
+        return amountOut >= wantDec.mul(lpSlippage).div(DENOMINATOR);
+    }
+
+    function _addToPair(address _lp, uint256 _amount) internal {
+        address other = _otherToken(_lp);
+        if (!_pegHolds(_lp, other)) {
+            //dont do anything because we would be lping into the lp at a bad price
+            return;
+        }
+
+        //swap enough want to match the ratio of the pool. this determines how many we need of each
+        (
+            uint256 wantDec,
+            uint256 otherDec,
+            uint256 wantReserve,
+            uint256 otherReserve
+        ) = _pairData(_lp);
+        uint256 otherReserveInWant = otherReserve.mul(wantDec).div(otherDec);
+        uint256 toSwap = _amount.mul(otherReserveInWant).div(
+            wantReserve.add(otherReserveInWant)
+        );
+
+        if (toSwap > 0) {
+            route[] memory routes = new route[](1);
+            routes[0] = route(address(want), other, true);
+            ISolidlyRouter(solidlyRouter).swapExactTokensForTokens(
+                toSwap,
+                toSwap.mul(otherDec).div(wantDec).mul(lpSlippage).div(
+                    DENOMINATOR
+                ),
+                routes,
+                address(this),
+                block.timestamp
+            );
+        }
+
+        uint256 otherBal = IERC20(other).balanceOf(address(this));
+        uint256 wantToAdd = Math.min(_amount.sub(toSwap), balanceOfWant());
+
+        if (otherBal > 0 && wantToAdd > 0) {
+            // deposit into lp
+            ISolidlyRouter(solidlyRouter).addLiquidity(
+                address(want),
+                other,
+                true,
+                wantToAdd,
+                otherBal,
+                0,
+                0,
+                address(this),
+                2**256 - 1
+            );
+        }
+    }
+
+    //returns lp tokens needed to get that amount of want from a given pair
+    function wantToLpTokens(address _lp, uint256 amountOfWantWeWant)
+        public
+        view
+        returns (uint256)
+    {
+        //amount of want and paired token for 1 lp token
+        (uint256 amountWant, uint256 amountOther) = balanceOfConstituents(
+            _lp,
+            1e18
+        );
+
+        //1 lp token is this amount of want
+        uint256 amountWantPerLp = amountWant.add(
+            _otherToWant(_lp, amountOther)
+        );
+        if (amountWantPerLp == 0) {
+            return 0;
+        }
+
+        return amountOfWantWeWant.mul(1e18).div(amountWantPerLp);
+    }
+
+    // pull lp from solidex if needed, burn it and sell the paired token back to want
+    function _removeFromPair(address _lp, uint256 _lpAmount) internal {
+        uint256 balanceOfLpTokens = IERC20(_lp).balanceOf(address(this));
+
+        if (balanceOfLpTokens < _lpAmount) {
+            uint256 staked = balanceOfLPStaked(_lp);
+            if (staked > 0) {
+                lpDepositer.withdraw(
+                    _lp,
+                    Math.min(_lpAmount.sub(balanceOfLpTokens), staked)
+                );
+            }
+            balanceOfLpTokens = IERC20(_lp).balanceOf(address(this));
+        }
+
+        address other = _otherToken(_lp);
+        if (balanceOfLpTokens > 0) {
+            ISolidlyRouter(solidlyRouter).removeLiquidity(
+                address(want),
+                other,
+                true,
+                Math.min(_lpAmount, balanceOfLpTokens),
+                0,
+                0,
+                address(this),
+                type(uint256).max
+            );
+        }
+
+        uint256 otherBal = IERC20(other).balanceOf(address(this));
+        if (otherBal > 0) {
+            //same bound as on the way in, so we dont sell the paired token off peg
+            (uint256 wantDec, uint256 otherDec, , ) = _pairData(_lp);
+            route[] memory routes = new route[](1);
+            routes[0] = route(other, address(want), true);
+            ISolidlyRouter(solidlyRouter).swapExactTokensForTokens(
+                otherBal,
+                otherBal.mul(wantDec).div(otherDec).mul(lpSlippage).div(
+                    DENOMINATOR
+                ),
+                routes,
+                address(this),
+                block.timestamp
+            );
+        }
+    }
+
+    function liquidatePosition(uint256 _amountNeeded)
+        internal
+        override
+        returns (uint256 _liquidatedAmount, uint256 _loss)
+    {
+        uint256 balanceOfWantBefore = balanceOfWant();
+
+        // if we need more want than is already loose in the contract, work through our pairs in order
+        if (balanceOfWantBefore < _amountNeeded) {
+            for (uint256 i = 0; i < lpTokens.length; i++) {
+                uint256 looseWant = balanceOfWant();
+                if (looseWant >= _amountNeeded) {
+                    break;
+                }
+                address lp = lpTokens[i];
+                uint256 lpTokensNeeded = wantToLpTokens(
+                    lp,
+                    _amountNeeded.sub(looseWant)
+                );
+                if (lpTokensNeeded > 0) {
+                    _removeFromPair(lp, lpTokensNeeded);
+                }
+            }
+
+            _liquidatedAmount = Math.min(balanceOfWant(), _amountNeeded);
+
+            if (_liquidatedAmount < _amountNeeded) {
+                _loss = _amountNeeded.sub(_liquidatedAmount);
+            }
+        } else {
+            _liquidatedAmount = _amountNeeded;
+        }
+    }
+
+    function liquidateAllPositions() internal override returns (uint256) {
+        for (uint256 i = 0; i < lpTokens.length; i++) {
+            _removeFromPair(lpTokens[i], type(uint256).max);
+        }
+
+        return balanceOfWant();
+    }
+
+    function prepareMigration(address _newStrategy) internal override {
+        for (uint256 i = 0; i < lpTokens.length; i++) {
+            address lp = lpTokens[i];
+            if (!depositerAvoid) {
+                uint256 staked = balanceOfLPStaked(lp);
+                if (staked > 0) {
+                    lpDepositer.withdraw(lp, staked);
+                }
+            }
+
+            uint256 lpBalance = IERC20(lp).balanceOf(address(this));
+            if (lpBalance > 0) {
+                IERC20(lp).safeTransfer(_newStrategy, lpBalance);
+            }
+
+            IERC20 other = IERC20(_otherToken(lp));
+            uint256 otherBalance = other.balanceOf(address(this));
+            if (otherBalance > 0) {
+                other.safeTransfer(_newStrategy, otherBalance);
+            }
+        }
+    }
+
+    function ethToWant(uint256 _amtInWei)
+        public
+        view
+        override
+        returns (uint256)
+    {}
+
+    /* ========== SETTERS ========== */
+
+    ///@notice Target share of each deposit sent to each pair, in the same order as lpTokens. Must sum to 10_000.
+    function setWeights(uint256[] memory _weights) external onlyVaultManagers {
+        _setWeights(_weights);
+    }
+
+    function _setWeights(uint256[] memory _weights) internal {
+        require(_weights.length == lpTokens.length, "length mismatch");
+        uint256 total;
+        for (uint256 i = 0; i < _weights.length; i++) {
+            total = total.add(_weights[i]);
+        }
+        require(total == DENOMINATOR, "weights must sum to max");
+        weights = _weights;
+    }
+}
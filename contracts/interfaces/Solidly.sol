@@ -0,0 +1,121 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+struct route {
+    address from;
+    address to;
+    bool stable;
+}
+
+interface ISolidlyRouter {
+    function addLiquidity(
+        address,
+        address,
+        bool,
+        uint256,
+        uint256,
+        uint256,
+        uint256,
+        address,
+        uint256
+    )
+        external
+        returns (
+            uint256 amountA,
+            uint256 amountB,
+            uint256 liquidity
+        );
+
+    function getAmountsOut(uint256 amountIn, route[] memory routes)
+        external
+        view
+        returns (uint256[] memory amounts);
+
+    function removeLiquidity(
+        address tokenA,
+        address tokenB,
+        bool stable,
+        uint256 liquidity,
+        uint256 amountAMin,
+        uint256 amountBMin,
+        address to,
+        uint256 deadline
+    ) external returns (uint256 amountA, uint256 amountB);
+
+    function quoteRemoveLiquidity(
+        address tokenA,
+        address tokenB,
+        bool stable,
+        uint256 liquidity
+    ) external view returns (uint256 amountA, uint256 amountB);
+
+    function swapExactTokensForTokens(
+        uint256 amountIn,
+        uint256 amountOutMin,
+        route[] calldata routes,
+        address to,
+        uint256 deadline
+    ) external returns (uint256[] memory amounts);
+
+    function pairFor(
+        address tokenA,
+        address tokenB,
+        bool stable
+    ) external view returns (address pair);
+}
+
+interface ISolidlyPair {
+    function token0() external view returns (address);
+
+    function token1() external view returns (address);
+
+    function stable() external view returns (bool);
+
+    function getReserves()
+        external
+        view
+        returns (
+            uint256 _reserve0,
+            uint256 _reserve1,
+            uint256 _blockTimestampLast
+        );
+
+    // dec0 and dec1 are returned as 10**decimals, not the raw decimals
+    function metadata()
+        external
+        view
+        returns (
+            uint256 dec0,
+            uint256 dec1,
+            uint256 r0,
+            uint256 r1,
+            bool st,
+            address t0,
+            address t1
+        );
+
+    // amountOut for amountIn at the reserves averaged over the last granularity observations
+    function quote(
+        address tokenIn,
+        uint256 amountIn,
+        uint256 granularity
+    ) external view returns (uint256 amountOut);
+}
+
+interface ITradeFactory {
+    function enable(address, address) external;
+}
+
+interface ILpDepositer {
+    function deposit(address pool, uint256 _amount) external;
+
+    function withdraw(address pool, uint256 _amount) external; // use amount = 0 for harvesting rewards
+
+    function userBalances(address user, address pool)
+        external
+        view
+        returns (uint256);
+
+    function getReward(address[] memory lps) external;
+}
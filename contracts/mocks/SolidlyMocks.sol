@@ -0,0 +1,419 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/math/SafeMath.sol";
+import "@openzeppelin/contracts/math/Math.sol";
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+
+import "../interfaces/Solidly.sol";
+
+// stand-ins for wftm, anyWFTM, the solidly pair and router, the solidex depositer, the health check and the trade
+// factory, for the unit tests that run on the in-process evm (scripts/inprocess_evm.py). Strategy has the real
+// addresses baked in, so these get their code put straight at those addresses in genesis. that means no
+// constructors and no immutables, everything starts from empty storage
+
+contract MockAddresses {
+    address internal constant WFTM =
+        0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83;
+    address internal constant ANY_WFTM =
+        0x6362496Bef53458b20548a35A2101214Ee2BE3e0;
+    address internal constant LP_TOKEN =
+        0x9aC7664060a3e388CEB157C5a0B6064BeFFAb9f2;
+    address internal constant ROUTER =
+        0xa38cd27185a464914D3046f0AB9d43356B34829D;
+}
+
+contract MockERC20 {
+    using SafeMath for uint256;
+
+    mapping(address => uint256) public balanceOf;
+    mapping(address => mapping(address => uint256)) public allowance;
+    uint256 public totalSupply;
+
+    event Transfer(address indexed from, address indexed to, uint256 value);
+    event Approval(
+        address indexed owner,
+        address indexed spender,
+        uint256 value
+    );
+
+    function name() external pure virtual returns (string memory) {
+        return "Mock Token";
+    }
+
+    function symbol() external pure virtual returns (string memory) {
+        return "MOCK";
+    }
+
+    function decimals() external pure returns (uint8) {
+        return 18;
+    }
+
+    function approve(address _spender, uint256 _amount)
+        external
+        returns (bool)
+    {
+        allowance[msg.sender][_spender] = _amount;
+        emit Approval(msg.sender, _spender, _amount);
+        return true;
+    }
+
+    function transfer(address _to, uint256 _amount) external returns (bool) {
+        _transfer(msg.sender, _to, _amount);
+        return true;
+    }
+
+    function transferFrom(
+        address _from,
+        address _to,
+        uint256 _amount
+    ) external returns (bool) {
+        if (allowance[_from][msg.sender] != type(uint256).max) {
+            allowance[_from][msg.sender] = allowance[_from][msg.sender].sub(
+                _amount,
+                "allowance"
+            );
+        }
+        _transfer(_from, _to, _amount);
+        return true;
+    }
+
+    function _transfer(
+        address _from,
+        address _to,
+        uint256 _amount
+    ) internal {
+        balanceOf[_from] = balanceOf[_from].sub(_amount, "balance");
+        balanceOf[_to] = balanceOf[_to].add(_amount);
+        emit Transfer(_from, _to, _amount);
+    }
+
+    function _mint(address _to, uint256 _amount) internal {
+        totalSupply = totalSupply.add(_amount);
+        balanceOf[_to] = balanceOf[_to].add(_amount);
+        emit Transfer(address(0), _to, _amount);
+    }
+
+    function _burn(address _from, uint256 _amount) internal {
+        balanceOf[_from] = balanceOf[_from].sub(_amount, "balance");
+        totalSupply = totalSupply.sub(_amount);
+        emit Transfer(_from, address(0), _amount);
+    }
+}
+
+// anyone can mint, we use this for wftm, sex and solid
+contract MockToken is MockERC20 {
+    function mint(address _to, uint256 _amount) external {
+        _mint(_to, _amount);
+    }
+}
+
+// wraps wftm 1:1 like the real thing, as long as it holds enough wftm to pay out
+contract MockAnyWFTM is MockERC20, MockAddresses {
+    function name() external pure override returns (string memory) {
+        return "Mock anyWFTM";
+    }
+
+    function symbol() external pure override returns (string memory) {
+        return "anyWFTM";
+    }
+
+    function deposit(uint256 _amount) public returns (uint256) {
+        IERC20(WFTM).transferFrom(msg.sender, address(this), _amount);
+        _mint(msg.sender, _amount);
+        return _amount;
+    }
+
+    function deposit() external returns (uint256) {
+        return deposit(IERC20(WFTM).balanceOf(msg.sender));
+    }
+
+    function withdraw(uint256 _amount) public returns (uint256) {
+        _burn(msg.sender, _amount);
+        IERC20(WFTM).transfer(msg.sender, _amount);
+        return _amount;
+    }
+
+    function withdraw() external returns (uint256) {
+        return withdraw(balanceOf[msg.sender]);
+    }
+}
+
+// the pair just holds the reserves and its lp token, the router does all the maths
+contract MockSolidlyPair is MockERC20, MockAddresses {
+    modifier onlyRouter() {
+        require(msg.sender == ROUTER, "!router");
+        _;
+    }
+
+    function token0() external pure returns (address) {
+        return WFTM;
+    }
+
+    function token1() external pure returns (address) {
+        return ANY_WFTM;
+    }
+
+    function stable() external pure returns (bool) {
+        return true;
+    }
+
+    function getReserves()
+        external
+        view
+        returns (
+            uint256,
+            uint256,
+            uint256
+        )
+    {
+        return (
+            IERC20(WFTM).balanceOf(address(this)),
+            IERC20(ANY_WFTM).balanceOf(address(this)),
+            block.timestamp
+        );
+    }
+
+    function mint(address _to, uint256 _amount) external onlyRouter {
+        _mint(_to, _amount);
+    }
+
+    function burn(address _from, uint256 _amount) external onlyRouter {
+        _burn(_from, _amount);
+    }
+
+    function pay(
+        address _token,
+        address _to,
+        uint256 _amount
+    ) external onlyRouter {
+        IERC20(_token).transfer(_to, _amount);
+    }
+}
+
+// only knows the wftm/anyWFTM stable pair. every swap quotes at quoteBps of 1:1, which tests can move to break
+// the peg. rewards sold through it are paid for by minting wftm
+contract MockSolidlyRouter is MockAddresses {
+    using SafeMath for uint256;
+
+    uint256 public quoteBps; // zero means 9999, solidly's 0.01% stable fee
+
+    function setQuoteBps(uint256 _quoteBps) external {
+        quoteBps = _quoteBps;
+    }
+
+    function _quote(uint256 _amountIn) internal view returns (uint256) {
+        uint256 bps = quoteBps == 0 ? 9999 : quoteBps;
+        return _amountIn.mul(bps).div(10_000);
+    }
+
+    function _reserves() internal view returns (uint256, uint256) {
+        return (
+            IERC20(WFTM).balanceOf(LP_TOKEN),
+            IERC20(ANY_WFTM).balanceOf(LP_TOKEN)
+        );
+    }
+
+    function _checkPair(address _tokenA, address _tokenB) internal pure {
+        require(_tokenA == WFTM && _tokenB == ANY_WFTM, "pair");
+    }
+
+    // same as uniswap, take all of one side and as much of the other as matches the reserves
+    function _liquidityFor(uint256 _amountADesired, uint256 _amountBDesired)
+        internal
+        view
+        returns (
+            uint256 amountA,
+            uint256 amountB,
+            uint256 liquidity
+        )
+    {
+        uint256 supply = IERC20(LP_TOKEN).totalSupply();
+        if (supply == 0) {
+            return (
+                _amountADesired,
+                _amountBDesired,
+                _amountADesired.add(_amountBDesired)
+            );
+        }
+
+        (uint256 reserveA, uint256 reserveB) = _reserves();
+        uint256 amountBOptimal = _amountADesired.mul(reserveB).div(reserveA);
+        if (amountBOptimal <= _amountBDesired) {
+            (amountA, amountB) = (_amountADesired, amountBOptimal);
+        } else {
+            amountA = _amountBDesired.mul(reserveA).div(reserveB);
+            amountB = _amountBDesired;
+        }
+        liquidity = Math.min(
+            amountA.mul(supply).div(reserveA),
+            amountB.mul(supply).div(reserveB)
+        );
+    }
+
+    function addLiquidity(
+        address _tokenA,
+        address _tokenB,
+        bool,
+        uint256 _amountADesired,
+        uint256 _amountBDesired,
+        uint256 _amountAMin,
+        uint256 _amountBMin,
+        address _to,
+        uint256
+    )
+        external
+        returns (
+            uint256 amountA,
+            uint256 amountB,
+            uint256 liquidity
+        )
+    {
+        _checkPair(_tokenA, _tokenB);
+        (amountA, amountB, liquidity) = _liquidityFor(
+            _amountADesired,
+            _amountBDesired
+        );
+        require(amountA >= _amountAMin && amountB >= _amountBMin, "min");
+
+        IERC20(WFTM).transferFrom(msg.sender, LP_TOKEN, amountA);
+        IERC20(ANY_WFTM).transferFrom(msg.sender, LP_TOKEN, amountB);
+        MockSolidlyPair(LP_TOKEN).mint(_to, liquidity);
+    }
+
+    function quoteRemoveLiquidity(
+        address _tokenA,
+        address _tokenB,
+        bool,
+        uint256 _liquidity
+    ) public view returns (uint256 amountA, uint256 amountB) {
+        _checkPair(_tokenA, _tokenB);
+        uint256 supply = IERC20(LP_TOKEN).totalSupply();
+        if (supply == 0) {
+            return (0, 0);
+        }
+        (uint256 reserveA, uint256 reserveB) = _reserves();
+        amountA = _liquidity.mul(reserveA).div(supply);
+        amountB = _liquidity.mul(reserveB).div(supply);
+    }
+
+    function removeLiquidity(
+        address _tokenA,
+        address _tokenB,
+        bool _stable,
+        uint256 _liquidity,
+        uint256 _amountAMin,
+        uint256 _amountBMin,
+        address _to,
+        uint256
+    ) external returns (uint256 amountA, uint256 amountB) {
+        (amountA, amountB) = quoteRemoveLiquidity(
+            _tokenA,
+            _tokenB,
+            _stable,
+            _liquidity
+        );
+        require(amountA >= _amountAMin && amountB >= _amountBMin, "min");
+
+        MockSolidlyPair(LP_TOKEN).burn(msg.sender, _liquidity);
+        MockSolidlyPair(LP_TOKEN).pay(WFTM, _to, amountA);
+        MockSolidlyPair(LP_TOKEN).pay(ANY_WFTM, _to, amountB);
+    }
+
+    // our pair is the only one with code, any other pair is an address nothing was deployed to
+    function pairFor(
+        address _tokenA,
+        address _tokenB,
+        bool _stable
+    ) external pure returns (address) {
+        if (_tokenA == WFTM && _tokenB == ANY_WFTM) {
+            return LP_TOKEN;
+        }
+        return
+            address(
+                uint160(uint256(keccak256(abi.encodePacked(_tokenA, _tokenB, _stable))))
+            );
+    }
+
+    function getAmountsOut(uint256 _amountIn, route[] memory _routes)
+        public
+        view
+        returns (uint256[] memory amounts)
+    {
+        amounts = new uint256[](_routes.length + 1);
+        amounts[0] = _amountIn;
+        for (uint256 i = 0; i < _routes.length; i++) {
+            amounts[i + 1] = _quote(amounts[i]);
+        }
+    }
+
+    function swapExactTokensForTokens(
+        uint256 _amountIn,
+        uint256 _amountOutMin,
+        route[] calldata _routes,
+        address _to,
+        uint256
+    ) external returns (uint256[] memory amounts) {
+        require(_routes.length == 1 && _routes[0].to == WFTM, "route");
+        amounts = getAmountsOut(_amountIn, _routes);
+        require(amounts[1] >= _amountOutMin, "min");
+
+        IERC20(_routes[0].from).transferFrom(
+            msg.sender,
+            address(this),
+            _amountIn
+        );
+        MockToken(WFTM).mint(_to, amounts[1]);
+    }
+}
+
+// holds staked lp and nothing else. rewards are whatever a test mints to the strategy
+contract MockLpDepositer {
+    using SafeMath for uint256;
+
+    mapping(address => mapping(address => uint256)) public userBalances; // user, pool
+
+    function deposit(address _pool, uint256 _amount) external {
+        IERC20(_pool).transferFrom(msg.sender, address(this), _amount);
+        userBalances[msg.sender][_pool] = userBalances[msg.sender][_pool].add(
+            _amount
+        );
+    }
+
+    function withdraw(address _pool, uint256 _amount) external {
+        userBalances[msg.sender][_pool] = userBalances[msg.sender][_pool].sub(
+            _amount,
+            "withdraw"
+        );
+        IERC20(_pool).transfer(msg.sender, _amount);
+    }
+
+    function getReward(address[] calldata) external {}
+}
+
+contract MockHealthCheck {
+    function check(
+        uint256,
+        uint256,
+        uint256,
+        uint256,
+        uint256
+    ) external pure returns (bool) {
+        return true;
+    }
+
+    function setStrategyLimits(
+        address,
+        uint256,
+        uint256
+    ) external {}
+}
+
+contract MockTradeFactory {
+    bytes32 public constant STRATEGY = keccak256("STRATEGY");
+
+    function enable(address, address) external {}
+
+    function grantRole(bytes32, address) external {}
+}
@@ -0,0 +1,182 @@
+"""
+Bank run stress harness: lots of depositors, then everyone leaves at once.
+
+Drive it from a fork test (see tests/test_bank_run.py), which hands over the deployed
+vault and strategy and saves the report:
+
+    BANK_RUN_USERS=300 BANK_RUN_REPORT=reports/bank_run_new.json brownie test tests/test_bank_run.py -s
+
+then compare two runs, e.g. before and after a contract change, without brownie:
+
+    python scripts/bank_run.py compare reports/bank_run_old.json reports/bank_run_new.json
+
+Every user deposits a random amount, we harvest so it's all in the pool, then users exit
+in random order with full withdrawals. Every harvest_every withdrawals we sleep an hour
+and harvest, and every shock_every withdrawals somebody dumps shock_bps of the pool's
+reserves of one side into it. For each withdrawal we record gas, what the user lost
+against what they put in, how lopsided the wftm/anyWFTM pool is at that point and which
+harvests or shocks happened since the previous withdrawal.
+"""
+import json
+import random
+import statistics
+import sys
+
+DENOMINATOR = 10_000
+
+
+def _percentiles(values):
+    if not values:
+        return {}
+    values = sorted(values)
+    pick = lambda q: values[min(int(q * len(values)), len(values) - 1)]
+    return {
+        "min": values[0],
+        "p50": pick(0.5),
+        "p90": pick(0.9),
+        "p99": pick(0.99),
+        "max": values[-1],
+        "mean": statistics.fmean(values),
+    }
+
+
+def _imbalance(token, any_wftm, pair):
+    # signed share of the pool that's off a 50/50 split, positive means heavy on wftm
+    wftm_reserve = token.balanceOf(pair)
+    any_reserve = any_wftm.balanceOf(pair)
+    return (wftm_reserve - any_reserve) / (wftm_reserve + any_reserve)
+
+
+def run(
+    vault,
+    strategy,
+    token,
+    any_wftm,
+    router,
+    whale,
+    gov,
+    users=200,
+    seed=0,
+    min_deposit=10 * 10 ** 18,
+    max_deposit=200 * 10 ** 18,
+    harvest_every=25,
+    shock_every=40,
+    shock_bps=200,
+):
+    from brownie import accounts, chain
+
+    rng = random.Random(seed)
+    pair = strategy.lpToken()
+    # fresh accounts have no ftm, the fork lets us send at zero gas price
+    free = {"gas_price": 0}
+
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    token.approve(any_wftm, 2 ** 256 - 1, {"from": whale})
+    token.approve(router, 2 ** 256 - 1, {"from": whale})
+    any_wftm.approve(router, 2 ** 256 - 1, {"from": whale})
+
+    deposited = {}
+    for _ in range(users):
+        user = accounts.add()
+        amount = rng.randint(min_deposit, max_deposit)
+        token.transfer(user, amount, {"from": whale})
+        token.approve(vault, 2 ** 256 - 1, {"from": user, **free})
+        vault.deposit(amount, {"from": user, **free})
+        deposited[user] = amount
+
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    start_assets = vault.totalAssets()
+
+    withdrawals = []
+    harvests = 0
+    shocks = 0
+    order = list(deposited)
+    rng.shuffle(order)
+    for i, user in enumerate(order):
+        after = []
+        if i and i % harvest_every == 0:
+            chain.sleep(3600)
+            strategy.setDoHealthCheck(False, {"from": gov})
+            strategy.harvest({"from": gov})
+            harvests += 1
+            after.append("harvest")
+        if i and i % shock_every == 0:
+            # someone dumps one side into the pool, the arbs can catch up later
+            size = token.balanceOf(pair) * shock_bps // DENOMINATOR
+            size = min(size, token.balanceOf(whale) // 4)
+            if rng.random() < 0.5:
+                route = [[token, any_wftm, True]]
+            else:
+                any_wftm.deposit(size, {"from": whale})
+                route = [[any_wftm, token, True]]
+            router.swapExactTokensForTokens(size, 0, route, whale, 2 ** 256 - 1, {"from": whale})
+            shocks += 1
+            after.append("shock")
+
+        before = token.balanceOf(user)
+        tx = vault.withdraw(vault.balanceOf(user), user, DENOMINATOR, {"from": user, **free})
+        received = token.balanceOf(user) - before
+        loss = deposited[user] - received
+        withdrawals.append(
+            {
+                "index": i,
+                "gas": tx.gas_used,
+                "deposited": deposited[user],
+                "received": received,
+                "loss_bps": loss * DENOMINATOR / deposited[user],
+                "pool_imbalance": _imbalance(token, any_wftm, pair),
+                "strategy_assets": strategy.estimatedTotalAssets(),
+                "after": after,
+            }
+        )
+
+    return {
+        "users": users,
+        "seed": seed,
+        "harvests": harvests,
+        "shocks": shocks,
+        "start_assets": start_assets,
+        "end_assets": vault.totalAssets(),
+        "gas": _percentiles([w["gas"] for w in withdrawals]),
+        "loss_bps": _percentiles([w["loss_bps"] for w in withdrawals]),
+        "pool_imbalance": _percentiles([abs(w["pool_imbalance"]) for w in withdrawals]),
+        "total_loss": sum(w["deposited"] - w["received"] for w in withdrawals),
+        "withdrawals": withdrawals,
+    }
+
+
+def save(report, path):
+    with open(path, "w") as fp:
+        json.dump(report, fp, indent=2)
+
+
+def summary(report):
+    lines = [f"{report['users']} users, {report['harvests']} harvests, {report['shocks']} shocks"]
+    for key in ("gas", "loss_bps", "pool_imbalance"):
+        stats = report[key]
+        lines.append(
+            f"{key:>15}: "
+            + " ".join(f"{name}={value:,.2f}" for name, value in stats.items())
+        )
+    lines.append(f"{'total_loss':>15}: {report['total_loss'] / 1e18:,.4f} wftm")
+    return "\n".join(lines)
+
+
+def compare(old, new):
+    lines = []
+    for key in ("gas", "loss_bps", "pool_imbalance"):
+        for stat in ("p50", "p90", "max", "mean"):
+            a, b = old[key][stat], new[key][stat]
+            change = f"{100 * (b - a) / a:+.1f}%" if a else "n/a"
+            lines.append(f"{key + '.' + stat:>20}: {a:,.2f} -> {b:,.2f} ({change})")
+    a, b = old["total_loss"], new["total_loss"]
+    lines.append(f"{'total_loss':>20}: {a / 1e18:,.4f} -> {b / 1e18:,.4f} wftm")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "compare":
+        sys.exit("usage: python scripts/bank_run.py compare old.json new.json")
+    with open(sys.argv[2]) as a, open(sys.argv[3]) as b:
+        print(compare(json.load(a), json.load(b)))
@@ -0,0 +1,305 @@
+"""
+Per-block history for the wftm/anyWFTM pair, one fixed width numpy array per column.
+
+    python -m scripts.block_history ingest-csv data/pair.hist reserves.csv
+    python -m scripts.block_history ingest-logs data/pair.hist logs.jsonl --lp-supply 123456789...
+    python -m scripts.block_history info data/pair.hist
+    python -m scripts.block_history slice data/pair.hist 41000000 41100000
+
+A history is a directory with header.json and a raw little-endian file per column. The
+header says which columns there are, their types and how many rows are committed, so
+a reader can np.memmap any column without reading the others, and slicing a block range
+is a binary search on the block column plus views into the rest. Nothing is copied
+until you ask for python ints.
+
+Rows are blocks where something changed, in increasing block order, and each row holds
+until the next one. Appends add to the end of every column file and only then bump the
+row count in the header, so a crash halfway through an append leaves the history as it
+was and the next append writes over the partial rows.
+
+Amounts are uint256 on chain but our pool fits comfortably in 128 bits, so wei columns
+are (hi, lo) pairs of uint64. as_int gives exact python ints for solidly_math and
+as_float gives float64 arrays for anything vectorised.
+"""
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+VERSION = 1
+HEADER = "header.json"
+
+U64 = np.dtype("<u8")
+WEI = np.dtype([("hi", "<u8"), ("lo", "<u8")])
+TYPES = {"u64": U64, "wei": WEI}
+LOW = 2 ** 64 - 1
+
+# what we keep for the pair at lpToken, block first
+COLUMNS = {
+    "block": "u64",
+    "timestamp": "u64",
+    "reserve0": "wei",
+    "reserve1": "wei",
+    "lp_supply": "wei",
+    "sex_emitted": "wei",  # sex and solid paid out to the pool's stakers in this block
+    "solid_emitted": "wei",
+    "gas_price": "u64",
+}
+
+# pair events we can build rows from
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ZERO_TOPIC = "0x" + "00" * 32
+
+
+def to_wei_array(values):
+    values = [int(v) for v in values]
+    if any(v < 0 or v >> 128 for v in values):
+        raise ValueError("wei columns hold 0 <= x < 2**128")
+    return np.array([(v >> 64, v & LOW) for v in values], dtype=WEI)
+
+
+def as_int(array):
+    """
+    Exact python ints from a wei or u64 column (or slice of one).
+    """
+    if array.dtype == WEI:
+        return [(int(hi) << 64) | int(lo) for hi, lo in zip(array["hi"], array["lo"])]
+    return [int(v) for v in array]
+
+
+def as_float(array):
+    if array.dtype == WEI:
+        return array["hi"].astype(np.float64) * 2.0 ** 64 + array["lo"].astype(np.float64)
+    return array.astype(np.float64)
+
+
+def _read_header(path):
+    with open(Path(path) / HEADER) as fp:
+        header = json.load(fp)
+    if header["version"] != VERSION:
+        raise ValueError(f"{path} is version {header['version']}, we read {VERSION}")
+    return header
+
+
+def _write_header(path, header):
+    # readers never see a half written header
+    tmp = Path(path) / (HEADER + ".tmp")
+    with open(tmp, "w") as fp:
+        json.dump(header, fp, indent=2)
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp, Path(path) / HEADER)
+
+
+def create(path, columns=COLUMNS, meta=None):
+    """
+    An empty history. meta is anything worth remembering, e.g. the pair and chain.
+    """
+    if "block" not in columns:
+        raise ValueError("every history needs a block column")
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=False)
+    for name in columns:
+        (path / f"{name}.bin").touch()
+    _write_header(path, {"version": VERSION, "rows": 0, "columns": dict(columns), "meta": meta or {}})
+
+
+def append(path, rows):
+    """
+    rows is {column: sequence}, all the same length, blocks strictly after what we have.
+    Columns left out are written as zero.
+    """
+    path = Path(path)
+    header = _read_header(path)
+    columns = header["columns"]
+    unknown = set(rows) - set(columns)
+    if unknown:
+        raise ValueError(f"unknown columns {sorted(unknown)}")
+
+    blocks = np.asarray([int(b) for b in rows["block"]], dtype=U64)
+    count = len(blocks)
+    if count == 0:
+        return header["rows"]
+    if np.any(np.diff(blocks.astype(np.int64)) <= 0):
+        raise ValueError("blocks must be strictly increasing")
+    if header["rows"]:
+        last = History(path).column("block")[-1]
+        if blocks[0] <= last:
+            raise ValueError(f"block {blocks[0]} is not after {last}, the last block we have")
+
+    for name, kind in columns.items():
+        dtype = TYPES[kind]
+        values = rows.get(name)
+        if values is None:
+            array = np.zeros(count, dtype=dtype)
+        elif name == "block":
+            array = blocks
+        elif kind == "wei":
+            array = to_wei_array(values)
+        else:
+            array = np.asarray([int(v) for v in values], dtype=dtype)
+        if len(array) != count:
+            raise ValueError(f"{name} has {len(array)} rows, block has {count}")
+
+        with open(path / f"{name}.bin", "r+b") as fp:
+            # drop anything a crashed append left past the committed rows
+            fp.truncate(header["rows"] * dtype.itemsize)
+            fp.seek(0, os.SEEK_END)
+            fp.write(array.tobytes())
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    header["rows"] += count
+    _write_header(path, header)
+    return header["rows"]
+
+
+class History:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.header = _read_header(path)
+        self.rows = self.header["rows"]
+        self._columns = {}
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def names(self):
+        return list(self.header["columns"])
+
+    def column(self, name):
+        """
+        The whole column, memory mapped, nothing read until it's touched.
+        """
+        if name not in self._columns:
+            dtype = TYPES[self.header["columns"][name]]
+            if self.rows == 0:
+                self._columns[name] = np.zeros(0, dtype=dtype)
+            else:
+                self._columns[name] = np.memmap(self.path / f"{name}.bin", dtype=dtype, mode="r", shape=(self.rows,))
+        return self._columns[name]
+
+    def index(self, block):
+        # row in force at block, -1 if block is before our first row
+        return int(np.searchsorted(self.column("block"), block, side="right")) - 1
+
+    def range(self, start=None, end=None, columns=None):
+        """
+        {column: view} for rows with start <= block < end, zero copy.
+        """
+        blocks = self.column("block")
+        lo = 0 if start is None else int(np.searchsorted(blocks, start, side="left"))
+        hi = self.rows if end is None else int(np.searchsorted(blocks, end, side="left"))
+        return {name: self.column(name)[lo:hi] for name in (columns or self.names)}
+
+    def at(self, block):
+        i = self.index(block)
+        if i < 0:
+            raise KeyError(f"nothing at or before block {block}")
+        return {name: as_int(self.column(name)[i : i + 1])[0] for name in self.names}
+
+    def reserves(self, start=None, end=None):
+        # [(block, r0, r1)], what peg_watcher's backtest takes
+        window = self.range(start, end, ["block", "reserve0", "reserve1"])
+        return list(zip(as_int(window["block"]), as_int(window["reserve0"]), as_int(window["reserve1"])))
+
+
+def ingest_csv(path, csv_path, chunk=100_000, meta=None):
+    """
+    A csv with a header row naming any of our columns, block required. Creates the history
+    if it isn't there yet, otherwise appends.
+    """
+    if not (Path(path) / HEADER).exists():
+        create(path, meta=meta)
+    columns = _read_header(path)["columns"]
+    total = 0
+    with open(csv_path) as fp:
+        reader = csv.DictReader(fp)
+        present = [name for name in reader.fieldnames if name in columns]
+        batch = {name: [] for name in present}
+        for row in reader:
+            for name in present:
+                batch[name].append(int(row[name] or 0))
+            if len(batch["block"]) == chunk:
+                total = append(path, batch)
+                batch = {name: [] for name in present}
+        if batch["block"]:
+            total = append(path, batch)
+    return total
+
+
+def _rows_from_logs(logs, lp_supply):
+    # one row per block with a Sync, lp supply carried through mints and burns
+    rows = {"block": [], "reserve0": [], "reserve1": [], "lp_supply": []}
+    logs = sorted(logs, key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)))
+    for log in logs:
+        block = int(log["blockNumber"], 16)
+        topics = log["topics"]
+        if topics[0] == TRANSFER_TOPIC:
+            amount = int(log["data"], 16)
+            if topics[1] == ZERO_TOPIC:
+                lp_supply += amount
+            elif topics[2] == ZERO_TOPIC:
+                lp_supply -= amount
+            continue
+        if topics[0] != SYNC_TOPIC:
+            continue
+        data = log["data"][2:]
+        r0, r1 = int(data[:64], 16), int(data[64:128], 16)
+        if rows["block"] and rows["block"][-1] == block:
+            # last Sync in a block wins
+            rows["reserve0"][-1], rows["reserve1"][-1], rows["lp_supply"][-1] = r0, r1, lp_supply
+        else:
+            rows["block"].append(block)
+            rows["reserve0"].append(r0)
+            rows["reserve1"].append(r1)
+            rows["lp_supply"].append(lp_supply)
+    return rows, lp_supply
+
+
+def ingest_logs(path, logs_path, lp_supply, meta=None):
+    """
+    eth_getLogs output for the pair, a json list or one log per line. Sync gives reserves,
+    mints and burns move lp_supply on from its value before the first log. Timestamps,
+    emissions and gas prices aren't in pair logs and stay zero.
+    """
+    with open(logs_path) as fp:
+        text = fp.read().strip()
+    logs = json.loads(text) if text.startswith("[") else [json.loads(line) for line in text.splitlines() if line]
+    if not (Path(path) / HEADER).exists():
+        create(path, meta=meta)
+    rows, lp_supply = _rows_from_logs(logs, lp_supply)
+    return append(path, rows), lp_supply
+
+
+def main(argv=None):
+    argv = argv or sys.argv[1:]
+    command, path, *rest = argv
+    if command == "ingest-csv":
+        print(f"{ingest_csv(path, rest[0])} rows")
+    elif command == "ingest-logs":
+        lp_supply = int(rest[rest.index("--lp-supply") + 1])
+        rows, lp_supply = ingest_logs(path, rest[0], lp_supply)
+        print(f"{rows} rows, lp supply {lp_supply} after the last log")
+    elif command == "info":
+        history = History(path)
+        blocks = history.column("block")
+        print(json.dumps(history.header, indent=2))
+        if len(history):
+            print(f"blocks {blocks[0]} to {blocks[-1]}")
+    elif command == "slice":
+        window = History(path).range(int(rest[0]), int(rest[1]))
+        writer = csv.writer(sys.stdout)
+        writer.writerow(list(window))
+        writer.writerows(zip(*(as_int(values) for values in window.values())))
+    else:
+        sys.exit("usage: python -m scripts.block_history ingest-csv|ingest-logs|info|slice path ...")
+
+
+if __name__ == "__main__":
+    main()
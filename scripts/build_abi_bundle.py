@@ -0,0 +1,87 @@
+import json
+from pathlib import Path
+
+from brownie import config, project
+
+BUNDLE = Path(__file__).parent / "abi" / "abi_bundle.json"
+
+# the vault functions our tools read or encode. creditAvailable, debtOutstanding and
+# expectedReturn also come without arguments, answering for msg.sender, which is never one of
+# our strategies. that makes the bare names ambiguous, so we keep the overload with the most inputs
+VAULT_FUNCTIONS = [
+    "apiVersion",
+    "availableDepositLimit",
+    "balanceOf",
+    "creditAvailable",
+    "debtOutstanding",
+    "debtRatio",
+    "decimals",
+    "depositLimit",
+    "emergencyShutdown",
+    "expectedReturn",
+    "governance",
+    "guardian",
+    "lastReport",
+    "lockedProfit",
+    "lockedProfitDegradation",
+    "management",
+    "managementFee",
+    "maxAvailableShares",
+    "name",
+    "performanceFee",
+    "pricePerShare",
+    "rewards",
+    "strategies",
+    "symbol",
+    "token",
+    "totalAssets",
+    "totalDebt",
+    "totalSupply",
+    "updateStrategyDebtRatio",
+    "withdrawalQueue",
+]
+
+
+def _abi(root, name):
+    for folder in ("contracts", "interfaces"):
+        path = Path(root) / "build" / folder / f"{name}.json"
+        if path.exists():
+            return json.loads(path.read_text())["abi"]
+    raise FileNotFoundError(f"no build artifact for {name} in {root}")
+
+
+def vault_entries(abi):
+    widest = {}
+    for entry in abi:
+        name = entry.get("name")
+        if entry["type"] != "function" or name not in VAULT_FUNCTIONS:
+            continue
+        if name not in widest or len(entry["inputs"]) > len(widest[name]["inputs"]):
+            widest[name] = entry
+    missing = set(VAULT_FUNCTIONS) - set(widest)
+    if missing:
+        raise KeyError(f"vault has no {sorted(missing)}")
+    return list(widest.values())
+
+
+def build(root, vault_root, path=BUNDLE):
+    bundle = {
+        "Strategy": _abi(root, "Strategy"),
+        "Vault": vault_entries(_abi(vault_root, "Vault")),
+        "ILpDepositer": _abi(root, "ILpDepositer"),
+    }
+    for entries in bundle.values():
+        entries.sort(key=lambda e: (e["type"], e.get("name", ""), len(e.get("inputs", []))))
+
+    Path(path).write_text(json.dumps(bundle, indent=2, sort_keys=True) + "\n")
+    return bundle
+
+
+def main():
+    # make sure the vault package is compiled too
+    vault_root = Path.home() / ".brownie" / "packages" / config["dependencies"][0]
+    project.load(vault_root)
+    root = project.get_loaded_projects()[0]._path
+
+    build(root, vault_root)
+    print(f"wrote {BUNDLE}")
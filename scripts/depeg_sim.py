@@ -0,0 +1,508 @@
+"""
+Monte Carlo depeg risk for the anyWFTM/wftm position.
+
+    brownie run depeg_sim main [paths] [seed] [workers] [report.json]
+    python -m scripts.depeg_sim 2000 0 8
+    python -m scripts.depeg_sim speedup [paths] [workers]
+
+adjustPosition and liquidatePosition add and remove liquidity with zero minimums and
+treat anyWFTM as 1-1 with wftm, so the only things standing between us and a depeg are
+the lpSlippage price check and how fast we can unwrap. This generates seeded paths for
+the pool and the anyWFTM backing, runs each one through a port of the strategy, the
+pool and just enough of the vault, once for every lpSlippage/realiseLosses setting, and
+reports the loss distribution marked at what anyWFTM can actually be redeemed for.
+
+A path is hourly steps of:
+  - noise in the pool's anyWFTM share, pulled back towards the peg by arbs
+  - scares: somebody dumps anyWFTM into the pool, backing intact, arbs fix it
+  - drains: part of the wftm backing anyWFTM disappears (bridge exploit). from then on
+    the pool reprices to backing / supply and everybody else races to unwrap what's left.
+    anyWFTM.withdraw() reverts when the backing can't cover it, and so do we
+  - other LPs pulling a chunk of the pool
+  - vault users depositing and withdrawing, and a harvest every harvest_every steps
+
+Every setting sees the same draws for a path, and a path's draws only depend on the seed
+and its index, so results are identical whatever the number of workers.
+"""
+import json
+import random
+import statistics
+import sys
+import time
+from collections import namedtuple
+from multiprocessing import Pool, cpu_count
+
+from scripts.solidly_math import get_amount_out, quote_remove_liquidity
+
+DENOMINATOR = 10_000
+ONE = 10 ** 18
+
+# same thresholds as the contract
+DUST = 10 ** 17
+WRAP_DUST = 10 ** 7
+
+# vault.withdraw default maxLoss
+MAX_LOSS_BPS = 1
+
+STEPS = 24 * 30  # a month of hourly steps
+HARVEST_EVERY = 12
+
+POOL_SIZE = 6_000_000 * ONE  # wftm + anyWFTM in the pool
+ANY_SUPPLY = 40_000_000 * ONE  # anyWFTM in circulation, fully backed to start with
+VAULT_DEPOSIT = 1_000_000 * ONE
+
+# market model, per step
+NOISE = 0.01  # std of the pool's anyWFTM share
+REVERSION = 0.3  # share of the distance to fair value arbs close
+SWAP_FEE = 0.0001  # what LPs earn on flow
+SCARE_RATE = 1 / 1500
+SCARE_SIZE = (0.05, 0.25)
+DRAIN_RATE = 1 / 5000
+DRAIN_SIZE = (0.05, 0.6)
+RUN_RATE = 0.02  # share of the remaining backing others unwrap each step once it's impaired
+LP_SHOCK_RATE = 1 / 500
+LP_SHOCK_SIZE = (0.1, 0.5)
+WITHDRAW_RATE = 1 / 20
+WITHDRAW_SIZE = (0.005, 0.05)  # share of vault supply
+DEPOSIT_RATE = 1 / 20
+DEPOSIT_SIZE = (0.005, 0.05)  # as a share of the first deposit
+
+SETTINGS = [
+    (lp_slippage, realise_losses)
+    for lp_slippage in (9900, 9950, 9980, 9995)
+    for realise_losses in (False, True)
+]
+
+Step = namedtuple("Step", ["noise", "scare", "drain", "lp_shock", "withdraw", "deposit"])
+
+
+class Revert(Exception):
+    pass
+
+
+def make_path(seed, index, steps=STEPS):
+    rng = random.Random(f"{seed}:{index}")
+    maybe = lambda rate, size: rng.uniform(*size) if rng.random() < rate else 0.0
+    return [
+        Step(
+            noise=rng.gauss(0, NOISE),
+            scare=maybe(SCARE_RATE, SCARE_SIZE),
+            drain=maybe(DRAIN_RATE, DRAIN_SIZE),
+            lp_shock=maybe(LP_SHOCK_RATE, LP_SHOCK_SIZE),
+            withdraw=maybe(WITHDRAW_RATE, WITHDRAW_SIZE),
+            deposit=maybe(DEPOSIT_RATE, DEPOSIT_SIZE),
+        )
+        for _ in range(steps)
+    ]
+
+
+def _price(x):
+    # marginal price of anyWFTM in wftm on x3y+y3x when anyWFTM is x of the reserves
+    w, a = 1 - x, x
+    return (w ** 3 + 3 * a * a * w) / (3 * w * w * a + a ** 3)
+
+
+_fair_share = {}
+
+
+def fair_share(price):
+    """
+    The pool's anyWFTM share at which it prices anyWFTM at price, 0.5 at the peg.
+    """
+    key = round(price, 4)
+    if key >= 1:
+        return 0.5
+    if key not in _fair_share:
+        lo, hi = 0.5, 0.9999
+        for _ in range(40):
+            mid = (lo + hi) / 2
+            if _price(mid) > key:
+                lo = mid
+            else:
+                hi = mid
+        _fair_share[key] = lo
+    return _fair_share[key]
+
+
+class Model:
+    """
+    The pool, anyWFTM's backing, the strategy and a single strategy vault, all in wei.
+    Strategy and router methods mirror the contracts, rounding included.
+    """
+
+    def __init__(self, wftm_reserve, any_reserve, lp_supply, any_supply, backing, lp_slippage=9995, realise_losses=False):
+        # pool
+        self.wftm_reserve = wftm_reserve
+        self.any_reserve = any_reserve
+        self.lp_supply = lp_supply
+        # anyWFTM, backing is the wftm it holds to honour withdraw()
+        self.any_supply = any_supply
+        self.backing = backing
+        # strategy
+        self.lp_slippage = lp_slippage
+        self.realise_losses = realise_losses
+        self.want = 0
+        self.any = 0
+        self.lp = 0
+        # vault
+        self.idle = 0
+        self.debt = 0
+        self.shares = 0
+        # what happened
+        self.skipped = 0
+        self.reported_loss = 0
+        self.share = any_reserve / (wftm_reserve + any_reserve)
+
+    # ---- transactions, all or nothing like the real thing
+
+    def transact(self, fn, *args):
+        state = self.__dict__.copy()
+        try:
+            return fn(*args)
+        except Revert:
+            self.__dict__ = state
+            raise
+
+    # ---- anyWFTM
+
+    def _wrap(self, amount):
+        self.want -= amount
+        self.any += amount
+        self.backing += amount
+        self.any_supply += amount
+        return amount
+
+    def _unwrap(self):
+        amount = self.any
+        if amount > self.backing:
+            raise Revert("anyWFTM backing")
+        self.any = 0
+        self.want += amount
+        self.backing -= amount
+        self.any_supply -= amount
+        return amount
+
+    # ---- router
+
+    def quote_remove_liquidity(self, liquidity):
+        return quote_remove_liquidity(liquidity, self.wftm_reserve, self.any_reserve, self.lp_supply)
+
+    def get_amount_out(self, amount, wftm_in):
+        return get_amount_out(amount, wftm_in, self.wftm_reserve, self.any_reserve, ONE, ONE, True)
+
+    def _add_liquidity(self, wftm_desired, any_desired):
+        any_optimal = wftm_desired * self.any_reserve // self.wftm_reserve
+        if any_optimal <= any_desired:
+            wftm_in, any_in = wftm_desired, any_optimal
+        else:
+            wftm_in, any_in = any_desired * self.wftm_reserve // self.any_reserve, any_desired
+        minted = min(wftm_in * self.lp_supply // self.wftm_reserve, any_in * self.lp_supply // self.any_reserve)
+        self.want -= wftm_in
+        self.any -= any_in
+        self.wftm_reserve += wftm_in
+        self.any_reserve += any_in
+        self.lp_supply += minted
+        self.lp += minted
+        return minted
+
+    def _remove_liquidity(self, liquidity):
+        wftm_out, any_out = self.quote_remove_liquidity(liquidity)
+        self.lp -= liquidity
+        self.lp_supply -= liquidity
+        self.wftm_reserve -= wftm_out
+        self.any_reserve -= any_out
+        self.want += wftm_out
+        self.any += any_out
+
+    # ---- strategy
+
+    def estimated_total_assets(self):
+        wftm_out, any_out = self.quote_remove_liquidity(self.lp)
+        return any_out + self.any + self.want + wftm_out
+
+    def lp_price_check(self):
+        min_out = ONE * self.lp_slippage // DENOMINATOR
+        worst = self.get_amount_out(ONE, True)
+        if worst < min_out:
+            return False, worst
+        worst = min(worst, self.get_amount_out(ONE, False))
+        return worst >= min_out, worst
+
+    def adjust_position(self):
+        # bufferBps 0 and maxDepositBps 10_000, the defaults
+        if self.want + self.any <= DUST:
+            return
+        ok, _ = self.lp_price_check()
+        if not ok:
+            self.skipped += 1
+            return
+        if self.any > WRAP_DUST:
+            self._unwrap()
+        to_invest = self.want
+        any_we_need = to_invest * self.any_reserve // (self.wftm_reserve + self.any_reserve)
+        if any_we_need > WRAP_DUST:
+            self._wrap(any_we_need)
+        wftm_bal = min(self.want, to_invest - any_we_need)
+        if self.any > 0 and wftm_bal > 0:
+            self._add_liquidity(wftm_bal, self.any)
+
+    def wftm_to_lp_tokens(self, amount):
+        wftm_out, any_out = self.quote_remove_liquidity(ONE)
+        return amount * ONE // (wftm_out + any_out)
+
+    def liquidate_position(self, amount_needed):
+        if self.want >= amount_needed:
+            return amount_needed, 0
+        if self.any > WRAP_DUST:
+            self._unwrap()
+        if self.want >= amount_needed:
+            return amount_needed, 0
+        lp_needed = self.wftm_to_lp_tokens(amount_needed - self.want)
+        if self.lp > 0:
+            self._remove_liquidity(min(lp_needed, self.lp))
+        if self.any > WRAP_DUST:
+            self._unwrap()
+        liquidated = min(self.want, amount_needed)
+        return liquidated, amount_needed - liquidated
+
+    def prepare_return(self):
+        # debtOutstanding is always 0 here, the vault never asks for debt back
+        assets = self.estimated_total_assets()
+        profit = loss = 0
+        to_free = 0
+        if assets >= self.debt:
+            profit = assets - self.debt
+            to_free = profit
+        elif self.realise_losses:
+            loss = self.debt - assets
+        if self.want < to_free:
+            self.liquidate_position(to_free)
+            profit = min(profit, self.want)
+        return profit, loss
+
+    def _harvest(self):
+        profit, loss = self.prepare_return()
+        # vault.report, no fees. everything the vault has goes back out as credit
+        self.reported_loss += loss
+        self.debt -= loss
+        self.want -= profit
+        self.idle += profit
+        self.want += self.idle
+        self.debt += self.idle
+        self.idle = 0
+        self.adjust_position()
+
+    def harvest(self):
+        return self.transact(self._harvest)
+
+    # ---- vault
+
+    def total_assets(self):
+        return self.idle + self.debt
+
+    def deposit(self, amount):
+        shares = amount if self.shares == 0 else amount * self.shares // self.total_assets()
+        self.shares += shares
+        self.idle += amount
+        return shares
+
+    def _withdraw(self, shares):
+        value = shares * self.total_assets() // self.shares
+        from_idle = min(value, self.idle)
+        self.idle -= from_idle
+        needed = value - from_idle
+        loss = 0
+        if needed > 0:
+            freed, loss = self.liquidate_position(needed)
+            self.want -= freed
+            self.debt -= freed + loss
+            if loss > MAX_LOSS_BPS * value // DENOMINATOR:
+                raise Revert("loss")
+        self.shares -= shares
+        return value - loss
+
+    def withdraw(self, shares):
+        return self.transact(self._withdraw, shares)
+
+    # ---- the rest of the world
+
+    def market(self, step):
+        if step.drain:
+            self.backing -= int(self.backing * step.drain)
+        if self.backing < self.any_supply:
+            # everybody else who can still unwrap does
+            run = int(self.backing * RUN_RATE)
+            self.backing -= run
+            self.any_supply -= run
+        fair = fair_share(min(1.0, self.backing / self.any_supply))
+
+        share = self.share + REVERSION * (fair - self.share) + step.noise + step.scare
+        share = min(max(share, 0.05), 0.95)
+        moved = abs(share - self.share)
+        self.share = share
+
+        # swaps keep x3y+y3x, solve for the size of the pool at the new share
+        w, a = self.wftm_reserve, self.any_reserve
+        k = float(w) * a * (float(w) * w + float(a) * a)
+        size = (k / ((1 - share) * share * ((1 - share) ** 2 + share ** 2))) ** 0.25
+        size *= 1 + moved * SWAP_FEE
+        self.wftm_reserve = int(size * (1 - share))
+        self.any_reserve = int(size * share)
+
+        if step.lp_shock:
+            # other LPs leave, our lp stays
+            burned = int((self.lp_supply - self.lp) * step.lp_shock)
+            self.wftm_reserve -= self.wftm_reserve * burned // self.lp_supply
+            self.any_reserve -= self.any_reserve * burned // self.lp_supply
+            self.lp_supply -= burned
+
+    def redeemable(self):
+        # what a unit of anyWFTM is really worth today
+        return min(1.0, self.backing / self.any_supply)
+
+    def marked_assets(self):
+        """
+        Vault assets with anyWFTM marked at its backing rather than 1-1.
+        """
+        wftm_out, any_out = self.quote_remove_liquidity(self.lp)
+        return self.idle + self.want + wftm_out + (self.any + any_out) * self.redeemable()
+
+
+def new_model(lp_slippage, realise_losses):
+    half = POOL_SIZE // 2
+    return Model(half, half, half, ANY_SUPPLY, ANY_SUPPLY, lp_slippage, realise_losses)
+
+
+def simulate(path, lp_slippage, realise_losses, harvest_every=HARVEST_EVERY):
+    model = new_model(lp_slippage, realise_losses)
+    deposited = VAULT_DEPOSIT
+    received = 0
+    stuck = failed = 0
+    model.deposit(VAULT_DEPOSIT)
+    model.harvest()
+
+    for i, step in enumerate(path):
+        model.market(step)
+        if step.deposit:
+            amount = int(VAULT_DEPOSIT * step.deposit)
+            model.deposit(amount)
+            deposited += amount
+        if step.withdraw:
+            try:
+                received += model.withdraw(int(model.shares * step.withdraw))
+            except Revert:
+                stuck += 1
+        if (i + 1) % harvest_every == 0:
+            try:
+                model.harvest()
+            except Revert:
+                failed += 1
+
+    loss = deposited - received - model.marked_assets()
+    return {
+        "loss_bps": loss * DENOMINATOR / deposited,
+        "reported_loss_bps": model.reported_loss * DENOMINATOR / deposited,
+        "stuck_withdrawals": stuck,
+        "failed_harvests": failed,
+        "skipped_deposits": model.skipped,
+        "redeemable": model.redeemable(),
+    }
+
+
+def _run_path(task):
+    seed, index, steps, settings = task
+    path = make_path(seed, index, steps)
+    return index, [simulate(path, lp_slippage, realise_losses) for lp_slippage, realise_losses in settings]
+
+
+def _percentiles(values):
+    values = sorted(values)
+    pick = lambda q: values[min(int(q * len(values)), len(values) - 1)]
+    return {
+        "mean": statistics.fmean(values),
+        "p50": pick(0.5),
+        "p90": pick(0.9),
+        "p99": pick(0.99),
+        "max": values[-1],
+    }
+
+
+def run(paths=1000, seed=0, workers=None, steps=STEPS, settings=SETTINGS):
+    """
+    Every path against every setting. workers=1 runs in this process, None uses every core.
+    """
+    workers = workers or cpu_count()
+    tasks = [(seed, index, steps, settings) for index in range(paths)]
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_run_path(task) for task in tasks]
+    else:
+        with Pool(workers) as pool:
+            results = pool.map(_run_path, tasks, chunksize=max(1, paths // (workers * 8)))
+    elapsed = time.perf_counter() - start
+
+    results = [outcomes for _, outcomes in sorted(results)]
+    report = {"paths": paths, "seed": seed, "steps": steps, "workers": workers, "elapsed": elapsed, "settings": {}}
+    for i, (lp_slippage, realise_losses) in enumerate(settings):
+        outcomes = [path[i] for path in results]
+        report["settings"][f"lpSlippage={lp_slippage} realiseLosses={realise_losses}"] = {
+            "loss_bps": _percentiles([o["loss_bps"] for o in outcomes]),
+            "loss_probability": sum(o["loss_bps"] > 1 for o in outcomes) / paths,
+            "reported_loss_bps": statistics.fmean(o["reported_loss_bps"] for o in outcomes),
+            "stuck_withdrawals": statistics.fmean(o["stuck_withdrawals"] for o in outcomes),
+            "failed_harvests": statistics.fmean(o["failed_harvests"] for o in outcomes),
+            "skipped_deposits": statistics.fmean(o["skipped_deposits"] for o in outcomes),
+        }
+    return report
+
+
+def speedup(paths=200, seed=0, workers=None, steps=STEPS):
+    """
+    Wall time on one core against all of them. Paths share nothing, so this should be close
+    to the core count once there are enough paths to go round.
+    """
+    workers = workers or cpu_count()
+    single = run(paths, seed, 1, steps)["elapsed"]
+    multi = run(paths, seed, workers, steps)["elapsed"]
+    return {"workers": workers, "single": single, "multi": multi, "speedup": single / multi}
+
+
+def format_speedup(result):
+    return (
+        f"{result['workers']} workers: {result['single']:.1f}s on one core, {result['multi']:.1f}s pooled,"
+        f" {result['speedup']:.2f}x ({result['speedup'] / result['workers']:.0%} of linear)"
+    )
+
+
+def format_report(report):
+    lines = [f"{report['paths']} paths, seed {report['seed']}, {report['workers']} workers, {report['elapsed']:.1f}s"]
+    lines.append(
+        f"{'setting':>38} {'mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'P(loss)':>8} {'stuck':>6} {'failed':>6} {'skipped':>7}"
+    )
+    for name, stats in report["settings"].items():
+        loss = stats["loss_bps"]
+        lines.append(
+            f"{name:>38} {loss['mean']:>8.2f} {loss['p50']:>8.2f} {loss['p90']:>8.2f} {loss['p99']:>8.2f} {loss['max']:>8.2f}"
+            f" {stats['loss_probability']:>8.3f} {stats['stuck_withdrawals']:>6.2f} {stats['failed_harvests']:>6.2f} {stats['skipped_deposits']:>7.2f}"
+        )
+    lines.append("losses in bps of everything deposited, anyWFTM marked at what its backing can redeem")
+    return "\n".join(lines)
+
+
+def main(paths=1000, seed=0, workers=None, out=None):
+    report = run(int(paths), int(seed), int(workers) if workers else None)
+    print(format_report(report))
+    if out:
+        with open(out, "w") as fp:
+            json.dump(report, fp, indent=2)
+
+
+def bench(paths=200, workers=None):
+    print(format_speedup(speedup(int(paths), workers=int(workers) if workers else None)))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["speedup"]:
+        bench(*sys.argv[2:])
+    else:
+        main(*sys.argv[1:])
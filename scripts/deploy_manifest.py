@@ -0,0 +1,199 @@
+"""
+Non-interactive bulk deploy and configure from a manifest.
+
+    brownie run deploy_manifest main manifests/wftm.yml --network ftm-main
+
+The manifest is YAML or JSON:
+
+    account: ychad          # brownie account id, password from $DEPLOY_PASSWORD
+    clone_from: 0x...       # optional, clone this original strategy instead of deploying
+    publish_source: false
+    defaults:
+      lp_slippage: 9995
+      min_harvest_credit: 10000000000000000000000
+      keeper: 0x...
+      health_check: 0x...
+    strategies:
+      - vault: 0x...
+        name: wftm_anyftm_solidex
+        lp_slippage: 9990   # per entry values override defaults
+
+Transactions go through tx_pipeline.Submitter, so they're sent back to back and only
+waited on at the end of each phase (deploy, configure, verify), stuck ones get bumped and
+everything sent is journaled next to the state file. Progress is written to a state file
+(manifest name + .state.json by default) after every phase, so a rerun picks up where
+the last one stopped and never redeploys a strategy it already knows about. Setters are
+only sent when the on-chain value differs, so rerunning a finished manifest sends nothing.
+
+health_check, do_health_check, max_deposit_bps and buffer_bps need a vault manager
+(governance or management) as the deploying account.
+"""
+import json
+import os
+from pathlib import Path
+
+import yaml
+from brownie import Strategy, accounts, chain
+
+from scripts.tx_pipeline import CONFIRMED, Submitter
+
+# manifest key -> (setter, getter)
+SETTERS = {
+    "lp_slippage": ("setLpSlippage", "lpSlippage"),
+    "min_harvest_credit": ("setMinHarvestCredit", "minHarvestCredit"),
+    "keeper": ("setKeeper", "keeper"),
+    "health_check": ("setHealthCheck", "healthCheck"),
+    "do_health_check": ("setDoHealthCheck", "doHealthCheck"),
+    "max_deposit_bps": ("setMaxDepositBps", "maxDepositBps"),
+    "buffer_bps": ("setBufferBps", "bufferBps"),
+}
+
+# setLpSlippage is overloaded, we only ever use the single argument version
+SIGNATURES = {"setLpSlippage": "uint256"}
+
+
+def load_manifest(path):
+    path = Path(path)
+    with path.open() as fp:
+        if path.suffix == ".json":
+            return json.load(fp)
+        return yaml.safe_load(fp)
+
+
+def load_state(path):
+    if path.exists():
+        with path.open() as fp:
+            return json.load(fp)
+    return {}
+
+
+def save_state(path, state):
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w") as fp:
+        json.dump(state, fp, indent=2, sort_keys=True)
+    tmp.replace(path)
+
+
+def entries(manifest):
+    defaults = manifest.get("defaults", {})
+    for entry in manifest["strategies"]:
+        config = {**defaults, **entry}
+        config.setdefault("clone_from", manifest.get("clone_from"))
+        yield f"{config['vault']}:{config['name']}", config
+
+
+def _same(current, value):
+    if isinstance(current, str) and isinstance(value, str):
+        return current.lower() == value.lower()
+    return current == value
+
+
+def _wait(submitter):
+    # everything the submitter is watching, including what an interrupted run left pending
+    txs = submitter.wait()
+    for tx in txs.values():
+        if tx["status"] != CONFIRMED:
+            raise RuntimeError(f"{tx['label']}: {tx['status']} {tx['txid'] or tx['hashes'][-1]}")
+    return txs
+
+
+def _deployed_address(config, tx):
+    if config.get("clone_from"):
+        return tx.events["Cloned"]["clone"]
+    return tx.contract_address
+
+
+def deploy(manifest, state, state_path, submitter):
+    for key, config in entries(manifest):
+        entry = state.setdefault(key, {})
+        if "strategy" in entry or "tx" in entry:
+            continue
+        if config.get("clone_from"):
+            original = Strategy.at(config["clone_from"])
+            account = submitter.account
+            nonce = submitter.submit(
+                original.cloneStrategy,
+                config["vault"],
+                account,
+                account,
+                config.get("keeper", account),
+                config["name"],
+                label=f"clone {config['name']}",
+            )
+        else:
+            nonce = submitter.submit(Strategy.deploy, config["vault"], config["name"], label=f"deploy {config['name']}")
+        entry["nonce"] = nonce
+        entry["tx"] = submitter.txs[nonce]["hashes"][-1]
+    save_state(state_path, state)
+
+    txs = _wait(submitter)
+    for key, config in entries(manifest):
+        entry = state[key]
+        if "strategy" not in entry:
+            # if it got bumped, the hash that was mined isn't the one we saved
+            sent = txs.get(entry.get("nonce"))
+            if sent is not None and sent["hashes"][0] == entry["tx"]:
+                entry["tx"] = sent["txid"]
+            tx = chain.get_transaction(entry["tx"])
+            tx.wait(1)
+            entry["strategy"] = _deployed_address(config, tx)
+            print(f"{config['name']}: {entry['strategy']}")
+    save_state(state_path, state)
+
+
+def configure(manifest, state, state_path, submitter):
+    for key, config in entries(manifest):
+        strategy = Strategy.at(state[key]["strategy"])
+        for option, (setter, getter) in SETTERS.items():
+            if option not in config:
+                continue
+            value = config[option]
+            if _same(getattr(strategy, getter)(), value):
+                continue
+            fn = getattr(strategy, setter)
+            if setter in SIGNATURES:
+                fn = fn[SIGNATURES[setter]]
+            submitter.submit(fn, value, label=f"{config['name']} {setter}")
+
+    _wait(submitter)
+    for key, _ in entries(manifest):
+        state[key]["configured"] = True
+    save_state(state_path, state)
+
+
+def verify(manifest, state, state_path):
+    publish = manifest.get("publish_source", False)
+    for key, config in entries(manifest):
+        entry = state[key]
+        strategy = Strategy.at(entry["strategy"])
+        assert _same(strategy.vault(), config["vault"]), f"{key}: wrong vault"
+        assert strategy.name() == config["name"], f"{key}: wrong name"
+        for option, (_, getter) in SETTERS.items():
+            if option in config:
+                assert _same(getattr(strategy, getter)(), config[option]), f"{key}: {option}"
+        if publish and not config.get("clone_from") and not entry.get("published"):
+            Strategy.publish_source(strategy)
+            entry["published"] = True
+        entry["verified"] = True
+    save_state(state_path, state)
+
+
+def run(manifest_path, state_path=None, account=None, journal=None):
+    manifest = load_manifest(manifest_path)
+    state_path = Path(state_path or f"{manifest_path}.state.json")
+    state = load_state(state_path)
+
+    if account is None:
+        account = accounts.load(manifest["account"], os.environ.get("DEPLOY_PASSWORD"))
+    submitter = Submitter(account, journal=journal or f"{state_path}.journal.jsonl")
+
+    deploy(manifest, state, state_path, submitter)
+    configure(manifest, state, state_path, submitter)
+    verify(manifest, state, state_path)
+    return state
+
+
+def main(manifest_path, state_path=None):
+    state = run(manifest_path, state_path)
+    for key, entry in state.items():
+        print(f"{key} -> {entry['strategy']} verified: {entry.get('verified', False)}")
@@ -0,0 +1,203 @@
+"""
+Where does a harvest's gas go? Walks the call trace of a transaction on a local chain and
+breaks gas down by external call, attributed to the line in our contracts that made it.
+
+    brownie run gas_profile main 0xtxid [profile.json] --network mainnet-fork
+    python scripts/gas_profile.py folded profile.json > harvest.folded   # flamegraph.pl or speedscope
+    python scripts/gas_profile.py diff old.json new.json
+
+A profile holds every external call (caller function, call site, callee, selector,
+inclusive gas), the same thing folded into flame graph stacks with exclusive gas, and
+the gas of all calls made from each call site in our own sources. Profile the same
+transaction on two builds and diff the json to see what moved.
+"""
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+CALL_OPS = ("CALL", "STATICCALL", "DELEGATECALL", "CALLCODE")
+
+# stack position of argsOffset, counted from the top
+ARGS_OFFSET = {"CALL": 3, "CALLCODE": 3, "STATICCALL": 2, "DELEGATECALL": 2}
+
+_line_starts = {}
+
+
+def _site(step):
+    # "contracts/Strategy.sol:412-424" for the statement that made this call, if brownie knows the source
+    source = step.get("source")
+    if not source:
+        return None
+    filename = source["filename"]
+    if filename not in _line_starts:
+        path = Path(filename)
+        if not path.exists():
+            return filename
+        text = path.read_text()
+        _line_starts[filename] = [0] + [i + 1 for i, ch in enumerate(text) if ch == "\n"]
+    starts = _line_starts[filename]
+    start, end = source["offset"]
+    first = sum(1 for s in starts if s <= start)
+    last = sum(1 for s in starts if s <= end)
+    return f"{filename}:{first}" if first == last else f"{filename}:{first}-{last}"
+
+
+def _selector(step):
+    # the first four bytes of calldata, straight out of the caller's memory
+    stack = step.get("stack") or []
+    memory = step.get("memory") or []
+    position = ARGS_OFFSET[step["op"]]
+    if len(stack) <= position or not memory:
+        return None
+    offset = int(stack[-1 - position], 16)
+    blob = "".join(word[2:] if word.startswith("0x") else word for word in memory)
+    selector = blob[offset * 2 : offset * 2 + 8]
+    return "0x" + selector if len(selector) == 8 else None
+
+
+def _target(step):
+    stack = step.get("stack") or []
+    if len(stack) < 2:
+        return None
+    return "0x" + stack[-2][-40:]
+
+
+def profile(tx):
+    """
+    tx is a brownie TransactionReceipt on a chain that supports debug_traceTransaction.
+    """
+    trace = tx.trace
+    base = trace[0]["depth"]  # ganache and geth don't agree on where depth starts
+    root = f"{trace[0].get('contractName')}.{tx.fn_name}"
+    execution = trace[0]["gas"] - trace[-1]["gas"] + trace[-1]["gasCost"]
+
+    calls = []
+    frames = [(root, None)]  # (label, index into calls) for every call depth we're inside
+    pending = {}  # depth -> (index into calls, gas before the call op)
+    child_gas = defaultdict(int)  # index into calls, or None for the root -> gas spent in subcalls
+
+    def finish(depth, gas_after):
+        index, gas_before = pending.pop(depth)
+        calls[index]["gas"] = gas_before - gas_after
+        child_gas[calls[index]["parent"]] += calls[index]["gas"]
+
+    for i, step in enumerate(trace):
+        depth = step["depth"] - base
+
+        # back at the depth of a call that was waiting, either the callee just returned or
+        # the call never entered code at all (precompile, eoa) and this is the next op
+        if depth in pending and (trace[i - 1]["depth"] - base > depth or trace[i - 1]["op"] in CALL_OPS):
+            finish(depth, step["gas"])
+            del frames[depth + 1 :]
+
+        if step["op"] not in CALL_OPS:
+            continue
+
+        nxt = trace[i + 1] if i + 1 < len(trace) else None
+        entered = nxt is not None and nxt["depth"] - base == depth + 1
+        to = _target(step)
+        selector = _selector(step)
+        if entered and nxt.get("fn"):
+            label = nxt["fn"]
+        else:
+            label = (entered and nxt.get("contractName")) or to
+            if selector:
+                label = f"{label}.{selector}"
+
+        calls.append(
+            {
+                "caller": step.get("fn") or frames[-1][0],
+                "site": _site(step),
+                "op": step["op"],
+                "to": to,
+                "selector": selector,
+                "callee": label,
+                "depth": depth,
+                "parent": frames[-1][1],
+                "stack": ";".join(frame[0] for frame in frames) + ";" + label,
+                "gas": 0,
+            }
+        )
+        pending[depth] = (len(calls) - 1, step["gas"])
+        if entered:
+            frames.append((label, len(calls) - 1))
+
+    # anything still pending ran to the end of the trace, e.g. a revert bubbling up
+    for depth in sorted(pending, reverse=True):
+        finish(depth, trace[-1]["gas"])
+
+    folded = defaultdict(int)
+    folded[root] += execution - child_gas[None]
+    for index, call in enumerate(calls):
+        folded[call["stack"]] += call["gas"] - child_gas[index]
+
+    sites = defaultdict(int)
+    for call in calls:
+        if call["site"]:
+            sites[call["site"]] += call["gas"]
+
+    return {
+        "tx": tx.txid,
+        "root": root,
+        "gas_used": tx.gas_used,
+        "execution": execution,
+        "calls": calls,
+        "folded": dict(folded),
+        "sites": dict(sorted(sites.items(), key=lambda kv: -kv[1])),
+    }
+
+
+def folded_lines(prof):
+    return [f"{stack} {gas}" for stack, gas in sorted(prof["folded"].items()) if gas > 0]
+
+
+def diff(old, new):
+    """
+    Rows of (stack, old gas, new gas, change), biggest moves first.
+    """
+    stacks = set(old["folded"]) | set(new["folded"])
+    rows = [
+        (stack, old["folded"].get(stack, 0), new["folded"].get(stack, 0))
+        for stack in stacks
+    ]
+    rows = [(stack, a, b, b - a) for stack, a, b in rows if a != b]
+    return sorted(rows, key=lambda row: -abs(row[3]))
+
+
+def format_diff(old, new, limit=30):
+    lines = [f"gas used {old['gas_used']:,} -> {new['gas_used']:,} ({new['gas_used'] - old['gas_used']:+,})"]
+    for stack, a, b, change in diff(old, new)[:limit]:
+        lines.append(f"{change:+10,}  {a:>10,} -> {b:<10,} {stack}")
+    return "\n".join(lines)
+
+
+def format_profile(prof, limit=20):
+    lines = [f"{prof['root']} gas used {prof['gas_used']:,}, execution {prof['execution']:,}"]
+    for stack, gas in sorted(prof["folded"].items(), key=lambda kv: -kv[1])[:limit]:
+        lines.append(f"{gas:>10,}  {stack}")
+    lines.append("by call site:")
+    for site, gas in list(prof["sites"].items())[:limit]:
+        lines.append(f"{gas:>10,}  {site}")
+    return "\n".join(lines)
+
+
+def main(txid, out=None):
+    from brownie import chain
+
+    prof = profile(chain.get_transaction(txid))
+    print(format_profile(prof))
+    if out:
+        with open(out, "w") as fp:
+            json.dump(prof, fp, indent=2)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "folded":
+        with open(sys.argv[2]) as fp:
+            print("\n".join(folded_lines(json.load(fp))))
+    elif len(sys.argv) == 4 and sys.argv[1] == "diff":
+        with open(sys.argv[2]) as a, open(sys.argv[3]) as b:
+            print(format_diff(json.load(a), json.load(b)))
+    else:
+        sys.exit("usage: python scripts/gas_profile.py folded profile.json | diff old.json new.json")
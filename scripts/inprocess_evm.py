@@ -0,0 +1,557 @@
+"""
+An EVM inside the test process, so unit tests against mocks don't need a ganache.
+
+    INPROCESS_EVM=1 brownie test tests/unit --network development
+
+With INPROCESS_EVM set, tests/conftest.py starts a Node before brownie connects. It
+listens on the development network's port, so brownie attaches to it the way it attaches
+to a ganache it didn't launch. Once connected, tests/unit swaps brownie's web3 provider
+for a Provider that calls straight into the node, so every request after that is a python
+function call into py-evm with no http, sockets or second process in the way.
+
+The node speaks the json-rpc brownie uses in ganache's dialect (evm_snapshot, evm_revert,
+evm_increaseTime, evm_mine), so chain.sleep, chain.mine, fn_isolation and brownie.reverts
+work as they do on ganache, except that chain.sleep mines a block here. Strategy has its
+token, router and depositer addresses baked in, so reset() can put code at fixed
+addresses in a fresh genesis, which is how the mocks in contracts/mocks get to where the
+strategy looks for them.
+
+debug_traceTransaction only hands back the transaction's return data, with no struct
+logs, which is all brownie needs for tx.return_value and revert messages. So there are no
+call traces and no coverage. There's no forking and no unlocking accounts we don't hold
+keys for either, anything that needs fantom state stays on the ganache fork.
+"""
+import json
+import os
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eth.exceptions import InvalidInstruction, OutOfGas, Revert
+from eth.vm.forks import BerlinVM
+from eth_tester import EthereumTester, PyEVMBackend
+from eth_tester.exceptions import (
+    BlockNotFound,
+    SnapshotNotFound,
+    TransactionFailed,
+    TransactionNotFound,
+    ValidationError,
+)
+from eth_utils import ValidationError as EVMValidationError, to_bytes, to_canonical_address
+from web3.providers.base import JSONBaseProvider
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("INPROCESS_EVM_PORT", 8545))
+
+# brownie picks its rpc backend from the client version, this gets us the ganache one
+CLIENT_VERSION = "EthereumJS TestRPC/v2.13.2/ethereum-js"
+GAS_LIMIT = 30_000_000
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Error(string), what solidity reverts with
+ERROR_SELECTOR = "08c379a0"
+
+# json-rpc transaction fields to eth-tester's
+TX_FIELDS = {
+    "from": "from",
+    "to": "to",
+    "gas": "gas",
+    "gasPrice": "gas_price",
+    "value": "value",
+    "data": "data",
+    "input": "data",
+    "nonce": "nonce",
+}
+TX_NUMBERS = {"gas", "gas_price", "value", "nonce"}
+
+NODE = None  # the node start() is serving
+
+
+def _camel(key):
+    head, *rest = key.split("_")
+    return head + "".join(word.title() for word in rest)
+
+
+def _out(value):
+    # eth-tester hands back ints and snake_case keys, json-rpc wants hex and camelCase
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if isinstance(value, dict):
+        return {_camel(key): _out(item) for key, item in value.items()}
+    return [_out(item) for item in value]
+
+
+def _tx_out(tx):
+    tx = _out(tx)
+    tx["input"] = tx.pop("data")
+    tx["to"] = tx["to"] or None
+    return tx
+
+
+def _tx_in(tx, gas_limit):
+    out = {}
+    for key, value in tx.items():
+        name = TX_FIELDS.get(key)
+        if name is None or value is None:
+            continue
+        out[name] = int(value, 16) if name in TX_NUMBERS and isinstance(value, str) else value
+    out.setdefault("from", ZERO_ADDRESS)
+    out.setdefault("gas", gas_limit)
+    out.setdefault("gas_price", 0)
+    return out
+
+
+def _block_id(block):
+    if block in (None, "latest", "earliest", "pending"):
+        return block or "latest"
+    return int(block, 16) if isinstance(block, str) else block
+
+
+class _SendFailed(Exception):
+    """
+    A transaction that was mined but reverted. ganache answers the send with an error that
+    carries the hash and the reason, and brownie builds the failed receipt from that.
+    """
+
+    def __init__(self, txid, kind, output):
+        super().__init__(kind)
+        self.error = {
+            "code": -32000,
+            "message": f"VM Exception while processing transaction: {kind}",
+            "data": {txid: {"error": kind, "program_counter": None, "return": output, "reason": output}},
+        }
+
+
+def _error_kind(error):
+    if isinstance(error, Revert):
+        return "revert"
+    if isinstance(error, OutOfGas):
+        return "out of gas"
+    if isinstance(error, InvalidInstruction):
+        return "invalid opcode"
+    return str(error)
+
+
+def _revert_error(exc):
+    # eth-tester decodes Error(string) for us, brownie wants it back as revert data
+    reason = exc.args[0] if exc.args else ""
+    if isinstance(reason, bytes):
+        return {"code": -32000, "message": "VM Exception while processing transaction: revert", "data": "0x" + reason.hex()}
+    if reason.startswith(("b'", 'b"')):
+        # bare revert or require without a message, eth-tester gives us the repr of the empty data
+        reason = ""
+    if not reason:
+        return {"code": -32000, "message": "VM Exception while processing transaction: revert", "data": "0x"}
+    encoded = reason.encode()
+    data = (
+        ERROR_SELECTOR
+        + (32).to_bytes(32, "big").hex()
+        + len(encoded).to_bytes(32, "big").hex()
+        + encoded.ljust((len(encoded) + 31) // 32 * 32, b"\0").hex()
+    )
+    return {"code": -32000, "message": f"VM Exception while processing transaction: revert {reason}", "data": "0x" + data}
+
+
+class _Backend(PyEVMBackend):
+    """
+    A PyEVMBackend that remembers what each transaction returned, which eth-tester throws
+    away. Reverting to a snapshot swaps in a new chain object, so every chain gets hooked.
+    """
+
+    @property
+    def chain(self):
+        return self._chain
+
+    @chain.setter
+    def chain(self, chain):
+        outputs = self.__dict__.setdefault("outputs", {})
+        apply_transaction = chain.apply_transaction
+
+        def apply_and_keep(transaction):
+            block, receipt, computation = apply_transaction(transaction)
+            error = _error_kind(computation.error) if computation.is_error else None
+            outputs["0x" + transaction.hash.hex()] = ("0x" + computation.output.hex(), error)
+            return block, receipt, computation
+
+        chain.apply_transaction = apply_and_keep
+        self._chain = chain
+
+
+class Node:
+    def __init__(self, code=None):
+        self.lock = threading.RLock()
+        self.methods = {
+            "web3_clientVersion": lambda: CLIENT_VERSION,
+            "net_version": lambda: str(self.chain_id),
+            "net_listening": lambda: True,
+            "eth_chainId": lambda: hex(self.chain_id),
+            "eth_gasPrice": lambda: "0x0",
+            "eth_accounts": self.accounts,
+            "eth_blockNumber": self.block_number,
+            "eth_getBlockByNumber": self.get_block_by_number,
+            "eth_getBlockByHash": self.get_block_by_hash,
+            "eth_getBalance": self.get_balance,
+            "eth_getCode": self.get_code,
+            "eth_getStorageAt": self.get_storage_at,
+            "eth_getTransactionCount": self.get_transaction_count,
+            "eth_call": self.call,
+            "eth_estimateGas": self.estimate_gas,
+            "eth_sendTransaction": self.send_transaction,
+            "eth_sendRawTransaction": self.send_raw_transaction,
+            "eth_getTransactionByHash": self.get_transaction,
+            "eth_getTransactionReceipt": self.get_receipt,
+            "eth_getLogs": self.get_logs,
+            "eth_newFilter": self.new_filter,
+            "eth_newBlockFilter": self.new_block_filter,
+            "eth_getFilterChanges": self.get_filter_changes,
+            "eth_getFilterLogs": self.get_filter_logs,
+            "eth_uninstallFilter": self.uninstall_filter,
+            "evm_snapshot": self.snapshot,
+            "evm_revert": self.revert,
+            "evm_increaseTime": self.increase_time,
+            "evm_mine": self.mine,
+            "evm_unlockUnknownAccount": self.unlock_account,
+            "debug_traceTransaction": self.trace_transaction,
+        }
+        self.reset(code)
+
+    def reset(self, code=None):
+        """
+        A fresh chain at block 0 with the usual eth-tester accounts. code is
+        {address: runtime bytecode} to have in place from genesis.
+        """
+        state = PyEVMBackend._generate_genesis_state()
+        for address, bytecode in (code or {}).items():
+            state[to_canonical_address(address)] = {
+                "balance": 0,
+                "nonce": 0,
+                "code": to_bytes(hexstr=bytecode),
+                "storage": {},
+            }
+        params = PyEVMBackend._generate_genesis_params(overrides={"gas_limit": GAS_LIMIT})
+        # berlin, so brownie's zero gas price goes through like it does on ganache
+        params.pop("base_fee_per_gas", None)
+        with self.lock:
+            backend = _Backend(
+                genesis_parameters=params,
+                genesis_state=state,
+                vm_configuration=((0, BerlinVM),),
+            )
+            self.tester = EthereumTester(backend=backend)
+            self.chain_id = backend.chain.chain_id
+            self.time_offset = 0
+            self.outputs = backend.outputs
+            self.code = dict(code or {})
+            # everything that moved the chain, in order, so replay() can build it again elsewhere
+            self.history = []
+            self.snapshots = {}
+
+    def rpc(self, request):
+        """
+        One json-rpc request in, one json-rpc response out, same shapes as over http.
+        """
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        handler = self.methods.get(request["method"])
+        if handler is None:
+            response["error"] = {"code": -32601, "message": f"{request['method']} isn't supported in process"}
+            return response
+        with self.lock:
+            try:
+                response["result"] = handler(*request.get("params", []))
+            except TransactionFailed as exc:
+                response["error"] = _revert_error(exc)
+            except _SendFailed as exc:
+                response["error"] = exc.error
+            except (ValidationError, EVMValidationError, SnapshotNotFound, ValueError) as exc:
+                # py-evm refusing a transaction (can't afford the gas, bad nonce) is its own ValidationError
+                response["error"] = {"code": -32000, "message": str(exc)}
+            except TypeError as exc:
+                # wrong number of params
+                response["error"] = {"code": -32602, "message": str(exc)}
+        return response
+
+    # ---- chain
+
+    def accounts(self):
+        return list(self.tester.get_accounts())
+
+    def block_number(self):
+        return hex(self.tester.get_block_by_number("latest")["number"])
+
+    def get_block_by_number(self, block, full=False):
+        try:
+            return self._block_out(self.tester.get_block_by_number(_block_id(block), full))
+        except BlockNotFound:
+            return None
+
+    def get_block_by_hash(self, block_hash, full=False):
+        try:
+            return self._block_out(self.tester.get_block_by_hash(block_hash, full))
+        except BlockNotFound:
+            return None
+
+    def _block_out(self, block):
+        transactions = block["transactions"]
+        block = _out(block)
+        if transactions and isinstance(transactions[0], dict):
+            block["transactions"] = [_tx_out(tx) for tx in transactions]
+        block["logsBloom"] = "0x" + int(block["logsBloom"], 16).to_bytes(256, "big").hex()
+        return block
+
+    def get_balance(self, address, block="latest"):
+        return hex(self.tester.get_balance(address, _block_id(block)))
+
+    def get_code(self, address, block="latest"):
+        return self.tester.get_code(address, _block_id(block))
+
+    def get_storage_at(self, address, slot, block="latest"):
+        return self.tester.get_storage_at(address, int(slot, 16), _block_id(block))
+
+    def get_transaction_count(self, address, block="latest"):
+        return hex(self.tester.get_nonce(address, _block_id(block)))
+
+    # ---- transactions
+
+    def _gas_limit(self):
+        return self.tester.get_block_by_number("latest")["gas_limit"]
+
+    def call(self, tx, block="latest"):
+        return self.tester.call(_tx_in(tx, self._gas_limit()), _block_id(block))
+
+    def estimate_gas(self, tx, block=None):
+        return hex(self.tester.estimate_gas(_tx_in(tx, self._gas_limit())))
+
+    def send_transaction(self, tx):
+        self.unlock_account(tx.get("from", ZERO_ADDRESS))
+        txid = self.tester.send_transaction(_tx_in(tx, self._gas_limit()))
+        self.history.append(("eth_sendTransaction", [tx]))
+        return self._sent(txid)
+
+    def send_raw_transaction(self, raw):
+        txid = self.tester.send_raw_transaction(raw)
+        self.history.append(("eth_sendRawTransaction", [raw]))
+        return self._sent(txid)
+
+    def _sent(self, txid):
+        output, error = self.outputs.get(txid, ("0x", None))
+        if error is not None:
+            raise _SendFailed(txid, error, output)
+        return txid
+
+    def trace_transaction(self, txid, options=None):
+        if txid not in self.outputs:
+            raise ValueError(f"unknown transaction {txid}")
+        output, error = self.outputs[txid]
+        receipt = self.tester.get_transaction_receipt(txid)
+        return {"gas": hex(receipt["gas_used"]), "failed": error is not None, "returnValue": output, "structLogs": []}
+
+    def get_transaction(self, txid):
+        try:
+            return _tx_out(self.tester.get_transaction_by_hash(txid))
+        except TransactionNotFound:
+            return None
+
+    def get_receipt(self, txid):
+        try:
+            receipt = self.tester.get_transaction_receipt(txid)
+        except TransactionNotFound:
+            return None
+        if receipt is None or receipt["block_number"] is None:
+            return None
+        return _out(receipt)
+
+    def get_logs(self, params):
+        filter_id = self._log_filter(params)
+        try:
+            logs = self.tester.get_all_filter_logs(filter_id)
+        finally:
+            self.tester.delete_filter(filter_id)
+        return [_out(log) for log in logs]
+
+    def _log_filter(self, params, open_ended=False):
+        latest = self.tester.get_block_by_number("latest")["number"]
+        bounds = [params.get("fromBlock", "latest"), params.get("toBlock", "latest")]
+        bounds = [latest if b in ("latest", "pending") else 0 if b == "earliest" else int(b, 16) for b in bounds]
+        if open_ended and params.get("toBlock", "latest") in ("latest", "pending"):
+            # an installed filter up to "latest" keeps picking up new blocks
+            bounds[1] = None
+        return self.tester.create_log_filter(
+            from_block=bounds[0],
+            to_block=bounds[1],
+            address=params.get("address"),
+            topics=params.get("topics"),
+        )
+
+    def new_filter(self, params):
+        filter_id = self._log_filter(params, open_ended=True)
+        if params.get("fromBlock", "latest") in ("latest", "pending"):
+            # like a real node, "latest" here means whatever gets mined from now on
+            self.tester.get_only_filter_changes(filter_id)
+        return hex(filter_id)
+
+    def new_block_filter(self):
+        return hex(self.tester.create_block_filter())
+
+    def get_filter_changes(self, filter_id):
+        return [_out(item) for item in self.tester.get_only_filter_changes(int(filter_id, 16))]
+
+    def get_filter_logs(self, filter_id):
+        return [_out(log) for log in self.tester.get_all_filter_logs(int(filter_id, 16))]
+
+    def uninstall_filter(self, filter_id):
+        self.tester.delete_filter(int(filter_id, 16))
+        return True
+
+    # ---- ganache's extras
+
+    def snapshot(self):
+        snapshot_id = self.tester.take_snapshot()
+        self.snapshots[snapshot_id] = len(self.history)
+        return hex(snapshot_id)
+
+    def revert(self, snapshot_id):
+        snapshot_id = int(snapshot_id, 16) if isinstance(snapshot_id, str) else snapshot_id
+        self.tester.revert_to_snapshot(snapshot_id)
+        del self.history[self.snapshots[snapshot_id]:]
+        return True
+
+    def _pending_timestamp(self):
+        return self.tester.get_block_by_number("pending")["timestamp"]
+
+    def increase_time(self, seconds):
+        seconds = int(seconds, 16) if isinstance(seconds, str) else seconds
+        # the next block gets the new time, and every block after builds on it
+        self.tester.time_travel(self._pending_timestamp() + seconds)
+        self.time_offset += seconds
+        self.history.append(("evm_increaseTime", [seconds]))
+        return self.time_offset
+
+    def mine(self, timestamp=None):
+        if timestamp is not None:
+            timestamp = int(timestamp, 16) if isinstance(timestamp, str) else timestamp
+            self.tester.time_travel(max(timestamp, self._pending_timestamp()))
+        self.tester.mine_blocks(1)
+        self.history.append(("evm_mine", [] if timestamp is None else [timestamp]))
+        return "0x0"
+
+    def unlock_account(self, address):
+        if address.lower() not in {account.lower() for account in self.tester.get_accounts()}:
+            raise ValueError(f"no key for {address}, the in-process node can only send from its own accounts")
+        return True
+
+
+class Provider(JSONBaseProvider):
+    """
+    A web3 provider that hands requests straight to a Node, no http in between.
+    """
+
+    def __init__(self, node):
+        super().__init__()
+        self.node = node
+
+    def make_request(self, method, params):
+        # through json and back, so params look exactly like they would on the wire
+        request = json.loads(self.encode_rpc_request(method, params))
+        return self.node.rpc(request)
+
+    def isConnected(self):
+        return True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real node
+    # headers and body go out as two writes, without this every reply sits out a delayed ack
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if isinstance(body, list):
+            response = [self.server.node.rpc(request) for request in body]
+        else:
+            response = self.server.node.rpc(body)
+        data = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(node, host=HOST, port=PORT):
+    """
+    Serve node over http from a daemon thread, for brownie to connect to and for
+    anything else that wants an endpoint_uri. Returns the server.
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.node = node
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def ganache_command(node, executable, port):
+    """
+    The command line for a ganache that replay() can rebuild node's chain on: the same keys
+    and starting balances, berlin and a zero gas price so brownie's transactions go through
+    unchanged, and the same chain id so raw transactions do too.
+    """
+    balance = next(iter(PyEVMBackend._generate_genesis_state().values()))["balance"]
+    command = [
+        executable,
+        "--server.port", str(port),
+        "--chain.hardfork", "berlin",
+        "--chain.chainId", str(node.chain_id),
+        "--miner.defaultGasPrice", "0",
+        "--miner.blockGasLimit", str(GAS_LIMIT),
+        "--logging.quiet",
+    ]
+    for key in node.tester.backend.account_keys:
+        command += ["--wallet.accounts", f"{key.to_hex()},{balance}"]
+    return command
+
+
+def replay(node, endpoint):
+    """
+    Build node's chain again on the node at endpoint: the genesis code first, then every
+    transaction and clock move since, in order. The other end has to start out like a fresh
+    Node, with the same keys and balances (see ganache_command), for the addresses to come
+    out the same. Reverted transactions go too, they still use up a nonce. Block times follow
+    the other end's clock, so they come out close but not identical.
+    """
+    calls = [("eth_getCode", [address, "latest"]) for address in node.code]
+    present = _send(endpoint, calls)
+    # evm_setAccountCode is ganache's, a fresh Node already has the code from reset()
+    calls = [
+        ("evm_setAccountCode", [address, code])
+        for (address, code), result in zip(node.code.items(), present)
+        if (result.get("result") or "0x").lower() != code.lower()
+    ]
+    for method, params in calls + list(node.history):
+        response = _send(endpoint, [(method, params)])[0]
+        if "error" in response and not method.startswith("eth_send"):
+            raise ValueError(f"replaying {method} failed: {response['error']}")
+
+
+def _send(endpoint, calls):
+    payload = [{"jsonrpc": "2.0", "id": i, "method": method, "params": params} for i, (method, params) in enumerate(calls)]
+    request = urllib.request.Request(endpoint, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return sorted(json.load(response), key=lambda r: r["id"])
+
+
+def start(host=HOST, port=PORT):
+    """
+    The node tests/conftest.py starts for INPROCESS_EVM runs, served on the development
+    network's port before brownie connects.
+    """
+    global NODE
+    if NODE is None:
+        NODE = Node()
+        serve(NODE, host, port)
+    return NODE
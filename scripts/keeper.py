@@ -0,0 +1,270 @@
+"""
+Keeper helpers that dry run a harvest before we pay for it.
+
+    brownie run keeper main 0xStrategy [0xStrategy ...] --network ftm-main
+
+Each harvest is first sent as an eth_call from the keeper against the pending block, so
+reverts (health check, slippage guards, a paused depositer) cost us nothing. eth_call
+doesn't give us logs, so the Harvested numbers are predicted with the same maths as
+Strategy.prepareReturn and the health check is asked directly what it thinks of them.
+We only send when the call goes through and the profit is worth MIN_PROFIT_MULTIPLE
+times the gas, unless we're told to force it (FORCE_HARVEST=1) or the strategy sells its
+rewards inline, which the prediction can't see. main queues every harvest
+through tx_pipeline so they go out back to back, journaled in $KEEPER_JOURNAL.
+
+When the strategies have a MultiHarvester as keeper ($MULTI_HARVESTER) we can't harvest
+them ourselves any more. The dry runs are sent from the helper instead and everything
+worth it goes out as one harvestDue (harvestAll when forced).
+"""
+import json
+import os
+from collections import namedtuple
+
+from brownie import Contract, MultiHarvester, Strategy, accounts, web3
+from brownie.exceptions import VirtualMachineError
+
+from scripts.ops_cli import BUNDLE
+from scripts.tx_pipeline import Submitter
+
+try:
+    from web3.exceptions import Web3RPCError
+
+    RPC_ERRORS = (VirtualMachineError, ValueError, Web3RPCError)
+except ImportError:  # before web3 v7 a node's error comes back as ValueError
+    RPC_ERRORS = (VirtualMachineError, ValueError)
+
+# profit has to cover the gas this many times over, override with $MIN_PROFIT_MULTIPLE
+MIN_PROFIT_MULTIPLE = 3
+
+# per strategy on top of its own harvest in a batch: the trigger check, the call and the event
+BATCH_OVERHEAD = 30_000
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+HEALTH_CHECK_ABI = [
+    {
+        "inputs": [
+            {"name": "_strategy", "type": "address"},
+            {"name": "profit", "type": "uint256"},
+            {"name": "loss", "type": "uint256"},
+            {"name": "debtPayment", "type": "uint256"},
+            {"name": "debtOutstanding", "type": "uint256"},
+            {"name": "totalDebt", "type": "uint256"},
+        ],
+        "name": "check",
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function",
+    }
+]
+
+Preflight = namedtuple(
+    "Preflight",
+    [
+        "ok",  # the eth_call went through
+        "reason",  # revert message if it didn't
+        "profit",
+        "loss",
+        "debt_payment",
+        "debt_outstanding",
+        "health_ok",  # what the health check says about the predicted report
+        "gas",
+        "gas_cost",  # in wei, same units as want since want is wftm
+        "sells_rewards",  # the harvest sells rewards inline, so profit is short by whatever they fetch
+    ],
+)
+
+
+def predict_report(assets, total_debt, debt_outstanding, realise_losses):
+    """
+    (profit, loss, debtPayment) exactly as Strategy.prepareReturn works them out, assuming
+    liquidatePosition frees everything asked of it. Rewards are claimed but not counted in
+    estimatedTotalAssets, so reading the views first gives the same answer, unless the
+    strategy sells them during the harvest (sellRewardsOnHarvest with no trade factory).
+    Then the real profit is higher by the sale, which we don't try to price here.
+    """
+    if assets >= total_debt:
+        return assets - total_debt, 0, debt_outstanding
+    if not realise_losses:
+        return 0, 0, 0
+    loss = total_debt - assets
+    return 0, loss, max(debt_outstanding - loss, 0)
+
+
+def _vault(strategy):
+    with open(BUNDLE) as fp:
+        abi = json.load(fp)["Vault"]
+    return Contract.from_abi("Vault", strategy.vault(), abi)
+
+
+def preflight_harvest(strategy, keeper, block="pending", gas_price=None, harvester=None):
+    # with a MultiHarvester as keeper the harvest comes from it, not from us
+    sender = str(harvester or keeper)
+    vault = _vault(strategy)
+    total_debt = vault.strategies(strategy, block_identifier=block).dict()["totalDebt"]
+    debt_outstanding = vault.debtOutstanding(strategy, block_identifier=block)
+    profit, loss, debt_payment = predict_report(
+        strategy.estimatedTotalAssets(block_identifier=block),
+        total_debt,
+        debt_outstanding,
+        strategy.realiseLosses(block_identifier=block),
+    )
+
+    health_ok = True
+    health_check = strategy.healthCheck(block_identifier=block)
+    if strategy.doHealthCheck(block_identifier=block) and health_check != ZERO_ADDRESS:
+        checker = Contract.from_abi("HealthCheck", health_check, HEALTH_CHECK_ABI)
+        health_ok = checker.check(
+            strategy,
+            profit,
+            loss,
+            debt_payment,
+            debt_outstanding,
+            total_debt,
+            block_identifier=block,
+        )
+
+    # the prediction can't see everything (slippage guards, depositer hiccups), this can
+    ok, reason, gas = True, None, 0
+    try:
+        strategy.harvest.call({"from": sender}, block_identifier=block)
+        # against the same block as everything above, brownie's estimate_gas only does latest
+        gas = web3.eth.estimate_gas(
+            {"from": sender, "to": strategy.address, "data": strategy.harvest.encode_input()}, block
+        )
+    except RPC_ERRORS as e:
+        ok, reason = False, getattr(e, "revert_msg", None) or str(e)
+
+    if gas_price is None:
+        gas_price = web3.eth.gas_price
+    # same condition prepareReturn sells on
+    sells_rewards = strategy.sellRewardsOnHarvest(block_identifier=block) and not strategy.tradesEnabled(
+        block_identifier=block
+    )
+    return Preflight(
+        ok,
+        reason,
+        profit,
+        loss,
+        debt_payment,
+        debt_outstanding,
+        health_ok,
+        gas,
+        gas * gas_price,
+        sells_rewards,
+    )
+
+
+def worth_sending(preflight, min_profit_multiple=MIN_PROFIT_MULTIPLE, forced=False):
+    if not preflight.ok or not preflight.health_ok:
+        return False
+    # a forced harvest is someone asking for it on purpose, gas be damned. and when the
+    # harvest sells rewards our profit misses them, so the gas check would only hold it back
+    if forced or preflight.sells_rewards:
+        return True
+    return preflight.profit > preflight.gas_cost * min_profit_multiple
+
+
+def harvest_if_worth_it(
+    strategy,
+    keeper,
+    min_profit_multiple=MIN_PROFIT_MULTIPLE,
+    gas_price=None,
+    forced=False,
+    submitter=None,
+):
+    """
+    Returns (preflight, tx). tx is None when we decided not to send. With a
+    tx_pipeline.Submitter the harvest is queued instead and tx is its nonce.
+    """
+    preflight = preflight_harvest(strategy, keeper, gas_price=gas_price)
+    if not worth_sending(preflight, min_profit_multiple, forced):
+        return preflight, None
+
+    if submitter is not None:
+        gas_limit = int(preflight.gas * 1.2) if preflight.gas else None
+        nonce = submitter.submit(strategy.harvest, label=strategy.name(), gas_limit=gas_limit, gas_price=gas_price)
+        return preflight, nonce
+
+    params = {"from": keeper}
+    if gas_price is not None:
+        params["gas_price"] = gas_price
+    if preflight.gas:
+        # estimate against pending can be a touch low if state moves under us
+        params["gas_limit"] = int(preflight.gas * 1.2)
+    return preflight, strategy.harvest(params)
+
+
+def harvest_due(
+    harvester,
+    strategies,
+    keeper,
+    min_profit_multiple=MIN_PROFIT_MULTIPLE,
+    gas_price=None,
+    forced=False,
+    submitter=None,
+):
+    """
+    Dry runs every strategy as the helper and sends the ones worth it as a single
+    harvestDue, or harvestAll when forced. Returns ({strategy: preflight}, tx), tx is
+    None when nothing was worth sending, or the nonce when a submitter queued it.
+    """
+    preflights = {s: preflight_harvest(s, keeper, gas_price=gas_price, harvester=harvester) for s in strategies}
+    batch = [s for s, p in preflights.items() if worth_sending(p, min_profit_multiple, forced)]
+    if not batch:
+        return preflights, None
+
+    if forced:
+        method, args = harvester.harvestAll, [batch]
+    else:
+        call_cost = max(preflights[s].gas_cost for s in batch)
+        method, args = harvester.harvestDue, [batch, call_cost]
+    # estimating the batch itself is no good, it goes through even when a harvest inside runs
+    # out of gas. so it's what each harvest needs on its own, with room for the 1/64 each call keeps back
+    gas_limit = int(sum(preflights[s].gas for s in batch) * 1.2 * 64 / 63) + BATCH_OVERHEAD * len(batch)
+
+    if submitter is not None:
+        label = f"harvest {len(batch)} strategies"
+        return preflights, submitter.submit(method, *args, label=label, gas_limit=gas_limit, gas_price=gas_price)
+    params = {"from": keeper, "gas_limit": gas_limit}
+    if gas_price is not None:
+        params["gas_price"] = gas_price
+    return preflights, method(*args, params)
+
+
+def _report(strategy, verdict, preflight):
+    print(
+        f"{strategy.name()}: {verdict} ok={preflight.ok} reason={preflight.reason} "
+        f"profit={preflight.profit / 1e18:.4f} loss={preflight.loss / 1e18:.4f} "
+        f"health_ok={preflight.health_ok} gas_cost={preflight.gas_cost / 1e18:.4f}"
+    )
+
+
+def main(*strategies):
+    keeper = accounts.load(os.environ["KEEPER_ACCOUNT"], os.environ.get("KEEPER_PASSWORD"))
+    multiple = float(os.environ.get("MIN_PROFIT_MULTIPLE", MIN_PROFIT_MULTIPLE))
+    forced = os.environ.get("FORCE_HARVEST") == "1"
+    # everything goes out back to back, then we wait on all of it at once
+    submitter = Submitter(keeper)
+    if os.environ.get("MULTI_HARVESTER"):
+        harvester = MultiHarvester.at(os.environ["MULTI_HARVESTER"])
+        preflights, nonce = harvest_due(
+            harvester, [Strategy.at(a) for a in strategies], keeper, multiple, forced=forced, submitter=submitter
+        )
+        for strategy, preflight in preflights.items():
+            batched = nonce is not None and worth_sending(preflight, multiple, forced)
+            _report(strategy, f"batched with nonce {nonce}" if batched else "skipped", preflight)
+    else:
+        for address in strategies:
+            # one strategy we can't read or send for doesn't hold up the rest
+            try:
+                strategy = Strategy.at(address)
+                preflight, nonce = harvest_if_worth_it(strategy, keeper, multiple, forced=forced, submitter=submitter)
+            except Exception as e:
+                print(f"{address}: failed {e!r}")
+                continue
+            _report(strategy, f"sent with nonce {nonce}" if nonce is not None else "skipped", preflight)
+    for nonce, tx in submitter.wait().items():
+        if tx["status"] != "confirmed":
+            print(f"nonce {nonce} {tx['label']}: {tx['status']} {tx['txid'] or tx['hashes'][-1]}")
+    print(submitter.summary())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Lightweight ops CLI for our strategies. It doesn't import brownie or touch the project,
+it only needs eth_abi, eth_utils and the ABI bundle in scripts/abi.
+
+    python scripts/ops_cli.py state 0xStrategy
+    python scripts/ops_cli.py triggers 0xStrategy --call-cost 50000000000000000
+    python scripts/ops_cli.py preview 1000e18 0xStrategy 0xOtherStrategy
+    python scripts/ops_cli.py encode setLpSlippage 9990
+    python scripts/ops_cli.py encode "setLpSlippage(uint256,bool)" 9900 true
+
+The RPC endpoint comes from --rpc, then $WEB3_PROVIDER_URI, then the public fantom rpc.
+All reads for a command go out as a single JSON-RPC batch. Regenerate the bundle with
+`brownie run build_abi_bundle` after changing the contracts.
+"""
+import argparse
+import json
+import os
+import sys
+import urllib.request
+from decimal import Decimal
+from pathlib import Path
+
+from eth_utils import keccak, to_checksum_address
+
+try:
+    from eth_abi import encode as _encode, decode as _decode
+except ImportError:  # eth-abi < 4, as pinned by brownie
+    from eth_abi import encode_abi as _encode, decode_abi as _decode
+
+BUNDLE = Path(__file__).parent / "abi" / "abi_bundle.json"
+DEFAULT_RPC = "https://rpc.ftm.tools"
+
+STATE_VIEWS = [
+    "name",
+    "vault",
+    "keeper",
+    "estimatedTotalAssets",
+    "balanceOfWant",
+    "balanceOfAnyWftm",
+    "balanceOfLPStaked",
+    "idleFunds",
+    "lpSlippage",
+    "maxDepositBps",
+    "bufferBps",
+    "minHarvestCredit",
+    "tradeFactory",
+    "tradesEnabled",
+    "sellRewardsOnHarvest",
+    "rewardSellSlippage",
+    "realiseLosses",
+    "emergencyExit",
+    "doHealthCheck",
+    "lpPriceOk",
+]
+
+
+def _type(param):
+    if param["type"].startswith("tuple"):
+        inner = ",".join(_type(c) for c in param["components"])
+        return f"({inner}){param['type'][len('tuple'):]}"
+    return param["type"]
+
+
+def signature(entry):
+    return f"{entry['name']}({','.join(_type(i) for i in entry['inputs'])})"
+
+
+class Abi:
+    def __init__(self, entries):
+        self.functions = {}
+        for entry in entries:
+            if entry["type"] == "function":
+                self.functions.setdefault(entry["name"], []).append(entry)
+
+    def function(self, name, nargs=None):
+        # accepts a bare name, or a full signature to pick an overload
+        if "(" in name:
+            for entry in self.functions.get(name.split("(")[0], []):
+                if signature(entry) == name.replace(" ", ""):
+                    return entry
+            raise KeyError(name)
+        matches = self.functions[name]
+        if nargs is not None:
+            matches = [e for e in matches if len(e["inputs"]) == nargs]
+        if len(matches) != 1:
+            raise KeyError(f"{name} is ambiguous, pass the full signature")
+        return matches[0]
+
+
+def load_bundle(path=BUNDLE):
+    with open(path) as fp:
+        return {name: Abi(entries) for name, entries in json.load(fp).items()}
+
+
+def parse_arg(typ, value):
+    if typ.startswith(("uint", "int")):
+        if isinstance(value, int):
+            return value
+        return int(Decimal(value)) if "e" in value.lower() or "." in value else int(value, 0)
+    if typ == "bool":
+        return value if isinstance(value, bool) else value.lower() in ("1", "true", "yes")
+    if typ == "address":
+        return to_checksum_address(value)
+    return value
+
+
+def encode_call(entry, args):
+    types = [_type(i) for i in entry["inputs"]]
+    values = [parse_arg(t, a) for t, a in zip(types, args)]
+    return "0x" + (keccak(text=signature(entry))[:4] + _encode(types, values)).hex()
+
+
+def decode_output(entry, data):
+    types = [_type(o) for o in entry["outputs"]]
+    values = _decode(types, bytes.fromhex(data[2:]))
+    return values[0] if len(values) == 1 else values
+
+
+class Rpc:
+    def __init__(self, url):
+        self.url = url
+
+    def batch(self, calls, block="latest"):
+        # calls are (address, calldata), returns raw hex results in the same order
+        return self.send([("eth_call", [{"to": to, "data": data}, block]) for to, data in calls])
+
+    def send(self, requests):
+        # requests are (method, params), any mix of methods, all in one http round trip
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(requests)
+        ]
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            results = json.load(response)
+        if isinstance(results, dict):
+            results = [results]
+        results = sorted(results, key=lambda r: r["id"])
+        return [r.get("result") if "error" not in r else None for r in results]
+
+
+def read(rpc, calls):
+    # calls are (address, abi entry, args), failed calls come back as None
+    raw = rpc.batch([(to, encode_call(entry, args)) for to, entry, args in calls])
+    return [
+        decode_output(entry, data) if data not in (None, "0x") else None
+        for (_, entry, _), data in zip(calls, raw)
+    ]
+
+
+def cmd_state(bundle, rpc, args):
+    strategy = to_checksum_address(args.strategy)
+    abi = bundle["Strategy"]
+    calls = [(strategy, abi.function(name, 0), []) for name in STATE_VIEWS]
+    values = dict(zip(STATE_VIEWS, read(rpc, calls)))
+
+    # the vault also has no-argument creditAvailable and debtOutstanding for msg.sender
+    vault_abi = bundle["Vault"]
+    vault = values["vault"]
+    params, credit, outstanding = read(
+        rpc,
+        [
+            (vault, vault_abi.function("strategies", 1), [strategy]),
+            (vault, vault_abi.function("creditAvailable", 1), [strategy]),
+            (vault, vault_abi.function("debtOutstanding", 1), [strategy]),
+        ],
+    )
+    if params is not None:
+        fields = [c["name"] for c in vault_abi.function("strategies", 1)["outputs"][0]["components"]]
+        values["vaultParams"] = dict(zip(fields, params))
+    values["creditAvailable"] = credit
+    values["debtOutstanding"] = outstanding
+    return values
+
+
+def cmd_triggers(bundle, rpc, args):
+    strategy = to_checksum_address(args.strategy)
+    abi = bundle["Strategy"]
+    harvest, tend = read(
+        rpc,
+        [
+            (strategy, abi.function("harvestTrigger", 1), [args.call_cost]),
+            (strategy, abi.function("tendTrigger", 1), [args.call_cost]),
+        ],
+    )
+    return {"harvestTrigger": harvest, "tendTrigger": tend}
+
+
+def cmd_preview(bundle, rpc, args):
+    # what withdrawing `amount` would unwind from each strategy, every strategy in the same batch
+    strategies = [to_checksum_address(s) for s in args.strategies]
+    entry = bundle["Strategy"].function("previewLiquidate", 1)
+    fields = [o["name"] for o in entry["outputs"]]
+    results = read(rpc, [(strategy, entry, [args.amount]) for strategy in strategies])
+    return {
+        strategy: dict(zip(fields, result)) if result is not None else None
+        for strategy, result in zip(strategies, results)
+    }
+
+
+def cmd_encode(bundle, rpc, args):
+    abi = bundle[args.contract]
+    entry = abi.function(args.function, None if "(" in args.function else len(args.args))
+    return {"signature": signature(entry), "calldata": encode_call(entry, args.args)}
+
+
+def parser():
+    p = argparse.ArgumentParser(description="strategy ops without brownie")
+    p.add_argument("--rpc", default=os.environ.get("WEB3_PROVIDER_URI", DEFAULT_RPC))
+    sub = p.add_subparsers(dest="command", required=True)
+
+    state = sub.add_parser("state", help="strategy and vault accounting in one batch")
+    state.add_argument("strategy")
+    state.set_defaults(fn=cmd_state)
+
+    triggers = sub.add_parser("triggers", help="harvest and tend triggers")
+    triggers.add_argument("strategy")
+    triggers.add_argument("--call-cost", type=int, default=0, help="call cost in wei")
+    triggers.set_defaults(fn=cmd_triggers)
+
+    preview = sub.add_parser("preview", help="what a withdrawal would unwind, from current reserves")
+    preview.add_argument("amount", help="wftm the vault would ask each strategy for")
+    preview.add_argument("strategies", nargs="+")
+    preview.set_defaults(fn=cmd_preview)
+
+    encode = sub.add_parser("encode", help="calldata for a setter, no rpc needed")
+    encode.add_argument("function")
+    encode.add_argument("args", nargs="*")
+    encode.add_argument("--contract", default="Strategy", choices=["Strategy", "Vault", "ILpDepositer"])
+    encode.set_defaults(fn=cmd_encode)
+    return p
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    result = args.fn(load_bundle(), Rpc(args.rpc), args)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
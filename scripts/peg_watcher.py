@@ -0,0 +1,197 @@
+"""
+Watch the wftm/anyWFTM pool and put idle funds back to work as soon as the peg is back.
+
+    brownie run peg_watcher main 0xStrategy --network ftm-main
+    brownie run peg_watcher backtest [path/to/reserves.csv]
+    brownie run peg_watcher backtest data/pair.hist 9995 3600 0 41000000 41500000
+
+When lpPriceOk() fails adjustPosition quietly leaves everything idle, and without this
+it sits there until the next scheduled harvest. Every block we read the pair reserves
+(one call, no router), run the same 1e18 round trip as lpPriceOk() through our local
+stable pool model, and the first block it passes with idle funds waiting we either tend
+(keeper) or setForceHarvestTriggerOnce (anyone emergency authorized, MODE=force). If the
+strategy's keeper is a MultiHarvester ($MULTI_HARVESTER) the tend goes through its tendDue.
+
+The backtest replays a reserves history (block,reserve0,reserve1 csv, or a block_history
+directory sliced to a block range) or a seeded synthetic depeg if no file is given, and
+compares how long credit from aborted harvests sits idle waiting on the next harvest
+against waiting on the watcher.
+"""
+import csv
+import os
+import random
+import time
+
+from brownie import Contract, MultiHarvester, Strategy, accounts, chain
+
+from scripts.solidly_math import get_amount_out
+
+DENOMINATOR = 10_000
+ONE = 10 ** 18
+
+# same threshold adjustPosition uses before it bothers depositing
+DUST = 10 ** 17
+
+PAIR_ABI = [
+    {
+        "inputs": [],
+        "name": "metadata",
+        "outputs": [
+            {"name": "dec0", "type": "uint256"},
+            {"name": "dec1", "type": "uint256"},
+            {"name": "r0", "type": "uint256"},
+            {"name": "r1", "type": "uint256"},
+            {"name": "st", "type": "bool"},
+            {"name": "t0", "type": "address"},
+            {"name": "t1", "type": "address"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    }
+]
+
+
+def peg_ok(r0, r1, dec0, dec1, lp_slippage, stable=True):
+    """
+    Strategy.lpPriceOk() from reserves alone. 1e18 in each direction has to come back
+    with at least lpSlippage / 10_000 of itself, which side is wftm doesn't matter.
+    """
+    minimum = ONE * lp_slippage // DENOMINATOR
+    forward = get_amount_out(ONE, True, r0, r1, dec0, dec1, stable)
+    back = get_amount_out(ONE, False, r0, r1, dec0, dec1, stable)
+    return forward >= minimum and back >= minimum
+
+
+class PegWatcher:
+    """
+    mode is "tend" (account needs to be a keeper, or one of harvester's keepers when the
+    strategy has a MultiHarvester as keeper) or "force" (emergency authorized). Each
+    block is one metadata() call and one lpSlippage(), read every time so a change by
+    governance takes effect straight away. The rest of the strategy is only read when
+    the model says the peg has come back.
+    """
+
+    def __init__(self, strategy, account, mode="tend", pair=None, harvester=None):
+        assert mode in ("tend", "force")
+        self.strategy = strategy
+        self.account = account
+        self.mode = mode
+        self.harvester = harvester
+        self.pair = pair or Contract.from_abi("Pair", strategy.lpToken(), PAIR_ABI)
+        self.was_ok = None
+        self.first_poll = True
+        self.actions = []
+
+    def idle(self):
+        # what adjustPosition would have tried to deposit
+        buffer = self.strategy.bufferTarget()
+        idle = self.strategy.idleFunds()
+        return idle - buffer if idle > buffer else 0
+
+    def poll(self):
+        (dec0, dec1, r0, r1, stable, _, _) = self.pair.metadata()
+        ok = peg_ok(r0, r1, dec0, dec1, self.strategy.lpSlippage(), stable)
+        recovered = ok and self.was_ok is False
+        self.was_ok = ok
+        # we also act on the very first poll, funds could already be stuck when we start
+        first_poll = self.first_poll
+        self.first_poll = False
+        if not ok or not (recovered or first_poll):
+            return None
+        if self.idle() <= DUST:
+            return None
+
+        if self.mode == "tend" and self.harvester is not None:
+            tx = self.harvester.tendDue([self.strategy], 0, {"from": self.account})
+        elif self.mode == "tend":
+            tx = self.strategy.tend({"from": self.account})
+        else:
+            tx = self.strategy.setForceHarvestTriggerOnce(True, {"from": self.account})
+        self.actions.append((chain.height, tx))
+        return tx
+
+    def run(self, poll_interval=1):
+        last = None
+        while True:
+            height = chain.height
+            if height != last:
+                last = height
+                tx = self.poll()
+                if tx is not None:
+                    print(f"block {height}: peg back, sent {self.mode} {tx.txid}")
+            time.sleep(poll_interval)
+
+
+def synthetic_reserves(blocks=50_000, depth=5_000_000 * ONE, seed=0):
+    """
+    A pool that spends most of its time near peg with the odd depeg that decays back.
+    Returns [(block, r0, r1)].
+    """
+    rng = random.Random(seed)
+    skew = 0.0
+    history = []
+    for block in range(blocks):
+        if rng.random() < 0.0005:
+            # someone dumps a chunk of one side into the pool
+            skew += rng.choice((-1, 1)) * rng.uniform(0.1, 0.4)
+        skew = max(min(skew * 0.999, 0.8), -0.8)  # arbs slowly pull it back
+        history.append((block, int(depth * (1 + skew)), int(depth * (1 - skew))))
+    return history
+
+
+def load_reserves(path, start_block=None, end_block=None):
+    # a block_history directory, sliced without reading the rest, or a plain csv
+    if os.path.isdir(path):
+        from scripts.block_history import History
+
+        return History(path).reserves(start_block, end_block)
+    with open(path) as fp:
+        return [
+            (int(row["block"]), int(row["reserve0"]), int(row["reserve1"]))
+            for row in csv.DictReader(fp)
+        ]
+
+
+def idle_blocks(oks, harvest_every, watcher):
+    """
+    Every harvest brings in one unit of new credit. If the guard fails it stays idle
+    until the next harvest that finds the peg ok, or with the watcher until the first
+    block the peg is ok again. oks is peg_ok per block, returns idle unit-blocks.
+    """
+    stuck = 0
+    total = 0
+    was_ok = True
+    for block, ok in enumerate(oks):
+        if block % harvest_every == 0:
+            stuck = 0 if ok else stuck + 1
+        elif watcher and ok and not was_ok:
+            stuck = 0
+        was_ok = ok
+        total += stuck
+    return total
+
+
+def backtest(path=None, lp_slippage=9995, harvest_every=3600, seed=0, start_block=None, end_block=None):
+    if path:
+        history = load_reserves(path, start_block and int(start_block), end_block and int(end_block))
+    else:
+        history = synthetic_reserves(seed=int(seed))
+    lp_slippage, harvest_every = int(lp_slippage), int(harvest_every)
+    oks = [peg_ok(r0, r1, ONE, ONE, lp_slippage) for _, r0, r1 in history]
+    baseline = idle_blocks(oks, harvest_every, False)
+    watched = idle_blocks(oks, harvest_every, True)
+
+    print(f"{len(oks)} blocks, {oks.count(False)} off peg at lpSlippage {lp_slippage}")
+    print(f"idle unit-blocks, harvests only: {baseline}")
+    print(f"idle unit-blocks, with watcher:  {watched}")
+    if baseline:
+        print(f"reduction: {100 * (baseline - watched) / baseline:.1f}%")
+    return baseline, watched
+
+
+def main(strategy_address):
+    strategy = Strategy.at(strategy_address)
+    account = accounts.load(os.environ["KEEPER_ACCOUNT"], os.environ.get("KEEPER_PASSWORD"))
+    harvester = os.environ.get("MULTI_HARVESTER")
+    harvester = MultiHarvester.at(harvester) if harvester else None
+    PegWatcher(strategy, account, os.environ.get("MODE", "tend"), harvester=harvester).run()
@@ -0,0 +1,134 @@
+from collections import OrderedDict
+
+from scripts.solidly_math import get_amount_out
+
+
+def _address(x):
+    return getattr(x, "address", x)
+
+
+class QuoteCache:
+    """
+    Block scoped LRU cache for router getAmountsOut lookups.
+
+    Entries are keyed by (router, route, amount bucket, block) and everything is
+    dropped as soon as we see a new block. If the reserves of every pair on a route
+    are known for the current block (see set_pool), misses are filled from the local
+    solidly pool model instead of the router.
+
+    block_number is an optional callable returning the latest block, e.g.
+    lambda: chain.height. Otherwise call set_block from your own block loop.
+    bucket_bits keeps that many significant bits of the amount, so nearby amounts
+    share one quote, scaled linearly. The default of None only matches exact amounts.
+    """
+
+    def __init__(self, max_entries=4096, block_number=None, bucket_bits=None):
+        self.max_entries = max_entries
+        self.block_number = block_number
+        self.bucket_bits = bucket_bits
+        self.block = None
+        self._quotes = OrderedDict()
+        self._pools = {}
+        self.hits = 0
+        self.misses = 0
+        self.model_fills = 0
+        self.rpc_calls = 0
+        self.evictions = 0
+
+    def set_block(self, block):
+        if block != self.block:
+            self.block = block
+            self._quotes.clear()
+            self._pools.clear()
+
+    def set_pool(self, token0, token1, stable, reserve0, reserve1, dec0, dec1):
+        # dec0 and dec1 are 10**decimals, the way pair.metadata() returns them
+        self._pools[(_address(token0), _address(token1), stable)] = (
+            reserve0,
+            reserve1,
+            dec0,
+            dec1,
+        )
+
+    def _bucket(self, amount):
+        if self.bucket_bits is None:
+            return amount
+        shift = max(amount.bit_length() - self.bucket_bits, 0)
+        return amount >> shift << shift
+
+    def _model(self, amount, path):
+        amounts = [amount]
+        for token_in, token_out, stable in path:
+            token_in, token_out = _address(token_in), _address(token_out)
+            if (token_in, token_out, stable) in self._pools:
+                r0, r1, dec0, dec1 = self._pools[(token_in, token_out, stable)]
+                zero_for_one = True
+            elif (token_out, token_in, stable) in self._pools:
+                r0, r1, dec0, dec1 = self._pools[(token_out, token_in, stable)]
+                zero_for_one = False
+            else:
+                return None
+            amounts.append(
+                get_amount_out(amounts[-1], zero_for_one, r0, r1, dec0, dec1, stable)
+            )
+        return amounts
+
+    def get_amounts_out(self, router, amount, path):
+        if self.block_number is not None:
+            self.set_block(self.block_number())
+
+        bucket = self._bucket(amount)
+        route = tuple((_address(f), _address(t), bool(s)) for f, t, s in path)
+        key = (_address(router), route, bucket, self.block)
+
+        if key in self._quotes:
+            self.hits += 1
+            self._quotes.move_to_end(key)
+            amounts = self._quotes[key]
+        else:
+            self.misses += 1
+            amounts = self._model(bucket, route)
+            if amounts is not None:
+                self.model_fills += 1
+            else:
+                self.rpc_calls += 1
+                amounts = list(router.getAmountsOut(bucket, path))
+            self._quotes[key] = amounts
+            if len(self._quotes) > self.max_entries:
+                self._quotes.popitem(last=False)
+                self.evictions += 1
+
+        if bucket == amount or bucket == 0:
+            return list(amounts)
+        return [a * amount // bucket for a in amounts]
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "model_fills": self.model_fills,
+            "rpc_calls": self.rpc_calls,
+            "evictions": self.evictions,
+            "entries": len(self._quotes),
+        }
+
+
+class CachedRouter:
+    """
+    Drop in for a router contract wherever only getAmountsOut is used, e.g.
+    TradePlanner(CachedRouter(solidex_router, cache), wftm).
+    """
+
+    def __init__(self, router, cache):
+        self.router = router
+        self.cache = cache
+        self.address = _address(router)
+
+    def getAmountsOut(self, amount, path):
+        return self.cache.get_amounts_out(self.router, amount, path)
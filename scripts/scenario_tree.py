@@ -0,0 +1,122 @@
+"""
+Prefix sharing executor for tests written as action sequences.
+
+    tree = ScenarioTree(rollback)
+    tree.add("half ratio, small withdraw", [deposit, harvest, half_ratio, donate, small_withdraw, harvest_day], check)
+    tree.add("half ratio, big withdraw", [deposit, harvest, half_ratio, donate, big_withdraw, harvest_day], check)
+    failures = tree.run({"vault": vault, ...})
+
+Scenarios are merged into a tree keyed on action names, so two scenarios that start with
+the same actions share those nodes. Each node is executed once. Where the tree branches
+we run each branch but the last inside rollback(), the context manager from the rollback
+fixture in tests/conftest.py, so total chain work scales with the number of distinct
+actions rather than the number of scenarios.
+
+An action is fn(ctx), where ctx is a dict of fixtures plus anything earlier actions
+stored (prev_params, donation, ...). Every branch gets its own shallow copy of ctx,
+so actions should replace values rather than mutate them. Two actions with the same
+name must do the same thing, that's what makes sharing them safe.
+"""
+import time
+from collections import namedtuple
+
+Action = namedtuple("Action", ["name", "fn"])
+
+
+class _Node:
+    def __init__(self):
+        self.children = {}  # action name -> (action, node), in the order they were added
+        self.checks = []  # (scenario name, check fn)
+
+    def scenario_names(self):
+        names = [name for name, _ in self.checks]
+        for _, child in self.children.values():
+            names += child.scenario_names()
+        return names
+
+
+class ScenarioTree:
+    def __init__(self, rollback):
+        self.rollback = rollback
+        self.root = _Node()
+        self.paths = {}  # scenario name -> tuple of action names
+        self.durations = {}  # path prefix -> seconds its last action took
+        self.check_durations = {}
+        self.snapshots = 0
+        self.elapsed = 0
+
+    def add(self, name, actions, check):
+        assert name not in self.paths, f"duplicate scenario {name}"
+        node = self.root
+        for action in actions:
+            if action.name not in node.children:
+                node.children[action.name] = (action, _Node())
+            node = node.children[action.name][1]
+        node.checks.append((name, check))
+        self.paths[name] = tuple(action.name for action in actions)
+
+    def run(self, ctx):
+        """
+        Returns {scenario name: exception} for everything that failed, empty if all passed.
+        """
+        failures = {}
+        start = time.perf_counter()
+        self._visit(self.root, ctx, (), failures)
+        self.elapsed = time.perf_counter() - start
+        return failures
+
+    def _visit(self, node, ctx, path, failures):
+        branches = [("check", name, check) for name, check in node.checks]
+        branches += [("action", action, child) for action, child in node.children.values()]
+
+        for i, (kind, item, target) in enumerate(branches):
+            # the last branch can run on the chain as it is, our caller rolls back after us
+            if i == len(branches) - 1:
+                self._run_branch(kind, item, target, ctx, path, failures)
+            else:
+                self.snapshots += 1
+                with self.rollback():
+                    self._run_branch(kind, item, target, ctx, path, failures)
+
+    def _run_branch(self, kind, item, target, ctx, path, failures):
+        branch_ctx = dict(ctx)
+        start = time.perf_counter()
+
+        if kind == "check":
+            try:
+                target(branch_ctx)
+            except Exception as e:
+                failures[item] = e
+            self.check_durations[item] = time.perf_counter() - start
+        else:
+            prefix = path + (item.name,)
+            try:
+                item.fn(branch_ctx)
+            except Exception as e:
+                # everything below a failed action fails with it
+                for name in target.scenario_names():
+                    failures[name] = e
+            else:
+                self.durations[prefix] = time.perf_counter() - start
+                self._visit(target, branch_ctx, prefix, failures)
+
+    def report(self):
+        """
+        What running every scenario from scratch would have cost, estimated from how long
+        each action and check took here, against what we actually spent.
+        """
+        serial = 0
+        serial_actions = 0
+        for name, path in self.paths.items():
+            serial_actions += len(path)
+            serial += sum(self.durations.get(path[: i + 1], 0) for i in range(len(path)))
+            serial += self.check_durations.get(name, 0)
+        return {
+            "scenarios": len(self.paths),
+            "actions_executed": len(self.durations),
+            "actions_serial": serial_actions,
+            "snapshots": self.snapshots,
+            "elapsed": self.elapsed,
+            "serial_estimate": serial,
+            "saved": serial - self.elapsed,
+        }
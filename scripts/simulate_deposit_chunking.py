@@ -0,0 +1,66 @@
+from scripts.solidly_math import get_amount_out
+
+ONE = 10 ** 18
+
+# a pool that has just been knocked off balance, and a large vault inflow arriving at the same time.
+# arbitrage pulls the pool back towards balance a little every period (one tend per period).
+RESERVES = 2_000_000 * ONE
+SKEW_BPS = 300  # pool holds 3% more anyWFTM than wftm when the inflow lands
+REVERSION_BPS = 2_500  # share of the imbalance arbed away each period
+DEPOSIT = 500_000 * ONE
+PERIODS = 48
+
+
+def any_price(w, a):
+    # marginal price of anyWFTM in wftm on the stable curve, before fees
+    probe = ONE
+    out = get_amount_out(probe, False, w, a, ONE, ONE, True)
+    return out * 10_000 / (10_000 - 1) / probe
+
+
+def simulate(max_deposit_bps):
+    """
+    Mark to market loss from minting anyWFTM 1-1 and adding it to the pool while the pool
+    prices it below 1 wftm. max_deposit_bps of None deposits everything at once, like the
+    strategy does today.
+    """
+    mid = RESERVES
+    imbalance = RESERVES * SKEW_BPS // 10_000
+    w, a = mid - imbalance // 2, mid + imbalance // 2
+    remaining = DEPOSIT
+    loss = 0.0
+    periods_to_deploy = 0
+
+    for period in range(PERIODS):
+        if remaining > 0:
+            cap = remaining if max_deposit_bps is None else (w + a) * max_deposit_bps // 10_000
+            chunk = min(remaining, cap)
+            any_needed = chunk * a // (w + a)
+            loss += any_needed * (1 - any_price(w, a))
+            # adding in ratio doesn't move the price, it just makes the pool deeper
+            w += chunk - any_needed
+            a += any_needed
+            remaining -= chunk
+            periods_to_deploy = period + 1
+
+        # arbs close part of the gap, keeping total reserves the same
+        gap = (a - w) * REVERSION_BPS // 10_000
+        w += gap // 2
+        a -= gap // 2
+
+    return loss / ONE, periods_to_deploy
+
+
+def main():
+    print(f"Deposit {DEPOSIT / ONE:,.0f} wftm into a {2 * RESERVES / ONE:,.0f} wftm pool skewed {SKEW_BPS / 100}%")
+    print(f"{'max deposit':>14} {'loss (wftm)':>14} {'periods':>8}")
+    base_loss, _ = simulate(None)
+    print(f"{'single shot':>14} {base_loss:>14.4f} {1:>8}")
+    for bps in [2_500, 1_000, 500, 250]:
+        loss, periods = simulate(bps)
+        saved = 100 * (1 - loss / base_loss) if base_loss else 0
+        print(f"{bps / 100:>13}% {loss:>14.4f} {periods:>8}   ({saved:.1f}% less loss)")
+
+
+if __name__ == "__main__":
+    main()
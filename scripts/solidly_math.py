@@ -0,0 +1,69 @@
+# integer ports of the solidly BaseV1Pair maths, so off-chain tools can quote without a router call.
+# everything rounds down exactly like the contracts do.
+
+ONE = 10 ** 18
+
+# solidly takes 0.01% of every swap, amountIn -= amountIn / 10000
+FEE_DIVISOR = 10_000
+
+
+def _k(x, y, dec0, dec1, stable):
+    if stable:
+        _x = x * ONE // dec0
+        _y = y * ONE // dec1
+        _a = (_x * _y) // ONE
+        _b = (_x * _x) // ONE + (_y * _y) // ONE
+        return _a * _b // ONE  # x3y+y3x >= k
+    return x * y  # xy >= k
+
+
+def _f(x0, y):
+    return x0 * (y * y // ONE * y // ONE) // ONE + (x0 * x0 // ONE * x0 // ONE) * y // ONE
+
+
+def _d(x0, y):
+    return 3 * x0 * (y * y // ONE) // ONE + (x0 * x0 // ONE * x0 // ONE)
+
+
+def _get_y(x0, xy, y):
+    for _ in range(255):
+        y_prev = y
+        k = _f(x0, y)
+        if k < xy:
+            dy = (xy - k) * ONE // _d(x0, y)
+            y = y + dy
+        else:
+            dy = (k - xy) * ONE // _d(x0, y)
+            y = y - dy
+        if abs(y - y_prev) <= 1:
+            return y
+    return y
+
+
+def get_amount_out(amount_in, zero_for_one, r0, r1, dec0, dec1, stable=True):
+    """
+    Output of swapping amount_in through a single pair. zero_for_one is True when
+    amount_in is token0. dec0 and dec1 are 10**decimals, as returned by pair.metadata().
+    """
+    amount_in -= amount_in // FEE_DIVISOR
+    if stable:
+        xy = _k(r0, r1, dec0, dec1, stable)
+        _r0 = r0 * ONE // dec0
+        _r1 = r1 * ONE // dec1
+        if zero_for_one:
+            reserve_a, reserve_b = _r0, _r1
+            amount_in = amount_in * ONE // dec0
+        else:
+            reserve_a, reserve_b = _r1, _r0
+            amount_in = amount_in * ONE // dec1
+        y = reserve_b - _get_y(amount_in + reserve_a, xy, reserve_b)
+        return y * (dec1 if zero_for_one else dec0) // ONE
+    reserve_a, reserve_b = (r0, r1) if zero_for_one else (r1, r0)
+    return amount_in * reserve_b // (reserve_a + amount_in)
+
+
+def quote_remove_liquidity(liquidity, r0, r1, total_supply):
+    # same as the router's quoteRemoveLiquidity, amounts are in token0, token1 order
+    if total_supply == 0:
+        return 0, 0
+    return liquidity * r0 // total_supply, liquidity * r1 // total_supply
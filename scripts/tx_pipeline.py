@@ -0,0 +1,249 @@
+"""
+Send keeper transactions back to back instead of one confirmation at a time.
+
+    submitter = Submitter(keeper)
+    for strategy in strategies:
+        submitter.submit(strategy.harvest, label=strategy.name())
+    submitter.submit(other.setLpSlippage, 9990, label="slippage")
+    submitter.wait()
+
+Nonces are handed out locally, every transaction is broadcast without waiting
+(required_confs=0) and receipts are picked up by poll(). Anything that has sat in the
+mempool for stuck_after seconds is sent again with the same nonce and calldata at bump
+times the gas price, and whichever of its hashes gets mined is the one we report.
+
+Every broadcast and every outcome is appended to a journal (json lines, fsynced), so a
+keeper that dies and comes back picks up the nonces still pending and keeps watching them
+rather than reusing or skipping nonces. A nonce only becomes ours once its broadcast has
+gone through, so a send the node refuses leaves nothing behind. If a nonce we sent gets mined under a hash that
+isn't ours (someone else used the account) the transaction is marked dropped.
+"""
+import json
+import os
+import time
+
+from brownie import web3
+from brownie.exceptions import VirtualMachineError
+from web3.exceptions import TransactionNotFound
+
+JOURNAL = os.environ.get("KEEPER_JOURNAL", "keeper_journal.jsonl")
+
+# geth wants at least 10% more to replace a pending transaction, so does ganache
+BUMP = 1.125
+STUCK_AFTER = 120  # seconds
+
+PENDING, CONFIRMED, FAILED, DROPPED = "pending", "confirmed", "failed", "dropped"
+
+
+class Submitter:
+    def __init__(
+        self,
+        account,
+        journal=JOURNAL,
+        gas_price=None,
+        stuck_after=STUCK_AFTER,
+        bump=BUMP,
+        max_gas_price=None,
+    ):
+        self.account = account
+        self.journal = journal
+        self.gas_price = gas_price  # None follows the node's gas price
+        self.stuck_after = stuck_after
+        self.bump = bump
+        self.max_gas_price = max_gas_price
+        self.txs = {}  # nonce -> what we sent and what happened to it
+        self._recover()
+
+    # ---- journal
+
+    def _log(self, **event):
+        event["account"] = self.account.address
+        with open(self.journal, "a") as fp:
+            fp.write(json.dumps(event) + "\n")
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    def _recover(self):
+        txs = {}
+        if os.path.exists(self.journal):
+            with open(self.journal) as fp:
+                for line in fp:
+                    if not line.strip():
+                        continue
+                    event = json.loads(line)
+                    if event["account"] != self.account.address:
+                        continue
+                    nonce = event["nonce"]
+                    if event["event"] == "sent":
+                        # a nonce that finished in an earlier run and got sent again is a new transaction
+                        if nonce not in txs or txs[nonce]["status"] != PENDING:
+                            txs[nonce] = _new_tx(event)
+                        tx = txs[nonce]
+                        tx["hashes"].append(event["txid"])
+                        tx["gas_price"] = event["gas_price"]
+                        tx["sent_at"] = event["time"]
+                    elif event["event"] == "done" and nonce in txs:
+                        txs[nonce].update(status=event["status"], txid=event["txid"], block=event["block"])
+
+        # only what's still out there is ours to watch, earlier runs' outcomes stay in the journal
+        self.txs = {nonce: tx for nonce, tx in txs.items() if tx["status"] == PENDING}
+        # whatever the node knows about, pending included, is spoken for
+        self.next_nonce = max(
+            web3.eth.get_transaction_count(self.account.address, "pending"),
+            max(self.txs, default=-1) + 1,
+        )
+        self.poll()
+
+    # ---- sending
+
+    def _current_gas_price(self):
+        return self.gas_price if self.gas_price is not None else web3.eth.gas_price
+
+    def _broadcast(self, tx, gas_price):
+        receipt = self.account.transfer(
+            tx["to"],
+            0,
+            gas_limit=tx["gas_limit"],
+            gas_price=gas_price,
+            data=tx["data"],
+            nonce=tx["nonce"],
+            required_confs=0,
+            allow_revert=True,  # state from earlier transactions in the pipeline isn't mined yet
+            silent=True,
+        )
+        tx["hashes"].append(receipt.txid)
+        tx["gas_price"] = gas_price
+        tx["sent_at"] = time.time()
+        self._log(
+            event="sent",
+            nonce=tx["nonce"],
+            label=tx["label"],
+            to=tx["to"],
+            data=tx["data"],
+            gas_limit=tx["gas_limit"],
+            gas_price=gas_price,
+            txid=receipt.txid,
+            time=tx["sent_at"],
+        )
+        return receipt.txid
+
+    def submit(self, fn, *args, label=None, gas_limit=None, gas_price=None):
+        """
+        Broadcast fn(*args) with the next nonce and return the nonce straight away.
+        fn is a brownie contract method, e.g. strategy.harvest, or a container's deploy
+        to create a contract, in which case the address comes from the receipt.
+        """
+        if gas_limit is None:
+            # against the latest block, so leave room for what's ahead of us in the pipeline
+            gas_limit = int(fn.estimate_gas(*args, {"from": self.account}) * 1.2)
+        nonce = self.next_nonce
+        tx = _new_tx(
+            {
+                "nonce": nonce,
+                "label": label or fn.abi["name"],
+                "to": getattr(fn, "_address", None),  # a constructor has no address
+                "data": fn.encode_input(*args),
+                "gas_limit": gas_limit,
+            }
+        )
+        # if the node refuses it the nonce is still free and there's nothing to watch
+        self._broadcast(tx, gas_price if gas_price is not None else self._current_gas_price())
+        self.txs[nonce] = tx
+        self.next_nonce += 1
+        return nonce
+
+    def bump_stuck(self, older_than=None):
+        """
+        Resend anything pending for longer than older_than (default stuck_after) seconds
+        at a higher gas price. Returns the nonces we replaced.
+        """
+        older_than = self.stuck_after if older_than is None else older_than
+        now = time.time()
+        replaced = []
+        for nonce, tx in sorted(self.txs.items()):
+            if tx["status"] != PENDING or tx["sent_at"] is None or now - tx["sent_at"] < older_than:
+                continue
+            gas_price = max(int(tx["gas_price"] * self.bump) + 1, self._current_gas_price())
+            if self.max_gas_price is not None and gas_price > self.max_gas_price:
+                continue
+            try:
+                self._broadcast(tx, gas_price)
+            except (ValueError, VirtualMachineError):
+                # mined in the meantime (nonce too low) or the node wants more, the next poll sorts it out
+                continue
+            replaced.append(nonce)
+        return replaced
+
+    # ---- receipts
+
+    def poll(self):
+        """
+        Pick up receipts for everything pending. Returns the nonces that finished.
+        """
+        # read the nonce before the receipts, anything below it has been mined by now
+        mined_nonce = web3.eth.get_transaction_count(self.account.address)
+        finished = []
+        for nonce, tx in sorted(self.txs.items()):
+            if tx["status"] != PENDING:
+                continue
+            for txid in reversed(tx["hashes"]):
+                receipt = _receipt(txid)
+                if receipt is not None:
+                    status = CONFIRMED if receipt["status"] == 1 else FAILED
+                    self._finish(tx, status, txid, receipt["blockNumber"])
+                    finished.append(nonce)
+                    break
+            else:
+                if nonce < mined_nonce:
+                    self._finish(tx, DROPPED, None, None)
+                    finished.append(nonce)
+        return finished
+
+    def _finish(self, tx, status, txid, block):
+        tx.update(status=status, txid=txid, block=block)
+        self._log(event="done", nonce=tx["nonce"], status=status, txid=txid, block=block)
+
+    def pending(self):
+        return [nonce for nonce, tx in sorted(self.txs.items()) if tx["status"] == PENDING]
+
+    def wait(self, timeout=600, interval=2):
+        """
+        Poll and bump until nothing is pending or we run out of time. Returns the
+        transactions by nonce.
+        """
+        deadline = time.time() + timeout
+        while self.pending() and time.time() < deadline:
+            self.poll()
+            self.bump_stuck()
+            if self.pending():
+                time.sleep(interval)
+        return self.txs
+
+    def summary(self):
+        counts = {}
+        for tx in self.txs.values():
+            counts[tx["status"]] = counts.get(tx["status"], 0) + 1
+        return counts
+
+
+def _new_tx(fields):
+    return {
+        "nonce": fields["nonce"],
+        "label": fields["label"],
+        "to": fields["to"],
+        "data": fields["data"],
+        "gas_limit": fields["gas_limit"],
+        "gas_price": None,
+        "hashes": [],
+        "sent_at": None,
+        "status": PENDING,
+        "txid": None,
+        "block": None,
+    }
+
+
+def _receipt(txid):
+    try:
+        return web3.eth.get_transaction_receipt(txid)
+    except TransactionNotFound:
+        return None
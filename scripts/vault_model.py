@@ -0,0 +1,372 @@
+"""
+Yearn Vault 0.4.3 credit, debt, fee and locked profit accounting in Python.
+
+    from scripts.ops_cli import Rpc
+    from scripts.vault_model import snapshot
+
+    model = snapshot(Rpc(url), vault, [strategy], rewards=vault_rewards, block=12345678)
+    model.credit_available(strategy), model.debt_outstanding(strategy)
+    for harvest in model.project(strategy, apr=0.04, interval=43200, harvests=60):
+        ...
+
+Everything the vault does when our strategy harvests, with the same integer rounding:
+creditAvailable, debtOutstanding, expectedReturn, _reportLoss, _assessFees, report and
+the locked profit release that pricePerShare sees. The state comes from one JSON-RPC
+batch, after that nothing touches the chain, so keepers and optimizers can play out as
+many harvests as they like. Functions keep the vault's names in snake_case, strategy
+params keep the vault's struct field names so they compare directly with
+vault.strategies(strategy).
+
+Not modelled: withdrawals, the withdrawal queue, deposit limits and migrations.
+"""
+from scripts.ops_cli import BUNDLE, decode_output, encode_call, load_bundle
+
+MAX_BPS = 10_000
+SECS_PER_YEAR = 31_556_952  # 365.2425 days
+DEGRADATION_COEFFICIENT = 10 ** 18
+
+STRATEGY_FIELDS = [
+    "performanceFee",
+    "activation",
+    "debtRatio",
+    "minDebtPerHarvest",
+    "maxDebtPerHarvest",
+    "lastReport",
+    "totalDebt",
+    "totalGain",
+    "totalLoss",
+]
+
+VAULT_VIEWS = [
+    "totalAssets",
+    "totalDebt",
+    "totalSupply",
+    "debtRatio",
+    "lastReport",
+    "lockedProfit",
+    "lockedProfitDegradation",
+    "managementFee",
+    "performanceFee",
+    "emergencyShutdown",
+    "decimals",
+]
+
+
+class VaultModel:
+    def __init__(
+        self,
+        balance,
+        total_supply,
+        total_debt,
+        debt_ratio,
+        last_report,
+        locked_profit,
+        locked_profit_degradation,
+        management_fee,
+        performance_fee,
+        timestamp,
+        decimals=18,
+        emergency_shutdown=False,
+    ):
+        self.balance = balance  # want held by the vault, token.balanceOf(vault)
+        self.total_supply = total_supply
+        self.total_debt = total_debt
+        self.debt_ratio = debt_ratio
+        self.last_report = last_report
+        self.locked_profit = locked_profit
+        self.locked_profit_degradation = locked_profit_degradation
+        self.management_fee = management_fee
+        self.performance_fee = performance_fee
+        self.decimals = decimals
+        self.emergency_shutdown = emergency_shutdown
+        self.timestamp = timestamp  # block.timestamp for the next call
+
+        self.strategies = {}  # address -> vault.strategies(address) as a dict
+        self.balance_of = {}  # vault shares for the addresses we care about, "rewards" for the fee recipient
+        # the strategy side, only what the vault reads back from it
+        self.assets = {}  # estimatedTotalAssets
+        self.delegated = {}  # delegatedAssets
+        self.realise_losses = {}
+
+    def add_strategy(self, strategy, params, assets=0, delegated=0, realise_losses=False, shares=0):
+        self.strategies[strategy] = dict(params)
+        self.assets[strategy] = assets
+        self.delegated[strategy] = delegated
+        self.realise_losses[strategy] = realise_losses
+        self.balance_of[strategy] = shares
+
+    def sleep(self, seconds):
+        self.timestamp += seconds
+
+    # ---- views
+
+    def total_assets(self):
+        return self.balance + self.total_debt
+
+    def calculate_locked_profit(self):
+        locked_funds_ratio = (self.timestamp - self.last_report) * self.locked_profit_degradation
+        if locked_funds_ratio < DEGRADATION_COEFFICIENT:
+            return self.locked_profit - locked_funds_ratio * self.locked_profit // DEGRADATION_COEFFICIENT
+        return 0
+
+    def free_funds(self):
+        return self.total_assets() - self.calculate_locked_profit()
+
+    def share_value(self, shares):
+        if self.total_supply == 0:
+            return shares
+        return shares * self.free_funds() // self.total_supply
+
+    def price_per_share(self):
+        return self.share_value(10 ** self.decimals)
+
+    def is_active(self, strategy):
+        return self.strategies[strategy]["debtRatio"] > 0 or self.assets[strategy] > 0
+
+    def debt_outstanding(self, strategy):
+        params = self.strategies[strategy]
+        if self.debt_ratio == 0:
+            return params["totalDebt"]
+        strategy_debt_limit = params["debtRatio"] * self.total_assets() // MAX_BPS
+        if self.emergency_shutdown:
+            return params["totalDebt"]
+        if params["totalDebt"] <= strategy_debt_limit:
+            return 0
+        return params["totalDebt"] - strategy_debt_limit
+
+    def credit_available(self, strategy):
+        if self.emergency_shutdown:
+            return 0
+        params = self.strategies[strategy]
+        vault_total_assets = self.total_assets()
+        vault_debt_limit = self.debt_ratio * vault_total_assets // MAX_BPS
+        strategy_debt_limit = params["debtRatio"] * vault_total_assets // MAX_BPS
+
+        # exhausted credit line
+        if strategy_debt_limit <= params["totalDebt"] or vault_debt_limit <= self.total_debt:
+            return 0
+
+        available = strategy_debt_limit - params["totalDebt"]
+        available = min(available, vault_debt_limit - self.total_debt)
+        available = min(available, self.balance)
+
+        if available < params["minDebtPerHarvest"]:
+            return 0
+        return min(available, params["maxDebtPerHarvest"])
+
+    def expected_return(self, strategy):
+        params = self.strategies[strategy]
+        time_since_last_harvest = self.timestamp - params["lastReport"]
+        total_harvest_time = params["lastReport"] - params["activation"]
+        if time_since_last_harvest > 0 and total_harvest_time > 0 and self.is_active(strategy):
+            return params["totalGain"] * time_since_last_harvest // total_harvest_time
+        return 0
+
+    # ---- state changes
+
+    def _issue_shares_for_amount(self, to, amount):
+        if self.total_supply > 0:
+            shares = amount * self.total_supply // self.free_funds()
+        else:
+            shares = amount
+        assert shares != 0
+        self.total_supply += shares
+        self.balance_of[to] = self.balance_of.get(to, 0) + shares
+        return shares
+
+    def deposit(self, amount, to="depositor"):
+        shares = self._issue_shares_for_amount(to, amount)
+        self.balance += amount
+        return shares
+
+    def _report_loss(self, strategy, loss):
+        params = self.strategies[strategy]
+        assert params["totalDebt"] >= loss
+        # make sure we reduce our debt ratio
+        if self.debt_ratio != 0:
+            ratio_change = min(loss * self.debt_ratio // self.total_debt, params["debtRatio"])
+            params["debtRatio"] -= ratio_change
+            self.debt_ratio -= ratio_change
+        params["totalLoss"] += loss
+        params["totalDebt"] -= loss
+        self.total_debt -= loss
+
+    def _assess_fees(self, strategy, gain):
+        params = self.strategies[strategy]
+        if params["activation"] == self.timestamp:
+            return 0
+        duration = self.timestamp - params["lastReport"]
+        assert duration != 0, "can't assess fees twice within the same block"
+        if gain == 0:
+            return 0
+
+        management_fee = (
+            (params["totalDebt"] - self.delegated[strategy]) * duration * self.management_fee
+            // MAX_BPS
+            // SECS_PER_YEAR
+        )
+        strategist_fee = gain * params["performanceFee"] // MAX_BPS
+        performance_fee = gain * self.performance_fee // MAX_BPS
+        total_fee = min(performance_fee + strategist_fee + management_fee, gain)
+        if total_fee > 0:
+            # shares are minted to the vault, then handed to the strategist and rewards
+            reward = self._issue_shares_for_amount("vault", total_fee)
+            if strategist_fee > 0:
+                strategist_reward = strategist_fee * reward // total_fee
+                self.balance_of["vault"] -= strategist_reward
+                self.balance_of[strategy] = self.balance_of.get(strategy, 0) + strategist_reward
+            if self.balance_of["vault"] > 0:
+                self.balance_of["rewards"] = self.balance_of.get("rewards", 0) + self.balance_of["vault"]
+                self.balance_of["vault"] = 0
+        return total_fee
+
+    def report(self, strategy, gain, loss, debt_payment):
+        """
+        vault.report, called as strategy. Want moves between the vault and the strategy's
+        assets. Returns what report returns, the debt still outstanding.
+        """
+        params = self.strategies[strategy]
+        assert params["activation"] > 0
+        if loss > 0:
+            self._report_loss(strategy, loss)
+
+        total_fees = self._assess_fees(strategy, gain)
+        params["totalGain"] += gain
+
+        credit = self.credit_available(strategy)
+        debt = self.debt_outstanding(strategy)
+        debt_payment = min(debt_payment, debt)
+        if debt_payment > 0:
+            params["totalDebt"] -= debt_payment
+            self.total_debt -= debt_payment
+            debt -= debt_payment
+        if credit > 0:
+            params["totalDebt"] += credit
+            self.total_debt += credit
+
+        # net transfer between the vault and the strategy
+        moved = gain + debt_payment - credit
+        self.balance += moved
+        self.assets[strategy] -= moved
+
+        locked_profit_before_loss = self.calculate_locked_profit() + gain - total_fees
+        self.locked_profit = max(locked_profit_before_loss - loss, 0)
+
+        params["lastReport"] = self.timestamp
+        self.last_report = self.timestamp
+
+        if params["debtRatio"] == 0 or self.emergency_shutdown:
+            return self.assets[strategy]
+        return debt
+
+    def harvest(self, strategy):
+        """
+        BaseStrategy.harvest with our prepareReturn, assuming everything we need to free
+        comes out at book value. Returns (profit, loss, debt payment, debt outstanding).
+        """
+        debt_outstanding = self.debt_outstanding(strategy)
+        assets = self.assets[strategy]
+        debt = self.strategies[strategy]["totalDebt"]
+        profit = loss = debt_payment = 0
+        if assets >= debt:
+            debt_payment = debt_outstanding
+            profit = assets - debt
+        elif self.realise_losses[strategy]:
+            loss = debt - assets
+            debt_payment = debt_outstanding - loss if debt_outstanding > loss else 0
+        debt_outstanding = self.report(strategy, profit, loss, debt_payment)
+        return profit, loss, debt_payment, debt_outstanding
+
+    def harvest_trigger(self, strategy, max_report_delay, min_harvest_credit, force=False):
+        # Strategy.harvestTrigger
+        if self.timestamp - self.strategies[strategy]["lastReport"] > max_report_delay:
+            return True
+        if force:
+            return True
+        return self.credit_available(strategy) >= min_harvest_credit
+
+    def project(self, strategy, apr, interval, harvests):
+        """
+        Grow the strategy's assets at apr on its debt and harvest every interval seconds.
+        Yields one dict per harvest, the model keeps the state after the last one.
+        """
+        for _ in range(harvests):
+            self.sleep(interval)
+            self.assets[strategy] += int(self.strategies[strategy]["totalDebt"] * apr * interval / SECS_PER_YEAR)
+            credit_available = self.credit_available(strategy)
+            profit, loss, debt_payment, outstanding = self.harvest(strategy)
+            yield {
+                "timestamp": self.timestamp,
+                "profit": profit,
+                "loss": loss,
+                "debt_payment": debt_payment,
+                "credit_available": credit_available,
+                "debt_outstanding": outstanding,
+                "total_debt": self.strategies[strategy]["totalDebt"],
+                "price_per_share": self.price_per_share(),
+            }
+
+
+def snapshot(rpc, vault, strategies, rewards=None, block="latest", bundle=None):
+    """
+    Build a model from a single JSON-RPC batch. Pin block to a number to be sure every
+    read sees the same state. rewards is the vault's rewards address, if we care about
+    its fee shares.
+    """
+    bundle = bundle or load_bundle(BUNDLE)
+    vault_abi, strategy_abi = bundle["Vault"], bundle["Strategy"]
+
+    calls = [(vault, vault_abi.function(name, 0), []) for name in VAULT_VIEWS]
+    for strategy in strategies:
+        calls += [
+            (vault, vault_abi.function("strategies", 1), [strategy]),
+            (vault, vault_abi.function("balanceOf", 1), [strategy]),
+            (strategy, strategy_abi.function("estimatedTotalAssets", 0), []),
+            (strategy, strategy_abi.function("delegatedAssets", 0), []),
+            (strategy, strategy_abi.function("realiseLosses", 0), []),
+        ]
+    if rewards:
+        calls.append((vault, vault_abi.function("balanceOf", 1), [rewards]))
+
+    # the header comes along in the same batch, the vault needs block.timestamp
+    raw = rpc.send(
+        [("eth_call", [{"to": to, "data": encode_call(entry, args)}, block]) for to, entry, args in calls]
+        + [("eth_getBlockByNumber", [block if isinstance(block, str) else hex(block), False])]
+    )
+    values = [
+        decode_output(entry, data) if data not in (None, "0x") else None
+        for (_, entry, _), data in zip(calls, raw[:-1])
+    ]
+    timestamp = int(raw[-1]["timestamp"], 16)
+
+    v = dict(zip(VAULT_VIEWS, values[: len(VAULT_VIEWS)]))
+    model = VaultModel(
+        # 0.4.3 has no totalIdle, totalAssets is the vault's balance plus debt
+        balance=v["totalAssets"] - v["totalDebt"],
+        total_supply=v["totalSupply"],
+        total_debt=v["totalDebt"],
+        debt_ratio=v["debtRatio"],
+        last_report=v["lastReport"],
+        locked_profit=v["lockedProfit"],
+        locked_profit_degradation=v["lockedProfitDegradation"],
+        management_fee=v["managementFee"],
+        performance_fee=v["performanceFee"],
+        timestamp=timestamp,
+        decimals=v["decimals"],
+        emergency_shutdown=v["emergencyShutdown"],
+    )
+    rest = values[len(VAULT_VIEWS) :]
+    for i, strategy in enumerate(strategies):
+        params, shares, assets, delegated, realise_losses = rest[5 * i : 5 * i + 5]
+        model.add_strategy(
+            strategy,
+            dict(zip(STRATEGY_FIELDS, params)),
+            assets=assets,
+            delegated=delegated or 0,
+            realise_losses=bool(realise_losses),
+            shares=shares,
+        )
+    if rewards:
+        model.balance_of["rewards"] = rest[-1]
+    return model
+
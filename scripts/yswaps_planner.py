@@ -0,0 +1,140 @@
+from collections import namedtuple
+from contextlib import contextmanager
+
+from brownie.exceptions import VirtualMachineError
+from eth_abi import encode_abi
+from eth_abi.packed import encode_abi_packed
+import eth_utils
+
+try:
+    from web3.exceptions import Web3RPCError
+
+    QUOTE_ERRORS = (VirtualMachineError, ValueError, Web3RPCError)
+except ImportError:  # before web3 v7 a node's error comes back as ValueError
+    QUOTE_ERRORS = (VirtualMachineError, ValueError)
+
+# multicall swapper optimisation flag, every call is a plain call with no value
+CALL_ONLY_NO_VALUE = 5
+
+MAX_BPS = 10_000
+
+APPROVE_SELECTOR = eth_utils.function_signature_to_4byte_selector(
+    "approve(address,uint256)"
+)
+SWAP_SELECTOR = eth_utils.function_signature_to_4byte_selector(
+    "swapExactTokensForTokens(uint256,uint256,(address,address,bool)[],address,uint256)"
+)
+
+# path is a list of [from, to, stable] steps, the same shape the solidly router takes
+Trade = namedtuple("Trade", ["token_in", "amount_in", "path", "expected_out", "min_out"])
+
+
+def _address(x):
+    return getattr(x, "address", x)
+
+
+@contextmanager
+def _no_batch():
+    yield
+
+
+class TradePlanner:
+    """
+    Plans the sale of all of a strategy's reward tokens into want as a single
+    multicall swapper payload.
+
+    router is anything with a solidly style getAmountsOut(amount, path). batch is an
+    optional context manager factory that groups the quote calls into one request,
+    e.g. functools.partial(brownie.multicall, address=MULTICALL2).
+    """
+
+    def __init__(
+        self, router, want, intermediates=(), slippage_bps=50, batch=None
+    ):
+        self.router = router
+        self.want = _address(want)
+        self.intermediates = [_address(i) for i in intermediates]
+        self.slippage_bps = slippage_bps
+        self.batch = batch or _no_batch
+
+    def candidate_routes(self, token):
+        token = _address(token)
+        routes = [[[token, self.want, stable]] for stable in (False, True)]
+        for mid in self.intermediates:
+            if mid in (token, self.want):
+                continue
+            for first in (False, True):
+                for second in (False, True):
+                    routes.append([[token, mid, first], [mid, self.want, second]])
+        return routes
+
+    def _amounts_out(self, amount, path):
+        try:
+            return self.router.getAmountsOut(amount, path)
+        except QUOTE_ERRORS:
+            # route doesn't exist, getAmountsOut reverts on a missing pair
+            return None
+
+    def quote(self, requests):
+        # requests are (amount, path) pairs, returns the final amount out of each
+        with self.batch():
+            results = [self._amounts_out(amount, path) for amount, path in requests]
+        # a call that failed inside a multicall comes back as None rather than raising
+        return [amounts[-1] if amounts else 0 for amounts in results]
+
+    def plan(self, strategy, tokens):
+        balances = [(_address(t), t.balanceOf(strategy)) for t in tokens]
+        balances = [(t, amount) for t, amount in balances if amount > 0]
+
+        requests = []
+        owners = []
+        for token, amount in balances:
+            for path in self.candidate_routes(token):
+                requests.append((amount, path))
+                owners.append(token)
+        quotes = self.quote(requests)
+
+        best = {}
+        for token, (amount, path), out in zip(owners, requests, quotes):
+            if out > 0 and (token not in best or out > best[token].expected_out):
+                min_out = out * (MAX_BPS - self.slippage_bps) // MAX_BPS
+                best[token] = Trade(token, amount, path, out, max(min_out, 1))
+
+        return [best[token] for token, _ in balances if token in best]
+
+    def encode(self, trades, receiver, deadline=2 ** 256 - 1):
+        # one approve and one swap per trade, all in a single payload
+        router = _address(self.router)
+        receiver = _address(receiver)
+        types = ["uint8"]
+        values = [CALL_ONLY_NO_VALUE]
+        for trade in trades:
+            approve = APPROVE_SELECTOR + encode_abi(
+                ["address", "uint256"], [router, trade.amount_in]
+            )
+            swap = SWAP_SELECTOR + encode_abi(
+                ["uint256", "uint256", "(address,address,bool)[]", "address", "uint256"],
+                [
+                    trade.amount_in,
+                    trade.min_out,
+                    [tuple(step) for step in trade.path],
+                    receiver,
+                    deadline,
+                ],
+            )
+            for to, data in ((trade.token_in, approve), (router, swap)):
+                types += ["address", "uint256", "bytes"]
+                values += [to, len(data), data]
+        return encode_abi_packed(types, values)
+
+    def execute(self, trade_factory, strategy, trades, swapper, sender):
+        details = [
+            [_address(strategy), t.token_in, self.want, t.amount_in, t.min_out]
+            for t in trades
+        ]
+        return trade_factory.execute["tuple[],address,bytes"](
+            details,
+            _address(swapper),
+            self.encode(trades, strategy),
+            {"from": sender},
+        )
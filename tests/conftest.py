@@ -1,6 +1,20 @@
+import os
+from contextlib import contextmanager
+
 import pytest
 from brownie import config, Wei, Contract
 
+
+# INPROCESS_EVM=1 serves an evm from inside this process for brownie to attach to, for tests/unit.
+# brownie connects once collection is done, so this is early enough. see scripts/inprocess_evm.py
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    if os.environ.get("INPROCESS_EVM"):
+        from scripts.inprocess_evm import start
+
+        start()
+
+
 # Snapshots the chain before each test and reverts after test completion.
 
 
@@ -9,6 +23,26 @@ def isolation(fn_isolation):
     pass
 
 
+# try something inside a test and roll it back:
+#     with rollback():
+#         vault.withdraw(amount, {"from": whale})
+# chain.snapshot() has a single slot and fn_isolation is already using it, so these snapshots go
+# straight to the node. we clear brownie's tx history after, or it waits on nonces the revert took
+# away. contracts deployed inside stay in brownie's registry, so don't deploy in one
+@pytest.fixture
+def rollback(web3, history):
+    @contextmanager
+    def _rollback():
+        snapshot_id = web3.provider.make_request("evm_snapshot", [])["result"]
+        try:
+            yield
+        finally:
+            web3.provider.make_request("evm_revert", [snapshot_id])
+            history.clear()
+
+    return _rollback
+
+
 # this is the name we want to give our strategy
 @pytest.fixture(scope="module")
 def strategy_name():
@@ -127,6 +161,15 @@ def solidex_router():
     yield Contract("0xa38cd27185a464914D3046f0AB9d43356B34829D")
 
 
+# solidly stable pairs that share usdc, used by our multi-pair strategy
+@pytest.fixture(scope="module")
+def stable_lps(solidex_router, usdc, dai, mim):
+    yield [
+        solidex_router.pairFor(usdc, dai, True),
+        solidex_router.pairFor(usdc, mim, True),
+    ]
+
+
 # zero address
 
 
@@ -204,6 +247,19 @@ def vault(pm, gov, rewards, guardian, management, token, chain):
     yield vault
 
 
+# a usdc vault for our multi-pair strategy
+@pytest.fixture(scope="function")
+def usdc_vault(pm, gov, rewards, guardian, management, usdc, chain):
+    Vault = pm(config["dependencies"][0]).Vault
+    usdc_vault = guardian.deploy(Vault)
+    usdc_vault.initialize(usdc, gov, rewards, "", "", guardian)
+    usdc_vault.setDepositLimit(2 ** 256 - 1, {"from": gov})
+    usdc_vault.setManagement(management, {"from": gov})
+    usdc_vault.setManagementFee(0, {"from": gov})
+    chain.sleep(1)
+    yield usdc_vault
+
+
 # use this if your vault is already deployed
 # @pytest.fixture(scope="function")
 # def vault(pm, gov, rewards, guardian, management, token, chain):
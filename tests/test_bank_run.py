@@ -0,0 +1,48 @@
+import brownie
+from brownie import Contract
+import json
+import os
+
+from scripts.bank_run import run, save, summary
+
+# crank this up for a real stress run, e.g. BANK_RUN_USERS=300
+USERS = int(os.environ.get("BANK_RUN_USERS", 40))
+REPORT = os.environ.get("BANK_RUN_REPORT")
+
+
+def test_bank_run(vault, strategy, token, anyWFTM, solidex_router, whale, gov):
+    report = run(
+        vault,
+        strategy,
+        token,
+        anyWFTM,
+        solidex_router,
+        whale,
+        gov,
+        users=USERS,
+        harvest_every=max(USERS // 8, 1),
+        shock_every=max(USERS // 5, 1),
+    )
+    print("\n" + summary(report))
+    if REPORT:
+        save(report, REPORT)
+
+    # everybody got out, what's left belongs to fee shares
+    withdrawals = report["withdrawals"]
+    assert len(withdrawals) == USERS
+    assert vault.totalSupply() == vault.balanceOf(vault.rewards()) + vault.balanceOf(strategy)
+
+    # the run saw the strategy and the pool move under it, not just one exit after another
+    assert any("harvest" in w["after"] for w in withdrawals)
+    assert any("shock" in w["after"] for w in withdrawals)
+
+    # peg shocks cost something, but nobody should lose more than a couple of percent,
+    # including whoever withdraws straight after a harvest or a shock
+    for w in withdrawals:
+        loss = w["deposited"] - w["received"]
+        assert w["loss_bps"] == loss * 10_000 / w["deposited"]
+        assert w["loss_bps"] < 200
+    assert report["total_loss"] == sum(w["deposited"] - w["received"] for w in withdrawals)
+    assert report["total_loss"] < report["start_assets"] * 0.01
+
+    assert json.loads(json.dumps(report))["users"] == USERS
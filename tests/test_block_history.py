@@ -0,0 +1,88 @@
+import brownie
+from brownie import Contract
+import pytest
+
+from scripts.block_history import History, append, as_float, as_int, create, ingest_csv
+
+
+def test_block_history_round_trip(tmp_path):
+    path = tmp_path / "pair.hist"
+    csv_path = tmp_path / "pair.csv"
+    rows = [(block, block * 10 ** 22 + 1, 2 ** 127 + block, 10 ** 11) for block in range(1_000, 3_000, 3)]
+    with open(csv_path, "w") as fp:
+        fp.write("block,reserve0,reserve1,gas_price,ignored\n")
+        fp.writelines(f"{b},{r0},{r1},{gas},x\n" for b, r0, r1, gas in rows)
+
+    # small chunks so ingestion goes through several appends
+    assert ingest_csv(path, csv_path, chunk=100) == len(rows)
+    history = History(path)
+    assert len(history) == len(rows)
+
+    # wei columns are exact, even past 64 bits
+    assert history.reserves() == [(b, r0, r1) for b, r0, r1, _ in rows]
+    assert as_int(history.column("gas_price"))[:2] == [10 ** 11, 10 ** 11]
+    assert as_float(history.column("reserve0"))[1] == pytest.approx(rows[1][1])
+    assert as_int(history.column("lp_supply")) == [0] * len(rows)
+
+    # a range is views into the memory map, half open on blocks
+    window = history.range(1_500, 1_530)
+    assert as_int(window["block"]) == [b for b, *_ in rows if 1_500 <= b < 1_530]
+    assert window["reserve0"].base is not None
+    assert history.at(1_501)["block"] == 1_501 - (1_501 - 1_000) % 3
+    with pytest.raises(KeyError):
+        history.at(999)
+
+
+def test_block_history_append(tmp_path):
+    path = tmp_path / "pair.hist"
+    create(path, meta={"pair": "wftm/anyWFTM"})
+    assert len(History(path)) == 0
+    append(path, {"block": [10, 11], "reserve0": [1, 2]})
+
+    # only forward, and only strictly increasing
+    with pytest.raises(ValueError):
+        append(path, {"block": [11]})
+    with pytest.raises(ValueError):
+        append(path, {"block": [20, 20]})
+    with pytest.raises(ValueError):
+        append(path, {"block": [20], "nope": [1]})
+
+    # an append that died after writing some bytes is invisible and gets overwritten
+    with open(path / "reserve0.bin", "ab") as fp:
+        fp.write(b"\xff" * 40)
+    assert len(History(path)) == 2
+    append(path, {"block": [12], "reserve0": [3]})
+    history = History(path)
+    assert as_int(history.column("reserve0")) == [1, 2, 3]
+    assert history.header["meta"]["pair"] == "wftm/anyWFTM"
+
+
+def test_block_history_matches_pair(tmp_path, strategy, token, anyWFTM, solidex_router, whale, chain):
+    # record the pair while we push it around, then read it back by block
+    lp = Contract(strategy.lpToken())
+    path = tmp_path / "pair.hist"
+    create(path)
+    token.approve(solidex_router, 2 ** 256 - 1, {"from": whale})
+    recorded = []
+    for _ in range(5):
+        solidex_router.swapExactTokensForTokens(
+            1_000 * 10 ** 18, 0, [[token, anyWFTM, True]], whale, 2 ** 256 - 1, {"from": whale}
+        )
+        r0, r1, _ = lp.getReserves()
+        block = chain.height
+        append(
+            path,
+            {
+                "block": [block],
+                "timestamp": [chain[block].timestamp],
+                "reserve0": [r0],
+                "reserve1": [r1],
+                "lp_supply": [lp.totalSupply()],
+            },
+        )
+        recorded.append((block, r0, r1))
+
+    history = History(path)
+    assert history.reserves() == recorded
+    assert history.reserves(recorded[1][0], recorded[3][0]) == recorded[1:3]
+    assert history.at(recorded[-1][0])["lp_supply"] == lp.totalSupply()
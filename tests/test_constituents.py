@@ -0,0 +1,61 @@
+from brownie import Contract
+
+from scripts.solidly_math import quote_remove_liquidity
+
+
+def amounts_to_check(lp, staked):
+    supply = lp.totalSupply()
+    # odd sizes so both divisions have something to round away
+    return [0, 1, 7, 10 ** 18 - 1, 10 ** 18, 123_456_789 * 10 ** 15 + 1, staked, supply // 3, supply]
+
+
+def test_constituents_match_router(gov, token, vault, whale, strategy, chain, amount, anyWFTM, solidex_router):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    staked = strategy.balanceOfLPStaked()
+    assert staked > 0
+
+    lp = Contract(strategy.lpToken())
+    token.approve(solidex_router, 2 ** 256 - 1, {"from": whale})
+    for step in range(3):
+        for liquidity in amounts_to_check(lp, staked):
+            ours = strategy.balanceOfConstituents(liquidity)
+            assert ours == solidex_router.quoteRemoveLiquidity(token, anyWFTM, True, liquidity)
+            r0, r1, _ = lp.getReserves()
+            assert ours == quote_remove_liquidity(liquidity, r0, r1, lp.totalSupply())
+
+        # move the reserves and the supply and go again
+        solidex_router.swapExactTokensForTokens(
+            (step + 1) * 1_000 * 10 ** 18, 0, [[token, anyWFTM, True]], whale, 2 ** 256 - 1, {"from": whale}
+        )
+        vault.deposit(amount // 3, {"from": whale})
+        strategy.setDoHealthCheck(False, {"from": gov})
+        strategy.harvest({"from": gov})
+
+    lp_held = strategy.balanceOfLPStaked() + lp.balanceOf(strategy)
+    (amount_wftm, amount_any) = solidex_router.quoteRemoveLiquidity(token, anyWFTM, True, lp_held)
+    assert strategy.estimatedTotalAssets() == (
+        amount_wftm + amount_any + token.balanceOf(strategy) + anyWFTM.balanceOf(strategy)
+    )
+
+    # one hop fewer than going through the router
+    ours = strategy.balanceOfConstituents.estimate_gas(staked)
+    router = solidex_router.quoteRemoveLiquidity.estimate_gas(token, anyWFTM, True, staked)
+    print(f"\nbalanceOfConstituents: {ours:,} gas, router quote alone: {router:,} gas")
+    assert ours < router
+
+
+def test_multi_pair_constituents_match_router(StrategyMultiPair, usdc_vault, usdc, strategist, stable_lps, solidex_router):
+    multi = strategist.deploy(
+        StrategyMultiPair, usdc_vault, "usdc_stables_solidex", stable_lps, [5_000, 5_000]
+    )
+    for address in stable_lps:
+        lp = Contract(address)
+        other = lp.token1() if lp.token0() == usdc else lp.token0()
+        for liquidity in amounts_to_check(lp, lp.totalSupply() // 1_000):
+            assert multi.balanceOfConstituents(lp, liquidity) == solidex_router.quoteRemoveLiquidity(
+                usdc, other, True, liquidity
+            )
@@ -0,0 +1,81 @@
+import os
+from multiprocessing import cpu_count
+
+import brownie
+from brownie import Contract
+import pytest
+
+from scripts.depeg_sim import DUST, ONE, Model, format_report, format_speedup, run, speedup
+
+# opt in with DEPEG_SIM_SPEEDUP=<workers>, it takes a while and needs the cores to itself
+SPEEDUP_WORKERS = int(os.environ.get("DEPEG_SIM_SPEEDUP", 0))
+# share of a linear speedup we expect, paths share nothing so only pool overhead eats into it
+SPEEDUP_EFFICIENCY = float(os.environ.get("DEPEG_SIM_EFFICIENCY", 0.6))
+
+
+def test_depeg_sim_seeded():
+    # same seed, same answer, however many processes the paths get spread over
+    single = run(paths=8, seed=7, workers=1, steps=240)
+    pooled = run(paths=8, seed=7, workers=2, steps=240)
+    assert single["settings"] == pooled["settings"]
+    print("\n" + format_report(single))
+
+    other = run(paths=8, seed=8, workers=1, steps=240)
+    assert other["settings"] != single["settings"]
+
+
+@pytest.mark.skipif(
+    SPEEDUP_WORKERS < 2 or SPEEDUP_WORKERS > cpu_count(),
+    reason="set DEPEG_SIM_SPEEDUP to a worker count between 2 and the number of cores",
+)
+def test_depeg_sim_speedup():
+    result = speedup(paths=50 * SPEEDUP_WORKERS, workers=SPEEDUP_WORKERS)
+    print("\n" + format_speedup(result))
+    assert result["speedup"] >= SPEEDUP_EFFICIENCY * SPEEDUP_WORKERS
+
+
+def test_depeg_sim_port_matches_strategy(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    wftm,
+    anyWFTM,
+):
+    # seed the model with the live pool, then harvest the same deposit on both
+    lp = Contract(strategy.lpToken())
+    model = Model(
+        wftm.balanceOf(lp),
+        anyWFTM.balanceOf(lp),
+        lp.totalSupply(),
+        anyWFTM.totalSupply(),
+        wftm.balanceOf(anyWFTM),
+        strategy.lpSlippage(),
+        strategy.realiseLosses(),
+    )
+    model.deposit(amount)
+    model.harvest()
+
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+
+    assert model.lp == strategy.balanceOfLPStaked()
+    assert model.want == strategy.balanceOfWant()
+    assert model.any == strategy.balanceOfAnyWftm()
+    assert model.estimated_total_assets() == strategy.estimatedTotalAssets()
+    assert model.wftm_reserve == wftm.balanceOf(lp)
+    assert model.any_reserve == anyWFTM.balanceOf(lp)
+
+    # and a withdrawal that has to pull from the pool
+    shares = vault.balanceOf(whale) // 3
+    expected = model.withdraw(shares)
+    before = token.balanceOf(whale)
+    vault.withdraw(shares, {"from": whale})
+    assert token.balanceOf(whale) - before == pytest.approx(expected, abs=DUST)
+    assert model.lp == strategy.balanceOfLPStaked()
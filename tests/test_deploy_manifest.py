@@ -0,0 +1,81 @@
+import brownie
+from brownie import Contract, Strategy
+import json
+import yaml
+
+from scripts.deploy_manifest import run
+
+
+def test_deploy_manifest(
+    gov,
+    vault,
+    keeper,
+    healthCheck,
+    strategy_name,
+    tmp_path,
+):
+    # an original strategy to clone from
+    original = gov.deploy(Strategy, vault, strategy_name)
+
+    manifest = {
+        "clone_from": None,
+        "defaults": {
+            "lp_slippage": 9990,
+            "min_harvest_credit": 10_000 * 10 ** 18,
+            "keeper": keeper.address,
+            "health_check": healthCheck.address,
+        },
+        "strategies": [
+            {"vault": vault.address, "name": "deployed_one"},
+            {
+                "vault": vault.address,
+                "name": "cloned_one",
+                "clone_from": original.address,
+                "lp_slippage": 9950,
+                "max_deposit_bps": 500,
+            },
+        ],
+    }
+    manifest_path = tmp_path / "manifest.yml"
+    manifest_path.write_text(yaml.safe_dump(manifest))
+    state_path = tmp_path / "state.json"
+
+    journal = tmp_path / "journal.jsonl"
+
+    state = run(manifest_path, state_path, account=gov, journal=journal)
+
+    deployed = Strategy.at(state[f"{vault.address}:deployed_one"]["strategy"])
+    cloned = Strategy.at(state[f"{vault.address}:cloned_one"]["strategy"])
+    assert deployed.name() == "deployed_one"
+    assert deployed.isOriginal() == True
+    assert deployed.lpSlippage() == 9990
+    assert deployed.minHarvestCredit() == 10_000 * 10 ** 18
+    assert deployed.keeper() == keeper
+    assert cloned.name() == "cloned_one"
+    assert cloned.isOriginal() == False
+    assert cloned.lpSlippage() == 9950
+    assert cloned.maxDepositBps() == 500
+    assert cloned.lpToken() == original.lpToken()
+    assert cloned.healthCheck() == healthCheck
+    assert all(entry["verified"] for entry in json.loads(state_path.read_text()).values())
+
+    # deploys and setters all went out through tx_pipeline's journal
+    sent = [event for event in map(json.loads, journal.read_text().splitlines()) if event["event"] == "sent"]
+    assert [event["label"] for event in sent[:2]] == ["deploy deployed_one", "clone cloned_one"]
+    assert sent[0]["to"] is None
+
+    # running it again picks up the state file and sends nothing
+    nonce = gov.nonce
+    run(manifest_path, state_path, account=gov, journal=journal)
+    assert gov.nonce == nonce
+
+
+def test_clone_only_from_original(gov, vault, strategy, strategist, rewards, keeper):
+    tx = strategy.cloneStrategy(vault, strategist, rewards, keeper, "clone", {"from": gov})
+    clone = Strategy.at(tx.events["Cloned"]["clone"])
+
+    # can't clone a clone, or initialize twice
+    with brownie.reverts():
+        clone.cloneStrategy(vault, strategist, rewards, keeper, "clone_of_clone", {"from": gov})
+    with brownie.reverts():
+        clone.initialize(vault, strategist, rewards, keeper, "again", {"from": gov})
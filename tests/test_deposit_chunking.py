@@ -0,0 +1,66 @@
+import brownie
+from brownie import Contract
+from brownie import config
+import math
+
+
+def test_deposit_chunking(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    keeper,
+    wftm,
+    anyWFTM,
+):
+    # cap our deposits so it takes about four calls to get everything in
+    lp = strategy.lpToken()
+    reserves = wftm.balanceOf(lp) + anyWFTM.balanceOf(lp)
+    bps = max(1, amount * 10_000 // (4 * reserves))
+    strategy.setMaxDepositBps(bps, {"from": gov})
+    assert strategy.maxDeposit() < amount
+
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(1)
+
+    # only part of our funds went in, the rest waits for tends
+    assert strategy.balanceOfWant() > 1e17
+    assert strategy.tendTrigger(0) == True
+
+    tends = 0
+    while strategy.tendTrigger(0) and tends < 20:
+        staked = strategy.balanceOfLPStaked()
+        strategy.tend({"from": keeper})
+        assert strategy.balanceOfLPStaked() > staked
+        tends += 1
+        chain.sleep(1)
+
+    print("\nTends needed:", tends)
+    assert tends > 0
+    assert strategy.tendTrigger(0) == False
+    assert strategy.balanceOfWant() <= 1e17
+    assert math.isclose(strategy.estimatedTotalAssets(), amount, rel_tol=1e-3)
+
+
+def test_deposit_chunking_setters(gov, strategy, whale):
+    assert strategy.maxDepositBps() == 10_000
+    strategy.setMaxDepositBps(100, {"from": gov})
+    assert strategy.maxDepositBps() == 100
+
+    with brownie.reverts():
+        strategy.setMaxDepositBps(0, {"from": gov})
+    with brownie.reverts():
+        strategy.setMaxDepositBps(10_001, {"from": gov})
+    with brownie.reverts():
+        strategy.setMaxDepositBps(100, {"from": whale})
+
+    # nothing loose, nothing to tend
+    assert strategy.tendTrigger(0) == False
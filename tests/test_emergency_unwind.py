@@ -0,0 +1,87 @@
+import brownie
+from brownie import Contract
+from brownie import config
+import math
+
+
+def test_emergency_unwind(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    anyWFTM,
+):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(1)
+
+    assets = strategy.estimatedTotalAssets()
+    assert strategy.balanceOfLPStaked() > 0
+
+    # only emergency authorized can unwind
+    with brownie.reverts():
+        strategy.emergencyUnwind(0, {"from": whale})
+
+    # asking for more than we have reverts, and leaves us staked
+    with brownie.reverts("below min out"):
+        strategy.emergencyUnwind(assets * 2, {"from": gov})
+    assert strategy.balanceOfLPStaked() > 0
+
+    # loose wftm we already held doesn't count towards the bound, only what the unwind gives us
+    token.transfer(strategy, assets * 2, {"from": whale})
+    with brownie.reverts("below min out"):
+        strategy.emergencyUnwind(assets * 2, {"from": gov})
+    loose = token.balanceOf(strategy)
+
+    # a sane bound goes through in one transaction
+    strategy.emergencyUnwind(assets * 0.999, {"from": gov})
+    assert strategy.balanceOfLPStaked() == 0
+    assert anyWFTM.balanceOf(strategy) == 0
+    assert token.balanceOf(strategy) - loose >= assets * 0.999
+    assert math.isclose(strategy.estimatedTotalAssets(), assets * 3, rel_tol=1e-3)
+
+
+def test_emergency_unwind_then_exit(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(1)
+
+    assets = strategy.estimatedTotalAssets()
+    total_assets = vault.totalAssets()
+    price_per_share = vault.pricePerShare()
+
+    # the unwind only moves funds inside the strategy, the vault still counts them once as debt
+    strategy.emergencyUnwind(assets * 0.999, {"from": gov})
+    assert strategy.balanceOfLPStaked() == 0
+    assert vault.totalAssets() == total_assets
+    assert vault.pricePerShare() == price_per_share
+    total_debt = vault.strategies(strategy)["totalDebt"]
+    assert math.isclose(strategy.estimatedTotalAssets(), total_debt, rel_tol=1e-3)
+
+    # and come back as a debt payment on the next harvest
+    strategy.setEmergencyExit({"from": gov})
+    strategy.harvest({"from": gov})
+    assert strategy.estimatedTotalAssets() == 0
+    assert vault.strategies(strategy)["totalDebt"] == 0
+    assert vault.totalAssets() == token.balanceOf(vault)
+    assert math.isclose(vault.totalAssets(), total_assets, rel_tol=1e-3)
+    assert vault.pricePerShare() <= price_per_share
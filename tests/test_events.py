@@ -0,0 +1,125 @@
+import brownie
+from brownie import Contract
+from brownie import config
+import math
+
+OUR_EVENTS = ["Deposited", "Withdrawn", "AnyWftmWrapped", "AnyWftmUnwrapped", "DepositSkipped"]
+
+# SkipReason in Strategy.sol
+EMERGENCY_EXIT, DUST, LP_PRICE = 0, 1, 2
+
+
+def ours(tx, name, strategy):
+    # solidex's depositer has its own Deposited and Withdrawn events
+    if name not in tx.events:
+        return []
+    return [event for event in tx.events[name] if event.address == strategy.address]
+
+
+def count_ours(tx, strategy):
+    return sum(len(ours(tx, name, strategy)) for name in OUR_EVENTS)
+
+
+def emit_gas(strategy, token, whale, gov, rollback):
+    # the same tend twice, the only difference being whether it emits DepositSkipped. a 1bps buffer
+    # swallows whatever our last deposit left loose, so without a donation there's nothing to report
+    strategy.setBufferBps(1, {"from": gov})
+    with rollback():
+        quiet = strategy.tend({"from": gov})
+    token.transfer(strategy, strategy.bufferTarget() + 1e16, {"from": whale})
+    loud = strategy.tend({"from": gov})
+    assert ours(quiet, "DepositSkipped", strategy) == []
+    assert ours(loud, "DepositSkipped", strategy)[0]["reason"] == DUST
+    return loud.gas_used - quiet.gas_used
+
+
+def test_deposit_and_withdraw_events(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    rollback,
+):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    harvest = strategy.harvest({"from": gov})
+
+    wrapped = ours(harvest, "AnyWftmWrapped", strategy)[0]["amount"]
+    deposited = ours(harvest, "Deposited", strategy)[0]
+    assert deposited["anyWftmIn"] <= wrapped
+    assert deposited["wftmIn"] + deposited["anyWftmIn"] <= amount
+    assert deposited["lpMinted"] == strategy.balanceOfLPStaked()
+    assert ours(harvest, "DepositSkipped", strategy) == []
+
+    # pull half back out through the vault
+    chain.sleep(1)
+    withdraw = vault.withdraw(vault.balanceOf(whale) / 2, whale, 100, {"from": whale})
+    withdrawn = ours(withdraw, "Withdrawn", strategy)[0]
+    assert withdrawn["lpBurned"] > 0
+    assert withdrawn["wftmOut"] > 0 and withdrawn["anyWftmOut"] > 0
+    assert ours(withdraw, "AnyWftmUnwrapped", strategy)[0]["amount"] >= withdrawn["anyWftmOut"]
+
+    # Deposited and Withdrawn log one word more than DepositSkipped, call it double to be safe
+    per_event = 2 * emit_gas(strategy, token, whale, gov, rollback)
+    print("\none event costs at most", per_event)
+    print("harvest gas:", harvest.gas_used, "spent on our events:", per_event * count_ours(harvest, strategy))
+    print("withdraw gas:", withdraw.gas_used, "spent on our events:", per_event * count_ours(withdraw, strategy))
+    # events should be a rounding error on either path
+    assert per_event * count_ours(harvest, strategy) < harvest.gas_used / 50
+    assert per_event * count_ours(withdraw, strategy) < withdraw.gas_used / 50
+
+
+def test_deposit_skipped_events(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    anyWFTM,
+    solidex_router,
+):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    token.approve(solidex_router, 2 ** 256 - 1, {"from": whale})
+    strategy.setDoHealthCheck(False, {"from": gov})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+
+    # a little dust isn't worth depositing
+    token.transfer(strategy, 1e16, {"from": whale})
+    tx = strategy.tend({"from": gov})
+    skipped = ours(tx, "DepositSkipped", strategy)[0]
+    assert skipped["reason"] == DUST
+    assert 1e16 <= skipped["observed"] <= 1e17
+
+    # knock the pool off peg, the next deposit is skipped with the quote we saw
+    while strategy.lpPriceOk():
+        solidex_router.swapExactTokensForTokens(
+            amount, 0, [[token, anyWFTM, True]], whale, 2 ** 256 - 1, {"from": whale}
+        )
+    token.transfer(strategy, amount / 10, {"from": whale})
+    tx = strategy.tend({"from": gov})
+    skipped = ours(tx, "DepositSkipped", strategy)[0]
+    assert skipped["reason"] == LP_PRICE
+    assert skipped["observed"] < 1e18 * strategy.lpSlippage() / 10_000
+    assert ours(tx, "Deposited", strategy) == []
+
+    # nothing goes in once we're exiting, which is only worth a log when there's more than dust
+    strategy.setEmergencyExit({"from": gov})
+    strategy.setDoHealthCheck(False, {"from": gov})
+    tx = strategy.harvest({"from": gov})
+    assert ours(tx, "DepositSkipped", strategy) == []
+    token.transfer(strategy, 1e16, {"from": whale})
+    assert ours(strategy.tend({"from": gov}), "DepositSkipped", strategy) == []
+    token.transfer(strategy, amount / 10, {"from": whale})
+    skipped = ours(strategy.tend({"from": gov}), "DepositSkipped", strategy)[0]
+    assert skipped["reason"] == EMERGENCY_EXIT
+    assert skipped["observed"] == strategy.idleFunds()
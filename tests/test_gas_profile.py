@@ -0,0 +1,92 @@
+import brownie
+from brownie import Contract
+import json
+
+from scripts.gas_profile import diff, folded_lines, format_diff, format_profile, profile
+
+
+def test_gas_profile_harvest(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+
+    # simulate 12 hours of earnings
+    chain.sleep(43200)
+    chain.mine(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    tx = strategy.harvest({"from": gov})
+
+    prof = profile(tx)
+    print("\n" + format_profile(prof))
+
+    # harvest talks to the vault, the lp depositor and the pool at the very least
+    assert len(prof["calls"]) > 0
+    assert prof["root"] == "Strategy.harvest"
+    assert prof["execution"] <= tx.gas_used
+    top = [call for call in prof["calls"] if call["parent"] is None]
+    assert len(top) > 0
+    assert any(call["to"].lower() == vault.address.lower() for call in top)
+
+    # exclusive gas adds back up to the whole execution, nothing counted twice
+    assert all(gas >= 0 for gas in prof["folded"].values())
+    assert sum(prof["folded"].values()) == prof["execution"]
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in folded_lines(prof)) == prof["execution"]
+
+    # calls we made are attributed to lines in our own source
+    assert any("Strategy.sol" in site for site in prof["sites"])
+
+    # profiles are what we save and diff, so they have to survive json
+    assert json.loads(json.dumps(prof))["execution"] == prof["execution"]
+
+
+def test_gas_profile_diff(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    rollback,
+):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    strategy.removeTradeFactoryPermissions({"from": gov})
+
+    chain.sleep(43200)
+    chain.mine(1)
+
+    # same harvest twice, once leaving rewards where they are and once selling them inline
+    with rollback():
+        strategy.setDoHealthCheck(False, {"from": gov})
+        before = profile(strategy.harvest({"from": gov}))
+    strategy.setSellRewardsOnHarvest(True, 9900, False, {"from": gov})
+    strategy.setDoHealthCheck(False, {"from": gov})
+    after = profile(strategy.harvest({"from": gov}))
+
+    print("\n" + format_diff(before, after))
+    rows = diff(before, after)
+    assert len(rows) > 0
+
+    # the swaps are new stacks, and they're where the extra gas went
+    new_stacks = [row for row in rows if row[1] == 0]
+    assert len(new_stacks) > 0
+    assert after["gas_used"] > before["gas_used"]
+    assert sum(row[3] for row in new_stacks) > 0
+
+    # nothing moves against itself
+    assert diff(after, after) == []
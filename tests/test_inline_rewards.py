@@ -0,0 +1,164 @@
+import brownie
+from brownie import Contract
+from brownie import config
+import math
+
+
+
+def sold(tx, strategy):
+    if "RewardsSold" not in tx.events:
+        return []
+    return [event for event in tx.events["RewardsSold"] if event.address == strategy.address]
+
+
+def test_inline_reward_selling(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    sex,
+    solid,
+    rollback,
+):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+
+    # no trade factory, so nobody sells our rewards unless we do it ourselves
+    strategy.removeTradeFactoryPermissions({"from": gov})
+    strategy.setSellRewardsOnHarvest(True, 9900, False, {"from": gov})
+
+    # simulate 12 hours of earnings
+    chain.sleep(43200)
+    chain.mine(1)
+
+    with rollback():
+        strategy.setDoHealthCheck(False, {"from": gov})
+        inline = strategy.harvest({"from": gov})
+        events = sold(inline, strategy)
+        assert len(events) > 0
+        assert sex.balanceOf(strategy) < 1e15
+        assert solid.balanceOf(strategy) < 1e15
+
+        # the proceeds show up as profit in the same harvest
+        inline_profit = inline.events["Harvested"]["profit"]
+        proceeds = sum(event["wftmOut"] for event in events)
+        assert inline_profit >= proceeds
+
+    # same harvest with rewards left for a trade factory that isn't there
+    strategy.setSellRewardsOnHarvest(False, 9900, False, {"from": gov})
+    strategy.setDoHealthCheck(False, {"from": gov})
+    deferred = strategy.harvest({"from": gov})
+    assert sold(deferred, strategy) == []
+    assert sex.balanceOf(strategy) > 0 or solid.balanceOf(strategy) > 0
+    assert deferred.events["Harvested"]["profit"] < inline_profit
+
+    print("\nharvest gas selling inline:", inline.gas_used, "leaving rewards:", deferred.gas_used)
+    print("extra gas:", inline.gas_used - deferred.gas_used, "for", proceeds / 1e18, "wftm of profit now")
+
+
+def test_inline_reward_selling_uses_twap(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    sex,
+):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    strategy.removeTradeFactoryPermissions({"from": gov})
+    strategy.setSellRewardsOnHarvest(True, 9900, False, {"from": gov})
+
+    # someone buys up sex and sits on it, so the pair's twap has it well up
+    router = Contract("0xa38cd27185a464914D3046f0AB9d43356B34829D")
+    pair = Contract(router.pairFor(sex, token, False))
+    reserves = pair.getReserves()
+    wftm_reserve = reserves[0] if pair.token0() == token.address else reserves[1]
+    token.approve(router, 2 ** 256 - 1, {"from": whale})
+    router.swapExactTokensForTokens(
+        min(wftm_reserve // 5, token.balanceOf(whale) // 2),
+        0,
+        [(token, sex, False)],
+        whale,
+        2 ** 256 - 1,
+        {"from": whale},
+    )
+    chain.sleep(43200)
+    chain.mine(1)
+
+    # then dumps it right before our harvest. the spot price is back down, the twap isn't, so we hold
+    sex.approve(router, 2 ** 256 - 1, {"from": whale})
+    router.swapExactTokensForTokens(
+        sex.balanceOf(whale), 0, [(sex, token, False)], whale, 2 ** 256 - 1, {"from": whale}
+    )
+    strategy.setDoHealthCheck(False, {"from": gov})
+    tx = strategy.harvest({"from": gov})
+    assert all(event["token"] != sex.address for event in sold(tx, strategy))
+    assert sex.balanceOf(strategy) > 0
+
+    # below 1% takes force, and then the next harvest sells it anyway
+    with brownie.reverts("slippage below 9900 needs force"):
+        strategy.setSellRewardsOnHarvest(True, 5_000, False, {"from": gov})
+    strategy.setSellRewardsOnHarvest(True, 5_000, True, {"from": gov})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    tx = strategy.harvest({"from": gov})
+    assert any(event["token"] == sex.address for event in sold(tx, strategy))
+
+
+def test_inline_reward_selling_not_with_trade_factory(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+
+    # the trade factory gets first dibs when we have one
+    strategy.setSellRewardsOnHarvest(True, 9900, False, {"from": gov})
+    assert strategy.tradesEnabled()
+    chain.sleep(43200)
+    chain.mine(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    tx = strategy.harvest({"from": gov})
+    assert sold(tx, strategy) == []
+
+
+def test_inline_reward_selling_setter(gov, strategy, whale):
+    # the default is one the setter would take without force
+    assert strategy.rewardSellSlippage() == 9900
+    with brownie.reverts():
+        strategy.setSellRewardsOnHarvest(True, 9900, False, {"from": whale})
+    with brownie.reverts("higher than max"):
+        strategy.setSellRewardsOnHarvest(True, 10_001, True, {"from": gov})
+    with brownie.reverts("slippage below 9900 needs force"):
+        strategy.setSellRewardsOnHarvest(True, 9800, False, {"from": gov})
+
+    strategy.setSellRewardsOnHarvest(True, 9900, False, {"from": gov})
+    assert strategy.sellRewardsOnHarvest()
+    assert strategy.rewardSellSlippage() == 9900
+    strategy.setSellRewardsOnHarvest(True, 9800, True, {"from": gov})
+    assert strategy.rewardSellSlippage() == 9800
+    # turning it off ignores the slippage and leaves ours alone
+    strategy.setSellRewardsOnHarvest(False, 0, False, {"from": gov})
+    assert not strategy.sellRewardsOnHarvest()
+    assert strategy.rewardSellSlippage() == 9800
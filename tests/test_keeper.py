@@ -0,0 +1,190 @@
+import brownie
+from brownie import Contract, MultiHarvester
+from brownie import config
+import math
+
+from scripts.keeper import (
+    Preflight,
+    harvest_due,
+    harvest_if_worth_it,
+    preflight_harvest,
+    predict_report,
+    worth_sending,
+)
+
+
+def test_predict_report():
+    # profit, debt outstanding is paid in full
+    assert predict_report(110, 100, 5, False) == (10, 0, 5)
+    # loss we don't realise
+    assert predict_report(90, 100, 5, False) == (0, 0, 0)
+    # loss eats into the debt payment
+    assert predict_report(90, 100, 15, True) == (0, 10, 5)
+    assert predict_report(90, 100, 5, True) == (0, 10, 0)
+
+
+def test_worth_sending_when_selling_rewards():
+    # no profit we can see, so normally the gas isn't worth it
+    preflight = Preflight(True, None, 0, 0, 0, 0, True, 500_000, 10 ** 16, False)
+    assert not worth_sending(preflight)
+    # but a harvest that sells rewards makes profit the prediction doesn't include
+    assert worth_sending(preflight._replace(sells_rewards=True))
+    # and it still has to go through
+    assert not worth_sending(preflight._replace(sells_rewards=True, ok=False))
+    assert not worth_sending(preflight._replace(sells_rewards=True, health_ok=False))
+
+
+def test_preflight_sends_healthy_harvest(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    keeper,
+):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(1)
+
+    # a small donation, well inside the health check's profit limit
+    donation = amount / 100
+    token.transfer(strategy, donation, {"from": whale})
+    chain.sleep(1)
+
+    preflight = preflight_harvest(strategy, keeper, gas_price=1e9)
+    assert preflight.ok
+    assert preflight.health_ok
+    assert preflight.loss == 0
+    assert preflight.gas > 0
+    assert preflight.gas_cost == preflight.gas * 1e9
+
+    nonce = keeper.nonce
+    predicted, tx = harvest_if_worth_it(strategy, keeper, 3, gas_price=1e9)
+    assert tx is not None
+    assert keeper.nonce == nonce + 1
+
+    # the numbers we predicted are what the strategy reported
+    harvested = tx.events["Harvested"]
+    assert math.isclose(harvested["profit"], predicted.profit, rel_tol=1e-6)
+    assert harvested["loss"] == predicted.loss
+    assert harvested["debtPayment"] == predicted.debt_payment
+    assert harvested["debtOutstanding"] == predicted.debt_outstanding
+    assert tx.gas_used <= predicted.gas
+
+
+def test_preflight_skips_unhealthy_harvest(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    keeper,
+):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(1)
+
+    # half our debt as profit blows through the 10% profit limit set in conftest
+    token.transfer(strategy, amount / 2, {"from": whale})
+    chain.sleep(1)
+    assert strategy.doHealthCheck() == True
+
+    preflight = preflight_harvest(strategy, keeper, gas_price=1e9)
+    assert not preflight.ok
+    assert "!healthcheck" in preflight.reason
+    assert not preflight.health_ok
+    assert preflight.profit > 0
+
+    # nothing goes out, and forcing it doesn't change that
+    nonce = keeper.nonce
+    _, tx = harvest_if_worth_it(strategy, keeper, 3, gas_price=1e9, forced=True)
+    assert tx is None
+    assert keeper.nonce == nonce
+
+    # it really would have reverted
+    with brownie.reverts("!healthcheck"):
+        strategy.harvest({"from": keeper})
+
+
+def test_preflight_skips_harvest_not_worth_the_gas(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    keeper,
+):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(1)
+
+    # a dust of profit at a silly gas price
+    token.transfer(strategy, 1e15, {"from": whale})
+    chain.sleep(1)
+
+    nonce = keeper.nonce
+    preflight, tx = harvest_if_worth_it(strategy, keeper, 3, gas_price=1000e9)
+    assert preflight.ok
+    assert preflight.profit < preflight.gas_cost * 3
+    assert tx is None
+    assert keeper.nonce == nonce
+
+    # but it still goes if we insist
+    _, tx = harvest_if_worth_it(strategy, keeper, 3, gas_price=1000e9, forced=True)
+    assert tx is not None
+
+
+def test_harvest_due_through_multi_harvester(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    keeper,
+):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(1)
+
+    harvester = MultiHarvester.deploy(gov, {"from": gov})
+    harvester.setKeeper(keeper, True, {"from": gov})
+    strategy.setKeeper(harvester, {"from": gov})
+    strategy.setForceHarvestTriggerOnce(True, {"from": gov})
+    token.transfer(strategy, amount / 100, {"from": whale})
+    chain.sleep(1)
+
+    # we aren't the strategy's keeper any more, so a dry run as ourselves fails
+    assert not preflight_harvest(strategy, keeper, gas_price=1e9).ok
+
+    nonce = keeper.nonce
+    preflights, tx = harvest_due(harvester, [strategy], keeper, 3, gas_price=1e9)
+    assert preflights[strategy].ok
+    assert tx is not None
+    assert keeper.nonce == nonce + 1
+    assert tx.events["HarvestSucceeded"]["strategy"] == strategy
+    assert tx.return_value == 1
+    assert tx.events["Harvested"]["profit"] > 0
@@ -0,0 +1,155 @@
+import brownie
+from brownie import Contract, MultiHarvester, Strategy
+import pytest
+
+
+
+def clones(strategy, vault, strategist, rewards, keeper, gov, count):
+    # share the vault between the original and its clones
+    vault.updateStrategyDebtRatio(strategy, 10_000 // (count + 1), {"from": gov})
+    out = [strategy]
+    for i in range(count):
+        tx = strategy.cloneStrategy(vault, strategist, rewards, keeper, f"clone{i}", {"from": gov})
+        clone = Strategy.at(tx.events["Cloned"]["clone"])
+        vault.addStrategy(clone, 10_000 // (count + 1), 0, 2 ** 256 - 1, 1_000, {"from": gov})
+        out.append(clone)
+    return out
+
+
+def by_strategy(tx, name):
+    if name not in tx.events:
+        return {}
+    return {event["strategy"]: event for event in tx.events[name]}
+
+
+@pytest.fixture
+def setup(gov, token, vault, whale, strategy, strategist, rewards, keeper, chain, amount):
+    strategies = clones(strategy, vault, strategist, rewards, keeper, gov, 2)
+    harvester = MultiHarvester.deploy(gov, {"from": gov})
+    harvester.setKeeper(keeper, True, {"from": gov})
+    for s in strategies:
+        s.setKeeper(harvester, {"from": gov})
+        s.setDoHealthCheck(False, {"from": gov})
+
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    harvester.harvestAll(strategies, {"from": keeper})
+    for s in strategies:
+        s.setDoHealthCheck(False, {"from": gov})
+
+    # past maxReportDelay, so every trigger is true
+    chain.sleep(43200 + 1)
+    chain.mine(1)
+    return harvester, strategies
+
+
+def test_multi_harvester_harvests_due(setup, keeper, whale, gov, token, chain):
+    harvester, strategies = setup
+    assert all(harvester.harvestTriggers(strategies, 0))
+
+    # one of them has taken us off as keeper, and two addresses aren't strategies at all
+    broken = strategies[1]
+    broken.setKeeper(keeper, {"from": gov})
+    batch = strategies + [token.address, whale.address]
+    tx = harvester.harvestDue(batch, 0, {"from": keeper})
+
+    harvested = by_strategy(tx, "HarvestSucceeded")
+    failed = by_strategy(tx, "HarvestFailed")
+    assert set(harvested) == {strategies[0].address, strategies[2].address}
+    assert set(failed) == {broken.address, token.address, whale.address}
+    assert bytes(failed[whale.address]["reason"]) == b"!contract"
+    assert tx.return_value == 2
+    assert all(event["gasUsed"] > 0 for event in harvested.values())
+    assert strategies[0].harvestTrigger(0) == False
+
+    # nothing is due straight after, everything gets a skip and nothing is harvested
+    for s in strategies:
+        s.setDoHealthCheck(False, {"from": gov})
+    chain.sleep(1)
+    tx = harvester.harvestDue([strategies[0], strategies[2]], 0, {"from": keeper})
+    assert set(by_strategy(tx, "HarvestSkipped")) == {strategies[0].address, strategies[2].address}
+    assert "HarvestSucceeded" not in tx.events
+
+
+def test_multi_harvester_tends_due(setup, keeper, whale, gov, token, amount):
+    harvester, strategies = setup
+
+    # the helper is keeper now, so our keeper can't tend directly any more
+    with brownie.reverts():
+        strategies[0].tend({"from": keeper})
+
+    # loose wftm on two of them, the third has nothing to put to work
+    for s in (strategies[0], strategies[2]):
+        token.transfer(s, amount / 10, {"from": whale})
+    tx = harvester.tendDue(strategies + [whale.address], 0, {"from": keeper})
+
+    assert set(by_strategy(tx, "TendSucceeded")) == {strategies[0].address, strategies[2].address}
+    assert set(by_strategy(tx, "TendSkipped")) == {strategies[1].address}
+    assert bytes(by_strategy(tx, "TendFailed")[whale.address]["reason"]) == b"!contract"
+    assert tx.return_value == 2
+    assert all(s.idleFunds() <= 1e17 for s in strategies)
+    assert "HarvestSucceeded" not in tx.events
+
+
+def test_multi_harvester_caps_gas_per_call(setup, keeper, whale, gov):
+    harvester, strategies = setup
+    with brownie.reverts("!governance"):
+        harvester.setGasPerCall(100_000, {"from": keeper})
+
+    # a harvest needs far more than this, each one runs out on its own and the batch still goes through
+    harvester.setGasPerCall(100_000, {"from": gov})
+    tx = harvester.harvestAll(strategies, {"from": keeper})
+    failed = by_strategy(tx, "HarvestFailed")
+    assert set(failed) == {s.address for s in strategies}
+    assert all(bytes(event["reason"]) == b"" for event in failed.values())
+    assert tx.return_value == 0
+
+    harvester.setGasPerCall(5_000_000, {"from": gov})
+    tx = harvester.harvestAll(strategies, {"from": keeper})
+    assert tx.return_value == len(strategies)
+    assert all(event["gasUsed"] < 5_000_000 for event in by_strategy(tx, "HarvestSucceeded").values())
+
+
+def test_multi_harvester_permissions(setup, keeper, whale, gov):
+    harvester, strategies = setup
+    with brownie.reverts("!keeper"):
+        harvester.harvestDue(strategies, 0, {"from": whale})
+    with brownie.reverts("!keeper"):
+        harvester.harvestAll(strategies, {"from": whale})
+    with brownie.reverts("!keeper"):
+        harvester.tendDue(strategies, 0, {"from": whale})
+    with brownie.reverts("!governance"):
+        harvester.setKeeper(whale, True, {"from": keeper})
+
+    harvester.setKeeper(keeper, False, {"from": gov})
+    with brownie.reverts("!keeper"):
+        harvester.harvestAll(strategies, {"from": keeper})
+
+    harvester.setGovernance(whale, {"from": gov})
+    with brownie.reverts("!pendingGovernance"):
+        harvester.acceptGovernance({"from": keeper})
+    harvester.acceptGovernance({"from": whale})
+    assert harvester.governance() == whale
+
+
+def test_multi_harvester_gas(setup, keeper, gov, rollback):
+    harvester, strategies = setup
+
+    # one keeper transaction per strategy, what we do today. the helper is keeper so it goes through governance
+    single = []
+    with rollback():
+        for s in strategies:
+            single.append(s.harvest({"from": gov}).gas_used)
+
+    with rollback():
+        due = harvester.harvestDue(strategies, 0, {"from": keeper}).gas_used
+    forced = harvester.harvestAll(strategies, {"from": keeper}).gas_used
+
+    count = len(strategies)
+    print(f"\n{count} separate harvests: {sum(single):,} gas, {sum(single) // count:,} each")
+    print(f"harvestAll: {forced:,} gas, saves {(sum(single) - forced) // count:,} per strategy")
+    print(f"harvestDue: {due:,} gas, saves {(sum(single) - due) // count:,} per strategy with the on-chain trigger check")
+
+    # at the very least the 21k base cost of every transaction but the first is gone
+    assert forced < sum(single)
+    assert sum(single) - forced > 21_000 * (count - 1) * 0.8
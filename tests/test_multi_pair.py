@@ -0,0 +1,133 @@
+import brownie
+from brownie import Contract
+from brownie import config
+import math
+
+
+# one multi-pair strategy against one single-pair strategy per pair, all on the same vault
+def test_multi_pair_harvest_gas(
+    StrategyMultiPair,
+    usdc_vault,
+    usdc,
+    wftm,
+    whale,
+    gov,
+    strategist,
+    keeper,
+    chain,
+    spooky_router,
+    stable_lps,
+    trade_factory,
+    ymechs_safe,
+    sex,
+    solid,
+):
+    n = len(stable_lps)
+    weights = [10_000 // n] * n
+    weights[-1] += 10_000 - sum(weights)
+
+    multi = strategist.deploy(
+        StrategyMultiPair, usdc_vault, "usdc_stables_solidex", stable_lps, weights
+    )
+    singles = [
+        strategist.deploy(
+            StrategyMultiPair, usdc_vault, "usdc_single_solidex", [lp], [10_000]
+        )
+        for lp in stable_lps
+    ]
+
+    # half of the vault goes to the multi-pair strategy, the other half is split between the singles
+    usdc_vault.addStrategy(multi, 5_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+    for single in singles:
+        usdc_vault.addStrategy(
+            single, 5_000 // n, 0, 2 ** 256 - 1, 1_000, {"from": gov}
+        )
+    for strat in [multi] + singles:
+        trade_factory.grantRole(
+            trade_factory.STRATEGY(), strat, {
+                "from": ymechs_safe, "gas_price": "0 gwei"}
+        )
+        strat.setKeeper(keeper, {"from": gov})
+        strat.setDoHealthCheck(False, {"from": gov})
+
+    # get some usdc for our whale
+    wftm.approve(spooky_router, 2 ** 256 - 1, {"from": whale})
+    spooky_router.swapExactTokensForTokens(
+        5000e18, 0, [wftm, usdc], whale, 2 ** 256 - 1, {"from": whale}
+    )
+    amount = usdc.balanceOf(whale)
+    usdc.approve(usdc_vault, 2 ** 256 - 1, {"from": whale})
+    usdc_vault.deposit(amount, {"from": whale})
+
+    for strat in [multi] + singles:
+        strat.harvest({"from": gov})
+    chain.sleep(1)
+
+    # every pair should be staked
+    for lp in stable_lps:
+        assert multi.balanceOfLPStaked(lp) > 0
+    assert multi.estimatedTotalAssets() > amount * 0.49
+
+    # simulate 12 hours of earnings, then compare harvest costs
+    chain.sleep(43200)
+    chain.mine(1)
+
+    multi_gas = multi.harvest({"from": gov}).gas_used
+    single_gas = [single.harvest({"from": gov}).gas_used for single in singles]
+
+    # rewards for every pair are claimed in the one call, and wait for yswaps
+    assert sex.balanceOf(multi) > 0 or solid.balanceOf(multi) > 0
+
+    print("\nPairs:", n)
+    print("Multi-pair harvest gas:", multi_gas, "per pair:", multi_gas / n)
+    print("Single-pair harvest gas:", single_gas,
+          "per pair:", sum(single_gas) / n)
+    assert multi_gas < sum(single_gas)
+
+    # and we can get all of our money back out
+    chain.sleep(43200)
+    chain.mine(1)
+    usdc_vault.withdraw(usdc_vault.balanceOf(whale), whale, 10, {"from": whale})
+    assert usdc.balanceOf(whale) >= amount * 0.999
+
+
+def test_multi_pair_weights(
+    StrategyMultiPair,
+    usdc_vault,
+    strategist,
+    gov,
+    whale,
+    stable_lps,
+):
+    multi = strategist.deploy(
+        StrategyMultiPair, usdc_vault, "usdc_stables_solidex", stable_lps, [
+            5_000, 5_000]
+    )
+    assert multi.numberOfPairs() == len(stable_lps)
+
+    multi.setWeights([2_500, 7_500], {"from": gov})
+    assert multi.weights(1) == 7_500
+
+    with brownie.reverts():
+        multi.setWeights([2_500, 2_500], {"from": gov})
+    with brownie.reverts():
+        multi.setWeights([10_000], {"from": gov})
+    with brownie.reverts():
+        multi.setWeights([5_000, 5_000], {"from": whale})
+
+
+def test_multi_pair_rejects_duplicate_pairs(
+    StrategyMultiPair,
+    usdc_vault,
+    strategist,
+    stable_lps,
+):
+    # the same pair twice would double count it in estimatedTotalAssets
+    with brownie.reverts("duplicate pair"):
+        strategist.deploy(
+            StrategyMultiPair,
+            usdc_vault,
+            "usdc_stables_solidex",
+            [stable_lps[0], stable_lps[0]],
+            [5_000, 5_000],
+        )
@@ -0,0 +1,115 @@
+import brownie
+from brownie import Contract, web3
+from argparse import Namespace
+from pathlib import Path
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from scripts.build_abi_bundle import build, vault_entries
+from scripts.ops_cli import BUNDLE, Rpc, cmd_state, cmd_triggers, load_bundle, signature, _type
+from scripts.vault_model import snapshot
+
+ROOT = Path(__file__).parent.parent
+
+
+def _normalized(abi):
+    return {
+        (
+            e["type"],
+            e.get("name"),
+            tuple(_type(i) for i in e.get("inputs", [])),
+            tuple(_type(o) for o in e.get("outputs", [])),
+            e.get("stateMutability"),
+        )
+        for e in abi
+        if e["type"] in ("function", "event")
+    }
+
+
+# the shipped bundle has to keep up with the contracts, run `brownie run build_abi_bundle` if this fails
+def test_abi_bundle_matches_build(Strategy, pm):
+    from brownie import config
+
+    bundle = json.loads(BUNDLE.read_text())
+    assert _normalized(bundle["Strategy"]) == _normalized(Strategy.abi)
+
+    vault_abi = pm(config["dependencies"][0]).Vault.abi
+    assert _normalized(bundle["Vault"]) == _normalized(vault_entries(vault_abi))
+
+
+def test_ops_cli_startup():
+    cmd = [sys.executable, str(ROOT / "scripts" / "ops_cli.py"), "encode", "setLpSlippage", "9990"]
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, capture_output=True)
+        times.append(time.perf_counter() - start)
+
+    print("\nops cli startup, best:", min(times), "median:", statistics.median(times))
+    assert statistics.median(times) < 1
+
+    # and brownie never gets imported
+    check = "import sys; sys.path.insert(0, 'scripts'); import ops_cli; assert 'brownie' not in sys.modules"
+    subprocess.run([sys.executable, "-c", check], check=True, cwd=ROOT)
+
+
+def test_ops_cli_encode_matches_brownie(strategy):
+    out = subprocess.run(
+        [sys.executable, str(ROOT / "scripts" / "ops_cli.py"), "encode", "setLpSlippage(uint256,bool)", "9900", "true"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    assert json.loads(out.stdout)["calldata"] == strategy.setLpSlippage["uint256,bool"].encode_input(9900, True)
+
+
+def test_ops_cli_reads_chain(gov, token, vault, whale, strategy, chain, amount):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.mine(1)
+
+    rpc = Rpc(web3.provider.endpoint_uri)
+    state = cmd_state(load_bundle(), rpc, Namespace(strategy=strategy.address))
+    assert state["estimatedTotalAssets"] == strategy.estimatedTotalAssets()
+    assert state["balanceOfLPStaked"] == strategy.balanceOfLPStaked()
+    assert state["vaultParams"]["totalDebt"] == vault.strategies(strategy).dict()["totalDebt"]
+
+    triggers = cmd_triggers(load_bundle(), rpc, Namespace(strategy=strategy.address, call_cost=0))
+    assert triggers["harvestTrigger"] == strategy.harvestTrigger(0)
+    assert triggers["tendTrigger"] == strategy.tendTrigger(0)
+
+
+# what build_abi_bundle writes, not what's checked in, has to work with the cli and the vault model.
+# the full vault abi has overloads the checked in bundle never had
+def test_rebuilt_bundle_reads_chain(gov, token, vault, whale, strategy, chain, amount, pm, tmp_path):
+    from brownie import config, project
+
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.mine(1)
+
+    root = project.get_loaded_projects()[0]._path
+    vault_root = pm(config["dependencies"][0])._path
+    path = tmp_path / "abi_bundle.json"
+    build(root, vault_root, path)
+    bundle = load_bundle(path)
+
+    rpc = Rpc(web3.provider.endpoint_uri)
+    state = cmd_state(bundle, rpc, Namespace(strategy=strategy.address))
+    assert state["estimatedTotalAssets"] == strategy.estimatedTotalAssets()
+    assert state["creditAvailable"] == vault.creditAvailable(strategy)
+    assert state["debtOutstanding"] == vault.debtOutstanding(strategy)
+    assert state["vaultParams"]["totalDebt"] == vault.strategies(strategy).dict()["totalDebt"]
+
+    model = snapshot(rpc, vault.address, [strategy.address], bundle=bundle)
+    assert model.total_debt == vault.totalDebt()
+    assert model.credit_available(strategy.address) == vault.creditAvailable(strategy)
@@ -0,0 +1,152 @@
+import brownie
+from brownie import Contract, MultiHarvester
+from brownie import config
+import math
+import pytest
+
+from scripts.peg_watcher import PegWatcher, idle_blocks, peg_ok, synthetic_reserves
+
+
+def knock_off_peg(router, token_in, token_out, strategy, whale, step):
+    # keep pushing one side into the pool until the strategy's own guard fails
+    route = [[token_in, token_out, True]]
+    swapped = 0
+    while strategy.lpPriceOk():
+        router.swapExactTokensForTokens(step, 0, route, whale, 2 ** 256 - 1, {"from": whale})
+        swapped += step
+    return swapped
+
+
+# our reserve based check should agree with lpPriceOk, which goes through the router
+def test_peg_model_matches_strategy(
+    strategy, solidex_router, wftm, anyWFTM, whale, amount, gov
+):
+    pair = Contract(strategy.lpToken())
+    wftm.approve(solidex_router, 2 ** 256 - 1, {"from": whale})
+    wftm.approve(anyWFTM, 2 ** 256 - 1, {"from": whale})
+    anyWFTM.approve(solidex_router, 2 ** 256 - 1, {"from": whale})
+    anyWFTM.deposit(amount * 10, {"from": whale})
+
+    for slippage in [9990, 9995, 9999]:
+        strategy.setLpSlippage["uint256,bool"](slippage, True, {"from": gov})
+        for token_in, token_out in [(wftm, anyWFTM), (anyWFTM, wftm)]:
+            for _ in range(4):
+                (dec0, dec1, r0, r1, stable, _, _) = pair.metadata()
+                assert peg_ok(r0, r1, dec0, dec1, slippage, stable) == strategy.lpPriceOk()
+                solidex_router.swapExactTokensForTokens(
+                    amount, 0, [[token_in, token_out, True]], whale, 2 ** 256 - 1, {"from": whale}
+                )
+
+
+@pytest.mark.parametrize("through_helper", [False, True])
+def test_watcher_tends_when_peg_recovers(
+    through_helper,
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    keeper,
+    anyWFTM,
+    solidex_router,
+):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    token.approve(solidex_router, 2 ** 256 - 1, {"from": whale})
+    token.approve(anyWFTM, 2 ** 256 - 1, {"from": whale})
+    anyWFTM.approve(solidex_router, 2 ** 256 - 1, {"from": whale})
+    strategy.setDoHealthCheck(False, {"from": gov})
+
+    # pool goes off peg before our first harvest, so the deposit is skipped
+    swapped = knock_off_peg(solidex_router, token, anyWFTM, strategy, whale, amount)
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+    assert strategy.balanceOfLPStaked() == 0
+    assert strategy.idleFunds() >= amount
+
+    # with a MultiHarvester as keeper the tend has to go through it
+    harvester = None
+    if through_helper:
+        harvester = MultiHarvester.deploy(gov, {"from": gov})
+        harvester.setKeeper(keeper, True, {"from": gov})
+        strategy.setKeeper(harvester, {"from": gov})
+    watcher = PegWatcher(strategy, keeper, harvester=harvester)
+    assert watcher.poll() is None
+    chain.mine(1)
+    assert watcher.poll() is None
+
+    # someone arbs it back, the very next poll puts our funds to work
+    anyWFTM.deposit(swapped, {"from": whale})
+    while not strategy.lpPriceOk():
+        solidex_router.swapExactTokensForTokens(
+            amount, 0, [[anyWFTM, token, True]], whale, 2 ** 256 - 1, {"from": whale}
+        )
+    tx = watcher.poll()
+    assert tx is not None
+    if through_helper:
+        assert tx.events["TendSucceeded"]["strategy"] == strategy
+    assert strategy.idleFunds() <= 1e17
+    assert strategy.balanceOfLPStaked() > 0
+
+    # nothing more to do until the peg breaks and comes back again
+    assert watcher.poll() is None
+
+
+def test_watcher_only_acts_on_first_poll_or_recovery(
+    token,
+    whale,
+    strategy,
+    keeper,
+):
+    # healthy pool and nothing idle when we start, so the first poll has nothing to do
+    assert strategy.lpPriceOk()
+    watcher = PegWatcher(strategy, keeper)
+    assert watcher.poll() is None
+
+    # funds turning up later with the peg fine all along is the keepers' job, not ours
+    token.transfer(strategy, 10e18, {"from": whale})
+    assert strategy.idleFunds() > 1e17
+    assert watcher.poll() is None
+    assert watcher.actions == []
+
+
+def test_watcher_can_force_harvest_instead(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    anyWFTM,
+    solidex_router,
+):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    token.approve(solidex_router, 2 ** 256 - 1, {"from": whale})
+    strategy.setDoHealthCheck(False, {"from": gov})
+    knock_off_peg(solidex_router, token, anyWFTM, strategy, whale, amount)
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+
+    watcher = PegWatcher(strategy, gov, mode="force")
+    assert watcher.poll() is None
+    assert strategy.harvestTrigger(0) == False
+
+    # loosen our guard instead of moving the pool, the watcher picks it up on its next poll
+    strategy.setLpSlippage["uint256,bool"](9000, True, {"from": gov})
+    assert watcher.poll() is not None
+    assert strategy.harvestTrigger(0) == True
+
+
+def test_watcher_backtest_cuts_idle_time():
+    history = synthetic_reserves(blocks=10_000, seed=1)
+    oks = [peg_ok(r0, r1, 10 ** 18, 10 ** 18, 9995) for _, r0, r1 in history]
+    assert False in oks and True in oks
+
+    baseline = idle_blocks(oks, 1800, False)
+    watched = idle_blocks(oks, 1800, True)
+    print(f"\nidle unit-blocks {baseline} -> {watched}")
+    assert watched < baseline
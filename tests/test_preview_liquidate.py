@@ -0,0 +1,65 @@
+from argparse import Namespace
+
+from brownie import accounts, web3
+
+from scripts.ops_cli import Rpc, cmd_preview, load_bundle
+
+
+def test_preview_liquidate_matches_withdraw(gov, token, vault, whale, strategy, chain, amount, anyWFTM, rollback):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(1)
+
+    # some loose anyWFTM too, so the unwrap before we touch the lp shows up
+    token.approve(anyWFTM, 2 ** 256 - 1, {"from": whale})
+    anyWFTM.deposit(amount // 1_000, {"from": whale})
+    anyWFTM.transfer(strategy, amount // 1_000, {"from": whale})
+
+    # call the strategy as the vault does, so we see exactly what liquidatePosition was asked for
+    vault_account = accounts.at(vault, force=True)
+    assets = strategy.estimatedTotalAssets()
+    for needed in [amount // 10_000, amount // 100, amount // 2, assets, assets * 2]:
+        lp_to_unstake, lp_to_burn, wftm_out, any_out, loss = strategy.previewLiquidate(needed)
+
+        with rollback():
+            staked = strategy.balanceOfLPStaked()
+            vault_before = token.balanceOf(vault)
+            tx = strategy.withdraw(needed, {"from": vault_account})
+
+            assert staked - strategy.balanceOfLPStaked() == lp_to_unstake
+            if lp_to_burn > 0:
+                withdrawn = tx.events["Withdrawn"]
+                assert withdrawn["lpBurned"] == lp_to_burn
+                assert withdrawn["wftmOut"] == wftm_out
+                assert withdrawn["anyWftmOut"] == any_out
+            else:
+                assert "Withdrawn" not in tx.events
+            assert tx.return_value == loss
+            assert token.balanceOf(vault) - vault_before == needed - loss
+
+    # a small withdrawal comes out of the loose anyWFTM, a big one can't be covered
+    assert strategy.previewLiquidate(amount // 10_000) == (0, 0, 0, 0, 0)
+    assert strategy.previewLiquidate(assets * 2)[4] > 0
+
+
+def test_preview_liquidate_batched(gov, token, vault, whale, strategy, chain, amount, strategist):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.mine(1)
+
+    # an empty clone quotes everything as loss, and a failed call doesn't take the batch down with it
+    clone = strategy.cloneStrategy(vault, strategist, strategist, strategist, "clone", {"from": gov}).return_value
+    strategies = [strategy.address, clone, vault.address]
+
+    rpc = Rpc(web3.provider.endpoint_uri)
+    previews = cmd_preview(load_bundle(), rpc, Namespace(amount=str(amount // 2), strategies=strategies))
+    assert tuple(previews[strategy.address].values()) == strategy.previewLiquidate(amount // 2)
+    assert previews[clone]["loss"] == amount // 2
+    assert previews[vault.address] is None
@@ -0,0 +1,95 @@
+import brownie
+from brownie import Contract
+import math
+
+from scripts.quote_cache import QuoteCache, CachedRouter
+from scripts.solidly_math import get_amount_out
+
+WFTM = "0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83"
+ANY_WFTM = "0x6362496Bef53458b20548a35A2101214Ee2BE3e0"
+
+
+class CountingRouter:
+    address = "0xa38cd27185a464914D3046f0AB9d43356B34829D"
+
+    def __init__(self):
+        self.calls = 0
+
+    def getAmountsOut(self, amount, path):
+        self.calls += 1
+        return [amount] + [amount * 99 // 100 for _ in path]
+
+
+def test_quote_cache_hits_and_blocks():
+    router = CountingRouter()
+    cache = QuoteCache()
+    cached = CachedRouter(router, cache)
+    path = [[WFTM, ANY_WFTM, True]]
+
+    cache.set_block(1)
+    for _ in range(10):
+        assert cached.getAmountsOut(10 ** 18, path) == [10 ** 18, 99 * 10 ** 16]
+    assert router.calls == 1
+    assert cache.hits == 9
+    assert cache.hit_rate == 0.9
+
+    # a new block throws everything away
+    cache.set_block(2)
+    cached.getAmountsOut(10 ** 18, path)
+    assert router.calls == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_quote_cache_lru_and_buckets():
+    router = CountingRouter()
+    cache = QuoteCache(max_entries=2, bucket_bits=8)
+    path = [[WFTM, ANY_WFTM, True]]
+    cache.set_block(1)
+
+    cache.get_amounts_out(router, 10 ** 18, path)
+    # close enough to share a bucket, and the quote is scaled to the amount asked for
+    amounts = cache.get_amounts_out(router, 10 ** 18 + 10 ** 15, path)
+    assert router.calls == 1
+    assert math.isclose(amounts[-1], (10 ** 18 + 10 ** 15) * 99 // 100, rel_tol=1e-9)
+
+    cache.get_amounts_out(router, 10 ** 20, path)
+    cache.get_amounts_out(router, 10 ** 22, path)
+    assert cache.evictions == 1
+    cache.get_amounts_out(router, 10 ** 18, path)
+    assert router.calls == 4
+
+
+def test_quote_cache_model_fill():
+    router = CountingRouter()
+    cache = QuoteCache()
+    cache.set_block(1)
+    reserves = 10 ** 24
+    cache.set_pool(WFTM, ANY_WFTM, True, reserves, reserves, 10 ** 18, 10 ** 18)
+
+    # both directions of a known pool never touch the router
+    forward = cache.get_amounts_out(router, 10 ** 18, [[WFTM, ANY_WFTM, True]])
+    back = cache.get_amounts_out(router, 10 ** 18, [[ANY_WFTM, WFTM, True]])
+    assert router.calls == 0
+    assert cache.model_fills == 2
+    assert forward == back
+    # a balanced stable pool gives about 1-1 less the 0.01% fee
+    assert 0.9998e18 < forward[-1] < 1e18
+
+    # pools are dropped with the block
+    cache.set_block(2)
+    cache.get_amounts_out(router, 10 ** 18, [[WFTM, ANY_WFTM, True]])
+    assert router.calls == 1
+
+
+# our local pool model should match the router to the wei
+def test_quote_cache_model_matches_router(strategy, solidex_router, wftm, anyWFTM, chain):
+    pair = Contract(strategy.lpToken())
+    (dec0, dec1, r0, r1, stable, t0, t1) = pair.metadata()
+
+    cache = QuoteCache(block_number=lambda: chain.height)
+    cache.set_pool(t0, t1, stable, r0, r1, dec0, dec1)
+    for amount in [10 ** 15, 10 ** 18, 10 ** 21, 10 ** 23]:
+        for path in [[[wftm, anyWFTM, True]], [[anyWFTM, wftm, True]]]:
+            expected = solidex_router.getAmountsOut(amount, path)
+            assert cache.get_amounts_out(solidex_router, amount, path) == list(expected)
+    assert cache.rpc_calls == 0
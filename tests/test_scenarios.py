@@ -0,0 +1,221 @@
+import brownie
+from brownie import chain
+import math
+import pytest
+
+from scripts.scenario_tree import Action, ScenarioTree
+
+# withdrawals after a donation and debt ratio changes, declared as action sequences so that
+# everything sharing a prefix (deposit, harvest, debt ratio change, donation) runs it once.
+# the same scenarios as test_withdraw_after_donation and test_change_debt, which stay as they are
+
+
+def _deposit(ctx):
+    token, vault, strategy, whale, gov = (ctx[k] for k in ("token", "vault", "strategy", "whale", "gov"))
+    ctx["starting_whale"] = token.balanceOf(whale)
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(ctx["amount"], {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(1)
+    ctx["prev_params"] = vault.strategies(strategy).dict()
+    ctx["prev_assets"] = vault.totalAssets()
+    ctx["starting_strategy"] = strategy.estimatedTotalAssets()
+    ctx["ratio"] = 10_000
+
+
+def _debt_ratio(ratio):
+    def fn(ctx):
+        ctx["vault"].updateStrategyDebtRatio(ctx["strategy"], ratio, {"from": ctx["gov"]})
+        assert ctx["vault"].strategies(ctx["strategy"]).dict()["debtRatio"] == ratio
+        ctx["ratio"] = ratio
+
+    return Action(f"debt ratio {ratio}", fn)
+
+
+def _donate(ctx):
+    # our whale donates to the strategy, what a nice person!
+    ctx["donation"] = ctx["amount"] / 2
+    ctx["token"].transfer(ctx["strategy"], ctx["donation"], {"from": ctx["whale"]})
+
+
+def _withdraw(name, size):
+    def fn(ctx):
+        ctx["withdrawal"] = size(ctx)
+        ctx["vault"].withdraw(ctx["withdrawal"], {"from": ctx["whale"]})
+
+    return Action(name, fn)
+
+
+def _harvest_after_a_day(ctx):
+    chain.sleep(86400)
+    chain.mine(1)
+    chain.sleep(1)
+    # turn off health check since we just took big profit
+    ctx["strategy"].setDoHealthCheck(False, {"from": ctx["gov"]})
+    ctx["strategy"].harvest({"from": ctx["gov"]})
+    ctx["new_params"] = ctx["vault"].strategies(ctx["strategy"]).dict()
+
+
+def _note_strategy_assets(ctx):
+    ctx["strategy_assets"] = ctx["strategy"].estimatedTotalAssets()
+
+
+def _airdrop(ctx):
+    # simulate one day of earnings
+    chain.sleep(86400)
+    chain.mine(1)
+    ctx["airdrop"] = 10 * 1e18
+    ctx["token"].transfer(ctx["vault"], ctx["airdrop"], {"from": ctx["whale"]})
+
+
+DEPOSIT = Action("deposit and harvest", _deposit)
+DONATE = Action("donate half", _donate)
+HARVEST = Action("harvest after a day", _harvest_after_a_day)
+NOTE_ASSETS = Action("note strategy assets", _note_strategy_assets)
+AIRDROP = Action("airdrop to the vault", _airdrop)
+# less than the donation, so we don't touch the staked balance
+SMALL_WITHDRAW = _withdraw("withdraw half the donation", lambda ctx: ctx["donation"] / 2)
+# more than the donation, so we have to pull from the strategy
+BIG_WITHDRAW = _withdraw("withdraw past the donation", lambda ctx: ctx["donation"] + ctx["amount"] / 2)
+
+
+def check_gain_recorded(ctx):
+    prev, new = ctx["prev_params"], ctx["new_params"]
+    assert new["totalGain"] - prev["totalGain"] > 0
+    assert new["totalGain"] - prev["totalGain"] >= ctx["donation"] * 0.999
+    assert new["totalLoss"] == prev["totalLoss"] or math.isclose(
+        new["totalLoss"], prev["totalLoss"], abs_tol=2
+    )
+
+
+def check_debt_follows_ratio(ctx):
+    vault, strategy = ctx["vault"], ctx["strategy"]
+    check_gain_recorded(ctx)
+    assert ctx["new_params"]["debtRatio"] == ctx["ratio"]
+
+    # sleep 10 hours to increase our credit available
+    chain.sleep(60 * 60 * 10)
+    assert math.isclose(
+        vault.totalAssets() * ctx["new_params"]["debtRatio"] / 10_000,
+        strategy.estimatedTotalAssets() + vault.creditAvailable(strategy),
+        abs_tol=1e18,
+    )
+
+
+def check_strategy_emptied(ctx):
+    vault, strategy = ctx["vault"], ctx["strategy"]
+    # ignore dust
+    assert strategy.estimatedTotalAssets() <= 100
+    assert ctx["token"].balanceOf(strategy) == 0
+    assert vault.totalAssets() >= (ctx["donation"] - ctx["withdrawal"] + ctx["prev_assets"]) * 0.999
+    assert ctx["new_params"]["totalDebt"] <= 100
+    assert vault.totalDebt() <= 100
+    check_gain_recorded(ctx)
+
+
+def check_debt_round_trip(ctx):
+    vault, whale = ctx["vault"], ctx["whale"]
+    # half the debt ratio, so the strategy shrank
+    assert ctx["strategy_assets"] <= ctx["starting_strategy"]
+    # confirm we made money, or at least that we have about the same
+    assert vault.totalAssets() >= ctx["prev_assets"] or math.isclose(
+        vault.totalAssets(), ctx["prev_assets"], abs_tol=5
+    )
+    chain.sleep(86400)
+    chain.mine(1)
+    before = ctx["token"].balanceOf(whale)
+    vault.withdraw({"from": whale})
+    assert ctx["token"].balanceOf(whale) - before >= ctx["amount"] * 0.999
+    # our whale made money, even paying for the airdrop
+    assert ctx["token"].balanceOf(whale) >= ctx["starting_whale"] - ctx["airdrop"]
+
+
+def scenarios():
+    out = []
+    for ratio in [None, 5_000, 0]:
+        prefix = [DEPOSIT] + ([_debt_ratio(ratio)] if ratio is not None else []) + [DONATE]
+        for withdraw in [SMALL_WITHDRAW, BIG_WITHDRAW]:
+            name = f"ratio {ratio if ratio is not None else 'unchanged'}, {withdraw.name}"
+            out.append((name, prefix + [withdraw, HARVEST], check_debt_follows_ratio))
+            if ratio == 0:
+                out.append((name + ", emptied", prefix + [withdraw, HARVEST], check_strategy_emptied))
+
+    out.append(
+        (
+            "lower then restore debt ratio",
+            [DEPOSIT, _debt_ratio(5_000), HARVEST, NOTE_ASSETS, AIRDROP, _debt_ratio(10_000), HARVEST],
+            check_debt_round_trip,
+        )
+    )
+    return out
+
+
+SCENARIOS = scenarios()
+
+
+def build_tree(rollback):
+    tree = ScenarioTree(rollback)
+    for name, actions, check in SCENARIOS:
+        tree.add(name, actions, check)
+    return tree
+
+
+# the whole tree runs once, in whichever case asks first, and every case reads its own
+# scenario's outcome. so a regression still fails the one scenario it breaks
+_RUN = {}
+
+
+@pytest.fixture
+def scenario_run(gov, token, vault, whale, strategy, amount, rollback):
+    if not _RUN:
+        tree = build_tree(rollback)
+        failures = tree.run(
+            {"gov": gov, "token": token, "vault": vault, "whale": whale, "strategy": strategy, "amount": amount}
+        )
+        report = tree.report()
+        print(f"\n{report['scenarios']} scenarios, {report['actions_executed']} actions run instead of {report['actions_serial']}")
+        print(f"took {report['elapsed']:.1f}s with {report['snapshots']} snapshots, about {report['serial_estimate']:.1f}s run one by one")
+        print(f"saved about {report['saved']:.1f}s")
+        _RUN.update(failures=failures, report=report)
+    return _RUN
+
+
+@pytest.mark.parametrize("name", [name for name, _, _ in SCENARIOS])
+def test_donation_and_debt_scenario(scenario_run, name):
+    error = scenario_run["failures"].get(name)
+    if error is not None:
+        raise error
+
+
+def test_scenarios_share_prefixes(scenario_run):
+    report = scenario_run["report"]
+    assert report["scenarios"] == len(SCENARIOS)
+    assert report["actions_executed"] < report["actions_serial"]
+
+
+# branches must not see each other's state, and shared actions only run once
+def test_scenario_tree_isolates_branches(token, whale, gov, rollback):
+    calls = []
+
+    def send(amount):
+        def fn(ctx):
+            calls.append(amount)
+            token.transfer(gov, amount, {"from": whale})
+            ctx["sent"] = ctx.get("sent", 0) + amount
+
+        return Action(f"send {amount}", fn)
+
+    start = token.balanceOf(gov)
+
+    def check(ctx):
+        assert token.balanceOf(gov) - start == ctx["sent"]
+
+    tree = ScenarioTree(rollback)
+    tree.add("a", [send(1), send(2)], check)
+    tree.add("b", [send(1), send(3)], check)
+    tree.add("c", [send(1), send(2), send(4)], check)
+    assert tree.run({}) == {}
+    assert sorted(calls) == [1, 2, 3, 4]
+    assert tree.report()["actions_serial"] == 7
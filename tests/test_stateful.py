@@ -0,0 +1,110 @@
+import brownie
+from brownie import Contract, chain
+from brownie.test import strategy
+import os
+import time
+
+# crank these up for a long run, e.g. FUZZ_EXAMPLES=2000 brownie test tests/test_stateful.py
+MAX_EXAMPLES = int(os.environ.get("FUZZ_EXAMPLES", 50))
+STEP_COUNT = int(os.environ.get("FUZZ_STEPS", 20))
+# every step is a transaction on the fork, hundreds of ms each, so no per example deadline.
+# set here rather than left to whatever brownie's hypothesis profile says
+SETTINGS = {"max_examples": MAX_EXAMPLES, "stateful_step_count": STEP_COUNT, "deadline": None}
+
+# anything under this much loose anyWFTM is leftover from addLiquidity rounding
+ANY_WFTM_DUST = 1e16
+
+
+class StrategyStateMachine:
+    st_amount = strategy("uint256", min_value="1 ether", max_value="2000 ether")
+    st_ratio = strategy("uint256", min_value=0, max_value=10_000)
+    st_peg = strategy("uint256", min_value="100 ether", max_value="20000 ether")
+    st_to_any = strategy("bool")
+    st_sleep = strategy("uint256", min_value=1, max_value=43200)
+
+    # runs once, brownie snapshots the chain after this and reverts to it before every sequence
+    def __init__(cls, vault, strategy, token, anyWFTM, whale, gov, keeper, solidex_router):
+        cls.vault = vault
+        cls.strategy = strategy
+        cls.token = token
+        cls.anyWFTM = anyWFTM
+        cls.whale = whale
+        cls.gov = gov
+        cls.keeper = keeper
+        cls.router = solidex_router
+        cls.sequences = 0
+
+        token.approve(vault, 2 ** 256 - 1, {"from": whale})
+        token.approve(solidex_router, 2 ** 256 - 1, {"from": whale})
+        token.approve(anyWFTM, 2 ** 256 - 1, {"from": whale})
+        anyWFTM.approve(solidex_router, 2 ** 256 - 1, {"from": whale})
+        strategy.setDoHealthCheck(False, {"from": gov})
+
+    def setup(self):
+        StrategyStateMachine.sequences += 1
+
+    def rule_deposit(self, st_amount):
+        self.vault.deposit(st_amount, {"from": self.whale})
+
+    def rule_withdraw(self, st_amount):
+        shares = min(self.vault.balanceOf(self.whale), st_amount)
+        if shares > 0:
+            # we can lose a little to rounding when the pool is off peg
+            self.vault.withdraw(shares, self.whale, 100, {"from": self.whale})
+
+    def rule_donate(self, st_amount):
+        self.token.transfer(self.strategy, st_amount // 10, {"from": self.whale})
+
+    def rule_change_debt_ratio(self, st_ratio):
+        self.vault.updateStrategyDebtRatio(self.strategy, st_ratio, {"from": self.gov})
+
+    def rule_move_peg(self, st_peg, st_to_any):
+        # someone swaps through the pool and knocks it off balance
+        if st_to_any:
+            route = [[self.token, self.anyWFTM, True]]
+        else:
+            self.anyWFTM.deposit(st_peg, {"from": self.whale})
+            route = [[self.anyWFTM, self.token, True]]
+        self.router.swapExactTokensForTokens(
+            st_peg, 0, route, self.whale, 2 ** 256 - 1, {"from": self.whale}
+        )
+
+    def rule_harvest(self, st_sleep):
+        chain.sleep(st_sleep)
+        self.strategy.harvest({"from": self.gov})
+
+    def rule_tend(self):
+        self.strategy.tend({"from": self.keeper})
+
+    def invariant_assets_cover_debt(self):
+        debt = self.vault.strategies(self.strategy).dict()["totalDebt"]
+        assert self.strategy.estimatedTotalAssets() >= debt * 0.999
+
+    def invariant_no_stranded_any_wftm(self):
+        assert self.strategy.balanceOfAnyWftm() <= ANY_WFTM_DUST
+
+    def invariant_debt_within_vault(self):
+        assert self.vault.strategies(self.strategy).dict()["totalDebt"] <= self.vault.totalAssets()
+
+
+def test_stateful(
+    state_machine, vault, strategy, token, anyWFTM, whale, gov, keeper, solidex_router
+):
+    start = time.perf_counter()
+    state_machine(
+        StrategyStateMachine,
+        vault,
+        strategy,
+        token,
+        anyWFTM,
+        whale,
+        gov,
+        keeper,
+        solidex_router,
+        settings=SETTINGS,
+    )
+    elapsed = time.perf_counter() - start
+
+    sequences = StrategyStateMachine.sequences
+    print(f"\n{sequences} sequences of up to {STEP_COUNT} steps in {elapsed:.1f}s")
+    print(f"{sequences / elapsed:.2f} sequences per second")
@@ -0,0 +1,58 @@
+import brownie
+from brownie import Contract
+from brownie import config
+import math
+
+
+def test_tend_redeploys_idle_funds(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    keeper,
+    anyWFTM,
+):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    harvest_tx = strategy.harvest({"from": gov})
+    chain.sleep(1)
+
+    # nothing idle after a harvest
+    assert strategy.tendTrigger(0) == False
+
+    # our whale sends us some loose wftm and anyWFTM
+    donation = amount / 10
+    token.transfer(strategy, donation, {"from": whale})
+    token.approve(anyWFTM, 2 ** 256 - 1, {"from": whale})
+    anyWFTM.deposit(donation, {"from": whale})
+    anyWFTM.transfer(strategy, donation, {"from": whale})
+    assert strategy.idleFunds() == 2 * donation
+
+    # too small to be worth a very expensive call
+    assert strategy.tendTrigger(donation) == False
+    assert strategy.tendTrigger(1e15) == True
+
+    params_before = vault.strategies(strategy).dict()
+    staked_before = strategy.balanceOfLPStaked()
+    tend_tx = strategy.tend({"from": keeper})
+
+    # everything is back to work without a report to the vault
+    assert strategy.idleFunds() <= 1e17
+    assert strategy.balanceOfLPStaked() > staked_before
+    assert vault.strategies(strategy).dict() == params_before
+    assert strategy.tendTrigger(0) == False
+
+    print("\nHarvest gas:", harvest_tx.gas_used)
+    print("Tend gas:", tend_tx.gas_used)
+    assert tend_tx.gas_used < harvest_tx.gas_used
+
+
+def test_tend_only_keepers(strategy, whale):
+    with brownie.reverts():
+        strategy.tend({"from": whale})
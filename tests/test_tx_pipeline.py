@@ -0,0 +1,120 @@
+import brownie
+from brownie import Contract, web3
+from brownie.exceptions import VirtualMachineError
+import pytest
+
+from scripts.tx_pipeline import CONFIRMED, DROPPED, PENDING, Submitter
+
+
+@pytest.fixture
+def no_automine(chain):
+    # transactions sit in the mempool until we mine a block ourselves
+    web3.provider.make_request("miner_stop", [])
+    yield
+    web3.provider.make_request("miner_start", [])
+    chain.mine(1)
+
+
+def test_pipeline_back_to_back(no_automine, strategy, gov, chain, tmp_path):
+    submitter = Submitter(gov, journal=tmp_path / "journal.jsonl", gas_price=10 ** 9)
+    start = chain.height
+    nonces = [
+        submitter.submit(strategy.setLpSlippage, 9990, label="slippage"),
+        submitter.submit(strategy.setBufferBps, 100, label="buffer"),
+        submitter.submit(strategy.setMaxDepositBps, 500, label="max deposit"),
+        submitter.submit(strategy.setMinHarvestCredit, 10 ** 21, label="credit"),
+    ]
+
+    # all four are out there and none of them has waited on anything
+    assert nonces == list(range(nonces[0], nonces[0] + 4))
+    assert chain.height == start
+    assert submitter.poll() == []
+    assert submitter.pending() == nonces
+
+    chain.mine(1)
+    assert submitter.poll() == nonces
+    assert submitter.summary() == {CONFIRMED: 4}
+    assert {submitter.txs[n]["block"] for n in nonces} == {start + 1}
+    assert strategy.lpSlippage() == 9990
+    assert strategy.bufferBps() == 100
+    assert strategy.maxDepositBps() == 500
+    assert strategy.minHarvestCredit() == 10 ** 21
+
+
+def test_pipeline_replaces_stuck(no_automine, strategy, gov, chain, tmp_path):
+    submitter = Submitter(gov, journal=tmp_path / "journal.jsonl", gas_price=10 ** 9)
+    nonce = submitter.submit(strategy.setBufferBps, 200, label="buffer")
+    first = submitter.txs[nonce]["hashes"][0]
+
+    # nothing mined, so it's stuck as far as we're concerned
+    assert submitter.bump_stuck(older_than=0) == [nonce]
+    tx = submitter.txs[nonce]
+    assert len(tx["hashes"]) == 2
+    assert tx["gas_price"] >= 10 ** 9 * 1.1
+
+    chain.mine(1)
+    assert submitter.poll() == [nonce]
+    assert tx["status"] == CONFIRMED
+    assert tx["txid"] == tx["hashes"][-1] != first
+    assert strategy.bufferBps() == 200
+
+
+def test_pipeline_recovers_after_restart(no_automine, strategy, gov, chain, tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    submitter = Submitter(gov, journal=journal, gas_price=10 ** 9)
+    a = submitter.submit(strategy.setLpSlippage, 9980, label="slippage")
+    b = submitter.submit(strategy.setBufferBps, 300, label="buffer")
+    del submitter
+
+    # a new process reads the journal back, still watches both and carries on after them
+    restarted = Submitter(gov, journal=journal, gas_price=10 ** 9)
+    assert restarted.pending() == [a, b]
+    assert restarted.txs[a]["label"] == "slippage"
+    c = restarted.submit(strategy.setMaxDepositBps, 700, label="max deposit")
+    assert c == b + 1
+
+    chain.mine(1)
+    assert restarted.poll() == [a, b, c]
+    assert strategy.lpSlippage() == 9980
+    assert strategy.bufferBps() == 300
+    assert strategy.maxDepositBps() == 700
+
+    # and once more, nothing left to watch. finished transactions stay in the journal, not in memory
+    again = Submitter(gov, journal=journal, gas_price=10 ** 9)
+    assert again.txs == {}
+    assert again.next_nonce == c + 1
+
+
+def test_pipeline_nonce_used_elsewhere(no_automine, strategy, gov, chain, tmp_path):
+    submitter = Submitter(gov, journal=tmp_path / "journal.jsonl", gas_price=10 ** 9)
+    nonce = submitter.submit(strategy.setBufferBps, 400, label="buffer")
+
+    # someone else on the same key replaces our transaction with one of their own
+    strategy.setBufferBps(
+        500, {"from": gov, "nonce": nonce, "gas_price": 10 ** 10, "required_confs": 0, "allow_revert": True}
+    )
+    chain.mine(1)
+    assert submitter.poll() == [nonce]
+    assert submitter.txs[nonce]["status"] == DROPPED
+    assert strategy.bufferBps() == 500
+
+
+def test_pipeline_refused_broadcast(no_automine, strategy, gov, chain, tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    submitter = Submitter(gov, journal=journal, gas_price=10 ** 9)
+    nonce = submitter.next_nonce
+
+    # more gas than gov could ever pay for, the node won't take it. brownie raises a node's refusal
+    # as a ValueError, and a VirtualMachineError if it reads like an evm error
+    with pytest.raises((ValueError, VirtualMachineError)):
+        submitter.submit(strategy.setBufferBps, 600, label="buffer", gas_price=10 ** 30)
+    assert submitter.txs == {}
+    assert submitter.next_nonce == nonce
+    assert not journal.exists() or journal.read_text() == ""
+
+    # so the next one gets the same nonce, and there's no gap for it to wait behind
+    assert submitter.submit(strategy.setBufferBps, 600, label="buffer") == nonce
+    assert submitter.bump_stuck(older_than=10 ** 6) == []
+    chain.mine(1)
+    assert submitter.poll() == [nonce]
+    assert strategy.bufferBps() == 600
@@ -0,0 +1,127 @@
+import brownie
+from brownie import Contract, web3
+import pytest
+
+from scripts.ops_cli import Rpc
+from scripts.vault_model import STRATEGY_FIELDS, snapshot
+
+
+class CountingRpc(Rpc):
+    def __init__(self, url):
+        super().__init__(url)
+        self.round_trips = 0
+
+    def send(self, requests):
+        self.round_trips += 1
+        return super().send(requests)
+
+
+def assert_matches(model, vault, strategy, token):
+    params = vault.strategies(strategy).dict()
+    assert model.strategies[strategy.address] == {field: params[field] for field in STRATEGY_FIELDS}
+    assert model.total_debt == vault.totalDebt()
+    assert model.debt_ratio == vault.debtRatio()
+    assert model.total_supply == vault.totalSupply()
+    assert model.balance == token.balanceOf(vault)
+    assert model.locked_profit == vault.lockedProfit()
+    assert model.last_report == vault.lastReport()
+    assert model.balance_of["rewards"] == vault.balanceOf(vault.rewards())
+    assert model.balance_of[strategy.address] == vault.balanceOf(strategy)
+
+
+def test_vault_model_snapshot(gov, token, vault, whale, strategy, chain, amount):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+
+    # more money waiting in the vault and a day gone by, so there's credit and locked profit is released
+    vault.deposit(amount // 2, {"from": whale})
+    chain.sleep(86400)
+    chain.mine(1)
+
+    rpc = CountingRpc(web3.provider.endpoint_uri)
+    model = snapshot(rpc, vault.address, [strategy.address], rewards=vault.rewards())
+    assert rpc.round_trips == 1
+    assert_matches(model, vault, strategy, token)
+
+    assert model.total_assets() == vault.totalAssets()
+    assert model.price_per_share() == vault.pricePerShare()
+    assert model.credit_available(strategy.address) == vault.creditAvailable(strategy)
+    assert model.debt_outstanding(strategy.address) == vault.debtOutstanding(strategy)
+    assert model.expected_return(strategy.address) == vault.expectedReturn(strategy)
+    assert model.assets[strategy.address] == strategy.estimatedTotalAssets()
+
+    # less debt allowed, now there's debt outstanding and no credit
+    vault.updateStrategyDebtRatio(strategy, 5_000, {"from": gov})
+    model = snapshot(rpc, vault.address, [strategy.address], rewards=vault.rewards())
+    assert model.credit_available(strategy.address) == vault.creditAvailable(strategy) == 0
+    assert model.debt_outstanding(strategy.address) == vault.debtOutstanding(strategy) > 0
+
+
+def test_vault_model_report(gov, token, vault, whale, strategy, chain, amount):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(3600)
+
+    # a donation gives us a known gain, so fees get charged, and new deposits give credit
+    token.transfer(strategy, amount // 100, {"from": whale})
+    vault.deposit(amount // 4, {"from": whale})
+    chain.mine(1)
+
+    rpc = Rpc(web3.provider.endpoint_uri)
+    model = snapshot(rpc, vault.address, [strategy.address], rewards=vault.rewards())
+    strategy.setDoHealthCheck(False, {"from": gov})
+    tx = strategy.harvest({"from": gov})
+
+    # replay what the strategy reported and the vault has to end up exactly where the chain did
+    harvested = tx.events["Harvested"]
+    model.timestamp = tx.timestamp
+    model.report(strategy.address, harvested["profit"], harvested["loss"], harvested["debtPayment"])
+    assert harvested["profit"] > 0
+    assert_matches(model, vault, strategy, token)
+    assert model.price_per_share() == vault.pricePerShare()
+
+    # and debt coming back when we cut the debt ratio, predicted from the snapshot alone
+    vault.updateStrategyDebtRatio(strategy, 5_000, {"from": gov})
+    chain.sleep(3600)
+    chain.mine(1)
+    model = snapshot(rpc, vault.address, [strategy.address], rewards=vault.rewards())
+    strategy.setDoHealthCheck(False, {"from": gov})
+    tx = strategy.harvest({"from": gov})
+    harvested = tx.events["Harvested"]
+
+    model.timestamp = tx.timestamp
+    profit, loss, debt_payment, outstanding = model.harvest(strategy.address)
+    assert debt_payment == harvested["debtOutstanding"] > 0
+    # freeing lp rounds down a little, the chain pays back what actually came out
+    assert harvested["debtPayment"] == pytest.approx(debt_payment, rel=1e-6)
+    assert model.strategies[strategy.address]["totalDebt"] == pytest.approx(
+        vault.strategies(strategy).dict()["totalDebt"], rel=1e-6
+    )
+
+
+def test_vault_model_projection(gov, token, vault, whale, strategy, chain, amount):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.mine(1)
+
+    model = snapshot(Rpc(web3.provider.endpoint_uri), vault.address, [strategy.address], rewards=vault.rewards())
+    start = model.price_per_share()
+    harvests = list(model.project(strategy.address, apr=0.05, interval=43200, harvests=60))
+
+    # a month of twice daily harvests, price per share only goes up and profit gets lent back out
+    assert len(harvests) == 60
+    prices = [h["price_per_share"] for h in harvests]
+    assert prices == sorted(prices) and prices[-1] > start
+    assert all(h["loss"] == 0 for h in harvests)
+    assert harvests[-1]["total_debt"] > harvests[0]["total_debt"]
+    # fees went to rewards and the strategist as shares
+    assert model.balance_of["rewards"] > vault.balanceOf(vault.rewards())
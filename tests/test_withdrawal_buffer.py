@@ -0,0 +1,74 @@
+import brownie
+from brownie import Contract
+from brownie import config
+import math
+
+
+def test_withdrawal_buffer(
+    gov,
+    token,
+    vault,
+    whale,
+    strategy,
+    chain,
+    amount,
+    rollback,
+):
+    ## deposit to the vault after approving
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(1)
+
+    # a small withdrawal with no buffer has to unwind lp
+    with rollback():
+        staked = strategy.balanceOfLPStaked()
+        unbuffered = vault.withdraw(amount / 100, {"from": whale})
+        assert strategy.balanceOfLPStaked() < staked
+
+    # keep 10% loose. a harvest fills the buffer
+    strategy.setBufferBps(1_000, {"from": gov})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    chain.sleep(1)
+    assert math.isclose(
+        strategy.balanceOfWant(), strategy.estimatedTotalAssets() * 0.1, rel_tol=1e-2
+    )
+    # and we don't try to tend it away
+    assert strategy.tendTrigger(0) == False
+
+    # now the same withdrawal comes straight from the buffer
+    staked = strategy.balanceOfLPStaked()
+    buffered = vault.withdraw(amount / 100, {"from": whale})
+    assert strategy.balanceOfLPStaked() == staked
+
+    print("\nWithdrawal gas without buffer:", unbuffered.gas_used)
+    print("Withdrawal gas from buffer:", buffered.gas_used)
+    assert buffered.gas_used < unbuffered.gas_used
+
+    # drain the buffer, only the next harvest refills it
+    vault.withdraw(amount / 10, {"from": whale})
+    assert strategy.balanceOfWant() < strategy.bufferTarget()
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    assert math.isclose(
+        strategy.balanceOfWant(), strategy.bufferTarget(), rel_tol=1e-2
+    )
+
+    # turning it off puts everything back to work
+    strategy.setBufferBps(0, {"from": gov})
+    chain.sleep(1)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    strategy.harvest({"from": gov})
+    assert strategy.balanceOfWant() < 1e17
+
+
+def test_withdrawal_buffer_setter(gov, strategy, whale):
+    with brownie.reverts():
+        strategy.setBufferBps(10_001, {"from": gov})
+    with brownie.reverts():
+        strategy.setBufferBps(1_000, {"from": whale})
@@ -0,0 +1,217 @@
+import brownie
+from brownie import Contract
+from eth_abi import decode_abi
+import eth_utils
+import pytest
+
+from scripts.yswaps_planner import TradePlanner, SWAP_SELECTOR, APPROVE_SELECTOR
+
+WANT = "0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83"
+SEX = "0xD31Fcd1f7Ba190dBc75354046F6024A9b86014d7"
+SOLID = "0x888EF71766ca594DED1F0FA3AE64eD2941740A20"
+USDC = "0x04068DA6C83AFCFA0e13ba15A6696662335D5B75"
+STRATEGY = "0x000000000000000000000000000000000000dEaD"
+
+
+# local stand ins for the solidly router and our reward tokens
+class MockRouter:
+    address = "0xa38cd27185a464914D3046f0AB9d43356B34829D"
+
+    def __init__(self, rates):
+        # rates maps (from, to, stable) to an output per 1e18 in
+        self.rates = rates
+        self.calls = 0
+
+    def getAmountsOut(self, amount, path):
+        self.calls += 1
+        amounts = [amount]
+        for step in path:
+            amounts.append(amounts[-1] * self.rates.get(tuple(step), 0) // 10 ** 18)
+        return amounts
+
+
+class MockToken:
+    def __init__(self, address, balance):
+        self.address = address
+        self.balance = balance
+
+    def balanceOf(self, owner):
+        return self.balance
+
+
+class CountingBatch:
+    def __init__(self):
+        self.batches = 0
+
+    def __call__(self):
+        self.batches += 1
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+def test_planner_picks_best_route():
+    router = MockRouter(
+        {
+            (SEX, WANT, False): 2 * 10 ** 17,
+            (SEX, WANT, True): 10 ** 17,
+            (SOLID, WANT, False): 3 * 10 ** 17,
+            (SOLID, USDC, False): 10 ** 18,
+            (USDC, WANT, False): 4 * 10 ** 17,
+        }
+    )
+    batch = CountingBatch()
+    planner = TradePlanner(router, WANT, intermediates=[USDC], batch=batch)
+
+    trades = planner.plan(
+        STRATEGY, [MockToken(SEX, 10 ** 18), MockToken(SOLID, 5 * 10 ** 18)]
+    )
+
+    # every candidate route is quoted, in a single batch
+    assert batch.batches == 1
+    assert router.calls == 2 * len(planner.candidate_routes(SEX))
+
+    sex_trade, solid_trade = trades
+    assert sex_trade.path == [[SEX, WANT, False]]
+    assert sex_trade.expected_out == 2 * 10 ** 17
+    assert solid_trade.path == [[SOLID, USDC, False], [USDC, WANT, False]]
+    assert solid_trade.expected_out == 2 * 10 ** 18
+    assert solid_trade.min_out == solid_trade.expected_out * 9_950 // 10_000
+
+
+def test_planner_skips_empty_and_unroutable():
+    router = MockRouter({(SEX, WANT, False): 2 * 10 ** 17})
+    planner = TradePlanner(router, WANT)
+
+    trades = planner.plan(
+        STRATEGY, [MockToken(SEX, 10 ** 18), MockToken(SOLID, 10 ** 18)]
+    )
+    assert [t.token_in for t in trades] == [SEX]
+
+    trades = planner.plan(STRATEGY, [MockToken(SEX, 0)])
+    assert trades == []
+
+
+# like the real router, getAmountsOut reverts when a pair on the path doesn't exist
+class RevertingRouter(MockRouter):
+    def getAmountsOut(self, amount, path):
+        if any(tuple(step) not in self.rates for step in path):
+            self.calls += 1
+            raise ValueError("execution reverted")
+        return super().getAmountsOut(amount, path)
+
+
+# and inside a multicall the same failure comes back as None
+class MulticallRouter(MockRouter):
+    def getAmountsOut(self, amount, path):
+        if any(tuple(step) not in self.rates for step in path):
+            self.calls += 1
+            return None
+        return super().getAmountsOut(amount, path)
+
+
+@pytest.mark.parametrize("router_class", [RevertingRouter, MulticallRouter])
+def test_planner_survives_failed_quotes(router_class):
+    router = router_class(
+        {(SOLID, USDC, False): 10 ** 18, (USDC, WANT, False): 4 * 10 ** 17}
+    )
+    planner = TradePlanner(router, WANT, intermediates=[USDC])
+
+    trades = planner.plan(
+        STRATEGY, [MockToken(SEX, 10 ** 18), MockToken(SOLID, 10 ** 18)]
+    )
+
+    # every route was still tried, the ones that failed just quote zero
+    assert router.calls == 2 * len(planner.candidate_routes(SEX))
+    assert [t.token_in for t in trades] == [SOLID]
+    assert trades[0].path == [[SOLID, USDC, False], [USDC, WANT, False]]
+
+
+def test_planner_encodes_one_payload():
+    router = MockRouter(
+        {(SEX, WANT, False): 2 * 10 ** 17, (SOLID, WANT, False): 3 * 10 ** 17}
+    )
+    planner = TradePlanner(router, WANT)
+    trades = planner.plan(
+        STRATEGY, [MockToken(SEX, 10 ** 18), MockToken(SOLID, 10 ** 18)]
+    )
+    payload = planner.encode(trades, STRATEGY)
+
+    # optimisation byte, then address, length and calldata for each of our 4 calls
+    assert payload[0] == 5
+    offset = 1
+    calls = []
+    while offset < len(payload):
+        to = eth_utils.to_checksum_address(payload[offset : offset + 20])
+        length = int.from_bytes(payload[offset + 20 : offset + 52], "big")
+        data = payload[offset + 52 : offset + 52 + length]
+        calls.append((to, data))
+        offset += 52 + length
+
+    assert [to for to, _ in calls] == [SEX, router.address, SOLID, router.address]
+    assert calls[0][1][:4] == APPROVE_SELECTOR
+    assert calls[1][1][:4] == SWAP_SELECTOR
+    amount_in, min_out, path, receiver, deadline = decode_abi(
+        ["uint256", "uint256", "(address,address,bool)[]", "address", "uint256"],
+        calls[3][1][4:],
+    )
+    assert amount_in == 10 ** 18
+    assert min_out == trades[1].min_out
+    assert receiver.lower() == STRATEGY.lower()
+
+
+def test_planner_gas_vs_two_transactions(
+    gov,
+    wftm,
+    amount,
+    chain,
+    solidex_router,
+    strategy,
+    token,
+    whale,
+    vault,
+    trade_factory,
+    sex,
+    solid,
+    multicall_swapper,
+    ymechs_safe,
+    rollback,
+):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    strategy.harvest({"from": gov})
+    # simulate 12 hours of earnings
+    chain.sleep(43200)
+    chain.mine(1)
+    strategy.harvest({"from": gov})
+
+    planner = TradePlanner(solidex_router, wftm)
+    trades = planner.plan(strategy, [sex, solid])
+    assert len(trades) == 2
+
+    before = token.balanceOf(strategy)
+    two_tx_gas = 0
+    with rollback():
+        for trade in trades:
+            tx = trade_factory.execute["tuple,address,bytes"](
+                [strategy, trade.token_in, wftm, trade.amount_in, trade.min_out],
+                multicall_swapper,
+                planner.encode([trade], strategy),
+                {"from": ymechs_safe},
+            )
+            two_tx_gas += tx.gas_used
+        two_tx_out = token.balanceOf(strategy) - before
+
+    tx = planner.execute(trade_factory, strategy, trades, multicall_swapper, ymechs_safe)
+    one_tx_out = token.balanceOf(strategy) - before
+
+    print("\nTwo transaction gas:", two_tx_gas)
+    print("Single multicall gas:", tx.gas_used)
+    assert sex.balanceOf(strategy) == 0
+    assert solid.balanceOf(strategy) == 0
+    assert one_tx_out >= two_tx_out * 0.999
+    assert tx.gas_used < two_tx_gas
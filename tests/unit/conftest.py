@@ -0,0 +1,145 @@
+import pytest
+from brownie import (
+    MockAnyWFTM,
+    MockHealthCheck,
+    MockLpDepositer,
+    MockSolidlyPair,
+    MockSolidlyRouter,
+    MockToken,
+    MockTradeFactory,
+    web3,
+)
+
+from scripts import inprocess_evm
+
+# these run on the in-process evm against the mocks in contracts/mocks, no fork and no ganache:
+#   INPROCESS_EVM=1 brownie test tests/unit --network development
+# fixtures keep the names the fork tests use, so those tests run here unchanged
+
+# where Strategy looks for things, and what we put there
+WFTM = "0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83"
+ANY_WFTM = "0x6362496Bef53458b20548a35A2101214Ee2BE3e0"
+SEX = "0xD31Fcd1f7Ba190dBc75354046F6024A9b86014d7"
+SOLID = "0x888EF71766ca594DED1F0FA3AE64eD2941740A20"
+LP_TOKEN = "0x9aC7664060a3e388CEB157C5a0B6064BeFFAb9f2"
+ROUTER = "0xa38cd27185a464914D3046f0AB9d43356B34829D"
+LP_DEPOSITER = "0x26E1A0d851CF28E697870e1b7F053B605C8b060F"
+HEALTH_CHECK = "0xf13Cd6887C62B5beC145e30c38c4938c5E627fe0"
+TRADE_FACTORY = "0xD3f89C21719Ec5961a3E6B0f9bBf9F9b4180E9e9"
+
+MOCKS = {
+    WFTM: MockToken,
+    ANY_WFTM: MockAnyWFTM,
+    SEX: MockToken,
+    SOLID: MockToken,
+    LP_TOKEN: MockSolidlyPair,
+    ROUTER: MockSolidlyRouter,
+    LP_DEPOSITER: MockLpDepositer,
+    HEALTH_CHECK: MockHealthCheck,
+    TRADE_FACTORY: MockTradeFactory,
+}
+
+# both sides of the pool, enough that our deposits barely move it
+POOL_SIDE = 1_000_000 * 10 ** 18
+
+# the mocks go in genesis while we're still collecting, brownie only connects after that
+if inprocess_evm.NODE is not None:
+    inprocess_evm.NODE.reset({address: mock._build["deployedBytecode"] for address, mock in MOCKS.items()})
+
+
+@pytest.fixture(scope="session", autouse=True)
+def inprocess_node():
+    if inprocess_evm.NODE is None:
+        pytest.skip("unit tests need the in-process evm: INPROCESS_EVM=1 brownie test tests/unit --network development")
+    # brownie connected over http, from here on it calls straight into the node
+    web3.provider = inprocess_evm.Provider(inprocess_evm.NODE)
+    yield inprocess_evm.NODE
+
+
+@pytest.fixture(scope="session", autouse=True)
+def pool(inprocess_node, accounts, wftm, anyWFTM, solidex_router):
+    lp = accounts[8]
+    wftm.mint(lp, 2 * POOL_SIDE, {"from": lp})
+    wftm.approve(anyWFTM, 2 ** 256 - 1, {"from": lp})
+    anyWFTM.deposit["uint256"](POOL_SIDE, {"from": lp})
+    wftm.approve(solidex_router, 2 ** 256 - 1, {"from": lp})
+    anyWFTM.approve(solidex_router, 2 ** 256 - 1, {"from": lp})
+    solidex_router.addLiquidity(wftm, anyWFTM, True, POOL_SIDE, POOL_SIDE, 0, 0, lp, 2 ** 256 - 1, {"from": lp})
+    yield MockSolidlyPair.at(LP_TOKEN)
+
+
+@pytest.fixture(scope="session")
+def wftm():
+    yield MockToken.at(WFTM)
+
+
+@pytest.fixture(scope="session")
+def anyWFTM():
+    yield MockAnyWFTM.at(ANY_WFTM)
+
+
+@pytest.fixture(scope="session")
+def sex():
+    yield MockToken.at(SEX)
+
+
+@pytest.fixture(scope="session")
+def solid():
+    yield MockToken.at(SOLID)
+
+
+@pytest.fixture(scope="session")
+def solidex_router():
+    yield MockSolidlyRouter.at(ROUTER)
+
+
+@pytest.fixture(scope="session")
+def lpdepositer():
+    yield MockLpDepositer.at(LP_DEPOSITER)
+
+
+@pytest.fixture(scope="session")
+def healthCheck():
+    yield MockHealthCheck.at(HEALTH_CHECK)
+
+
+@pytest.fixture(scope="session")
+def trade_factory():
+    yield MockTradeFactory.at(TRADE_FACTORY)
+
+
+# nobody to impersonate here, everyone is one of the node's own accounts
+@pytest.fixture(scope="session")
+def gov(accounts):
+    yield accounts[0]
+
+
+@pytest.fixture(scope="session")
+def whale(accounts, wftm):
+    wftm.mint(accounts[1], 10 * POOL_SIDE, {"from": accounts[1]})
+    yield accounts[1]
+
+
+@pytest.fixture(scope="session")
+def strategist(accounts):
+    yield accounts[4]
+
+
+@pytest.fixture(scope="session")
+def keeper(accounts):
+    yield accounts[5]
+
+
+@pytest.fixture(scope="session")
+def rewards(accounts):
+    yield accounts[5]
+
+
+@pytest.fixture(scope="session")
+def strategist_ms(accounts):
+    yield accounts[6]
+
+
+@pytest.fixture(scope="session")
+def ymechs_safe(accounts):
+    yield accounts[7]
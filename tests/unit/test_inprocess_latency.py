@@ -0,0 +1,87 @@
+import shutil
+import subprocess
+import time
+
+import pytest
+from brownie import web3
+from web3 import HTTPProvider
+
+from scripts.inprocess_evm import HOST, PORT, ganache_command, replay
+
+CALLS = 200
+GANACHE_PORT = PORT + 1
+
+
+def per_call(fn):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        fn()
+    return (time.perf_counter() - start) / CALLS
+
+
+@pytest.fixture
+def ganache(inprocess_node):
+    # the path this replaces, when there's a ganache to compare against
+    executable = shutil.which("ganache")
+    if executable is None:
+        yield None
+        return
+    process = subprocess.Popen(
+        ganache_command(inprocess_node, executable, GANACHE_PORT),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://{HOST}:{GANACHE_PORT}"
+    try:
+        for _ in range(300):
+            if HTTPProvider(url).is_connected():
+                break
+            time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def test_inprocess_latency(strategy, gov, inprocess_node, ganache):
+    # brownie -> node, brownie -> http -> node, and brownie -> http -> ganache with the same chain
+    # built again on it. the first two isolate transport, the last is what the fork tests pay
+    views = {
+        "eth_blockNumber": lambda: web3.eth.block_number,
+        "lpSlippage": strategy.lpSlippage,
+        "estimatedTotalAssets": strategy.estimatedTotalAssets,
+        "harvestTrigger": lambda: strategy.harvestTrigger(0),
+    }
+    direct = web3.provider
+    transports = {"in process": direct, "json-rpc": HTTPProvider(f"http://{HOST}:{PORT}")}
+    if ganache is not None:
+        replay(inprocess_node, ganache)
+        transports["ganache"] = HTTPProvider(ganache)
+    else:
+        print("\nno ganache on PATH, timing the in-process node only")
+
+    # the same state everywhere before anything writes, or the comparison means nothing
+    expected = (strategy.estimatedTotalAssets(), strategy.balanceOfLPStaked())
+    timings = {}
+    try:
+        for provider in transports.values():
+            web3.provider = provider
+            assert (strategy.estimatedTotalAssets(), strategy.balanceOfLPStaked()) == expected
+        for name, provider in transports.items():
+            web3.provider = provider
+            timings[name] = {view: per_call(fn) for view, fn in views.items()}
+            timings[name]["setLpSlippage"] = per_call(lambda: strategy.setLpSlippage(9990, {"from": gov}))
+            assert strategy.lpSlippage() == 9990
+    finally:
+        web3.provider = direct
+
+    print("\n" + f"{'':<22}" + "".join(f"{name:>12}" for name in timings) + "  slowest/in process")
+    for view in timings["in process"]:
+        fast = timings["in process"][view]
+        row = "".join(f"{timings[name][view] * 1e3:>10.2f}ms" for name in timings)
+        print(f"{view:<22}{row}  {max(timings[name][view] for name in timings) / fast:.1f}x")
+
+    # skipping http is never slower, and nor is skipping ganache
+    totals = {name: sum(timing.values()) for name, timing in timings.items()}
+    assert all(totals["in process"] < total for name, total in totals.items() if name != "in process")
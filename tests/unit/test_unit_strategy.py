@@ -0,0 +1,38 @@
+# fork tests that only need a vault, a strategy and a pool, run as they are against the mocks
+from tests.test_base_strategy import test_base_strategy  # noqa: F401
+from tests.test_setters import test_setters  # noqa: F401
+from tests.test_triggers import test_less_useful_triggers, test_triggers  # noqa: F401
+
+
+def test_unit_round_trip(gov, token, vault, whale, strategy, chain, amount, anyWFTM, pool):
+    start = token.balanceOf(whale)
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+
+    # all of it went into the pool, half wrapped to anyWFTM first since the pool is balanced
+    assert strategy.balanceOfLPStaked() == pool.balanceOf(strategy.lpDepositer())
+    assert strategy.estimatedTotalAssets() == amount
+    assert token.balanceOf(strategy) == anyWFTM.balanceOf(strategy) == 0
+
+    vault.withdraw({"from": whale})
+    assert token.balanceOf(whale) == start
+
+
+def test_unit_inline_selling_without_a_reward_pair(gov, token, vault, whale, strategy, chain, amount, sex, pool):
+    token.approve(vault, 2 ** 256 - 1, {"from": whale})
+    vault.deposit(amount, {"from": whale})
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+
+    # the mock router has no sex/wftm pair, pairFor points at an address with no code
+    strategy.removeTradeFactoryPermissions({"from": gov})
+    strategy.setSellRewardsOnHarvest(True, 9900, False, {"from": gov})
+    sex.mint(strategy, 10 ** 18, {"from": gov})
+    chain.sleep(1)
+    tx = strategy.harvest({"from": gov})
+
+    # the harvest still goes through, the rewards wait for yswaps
+    assert "RewardsSold" not in tx.events
+    assert sex.balanceOf(strategy) == 10 ** 18